@@ -1,11 +1,12 @@
-import pandas as pd
+import argparse
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
 import unicodedata
 import warnings
 
+from analise_risco.dados import MAPA_TRADUCAO, load_table
+from analise_risco.graficos import figure_task, render_figures
+
 # Ignora avisos para uma saída mais limpa
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
@@ -28,9 +29,8 @@ caminho_dados_hi = os.path.join(caminho_base, arquivo_dados_hi)
 def carregar_arquivo_csv(caminho, nome_arquivo):
     """Carrega um arquivo CSV, remove colunas desnecessárias e trata erros."""
     try:
-        dados = pd.read_csv(caminho)
-        # Remove colunas 'Unnamed' que podem ser criadas pelo pandas
-        dados = dados.loc[:, ~dados.columns.str.contains('^Unnamed')]
+        # Leitura pela camada comum (sem colunas 'Unnamed', com cópia em Parquet)
+        dados = load_table(caminho)
         # Remove a coluna de índice 'No.' se ela existir
         if 'No.' in dados.columns:
             dados = dados.drop(columns=['No.'])
@@ -43,28 +43,9 @@ def carregar_arquivo_csv(caminho, nome_arquivo):
         print(f"✗ ERRO ao ler '{nome_arquivo}': {e}")
         return None
 
-# Carrega os datasets
-dados_fc = carregar_arquivo_csv(caminho_dados_fc, arquivo_dados_fc)
-dados_hi = carregar_arquivo_csv(caminho_dados_hi, arquivo_dados_hi)
-
 # --- 3. MAPEAMENTO DE NOMES DE COLUNAS PARA PORTUGUÊS ---
-mapa_traducao = {
-    'Overload level': 'Nível de Sobrecarga',
-    'Mean Load (MVA)': 'Carga Média (MVA)',
-    'Critical Loads': 'Cargas Críticas',
-    'Oil Volume (L)': 'Volume de Óleo (L)',
-    'Proximity of other buildings (m)': 'Proximidade de Edifícios (m)',
-    'Penalties (MVA)': 'Penalidades (MVA)',
-    'Nivel_Reservatorio_Oleo': 'Nível do Reservatório de Óleo',
-    'Condicao_Corta_Chama': 'Condição do Corta-Chama',
-    'Humidity [ppm]': 'Umidade [ppm]',
-    'Acidity [mg KOH/g]': 'Acidez [mg KOH/g]',
-    'Dielectric Strength [kV]': 'Rigidez Dielétrica [kV]',
-    'Dissipation factor  [%]': 'Fator de Dissipação [%]', # Corrigido espaço duplo
-    'Dissolved gases [ppm]': 'Gases Dissolvidos [ppm]',
-    'DP': 'Grau de Polimerização',
-    'HI': 'Índice de Integridade'
-}
+# O mapa é compartilhado com Validação_Novos_Dados.py (analise_risco.dados)
+mapa_traducao = MAPA_TRADUCAO
 
 # --- 4. FUNÇÕES PARA GERAR GRÁFICOS ---
 def normalizar_nome_arquivo(texto):
@@ -72,14 +53,14 @@ def normalizar_nome_arquivo(texto):
     sem_acentos = ''.join(c for c in unicodedata.normalize('NFD', texto) if unicodedata.category(c) != 'Mn')
     return sem_acentos.lower().replace('[','').replace(']','').replace('%','').replace('/','').replace(' ','_')
 
-def gerar_graficos_individuais(df, nome_dataset, caminho_saida):
-    """Gera e salva histogramas e boxplots para cada coluna do dataframe."""
+def montar_graficos_individuais(df, nome_dataset, caminho_saida):
+    """Monta as tarefas de histograma e boxplot de cada coluna do dataframe."""
     if df is None:
         print(f"\n--- Geração de gráficos para '{nome_dataset}' pulada (dados não carregados).")
-        return
+        return []
 
-    print(f"\n--- Gerando gráficos individuais para o dataset: {nome_dataset} ---")
-    
+    estilo = {'cor': cor_primaria, 'cor_texto': cor_texto, 'formato': 'png', 'dpi': 300}
+    tarefas = []
     for col in df.columns:
         dados_coluna = df[col].dropna()
         if dados_coluna.empty:
@@ -88,27 +69,38 @@ def gerar_graficos_individuais(df, nome_dataset, caminho_saida):
         nome_exibicao = mapa_traducao.get(col, col)
         nome_seguro = normalizar_nome_arquivo(nome_exibicao)
 
-        # --- Histograma ---
-        plt.figure(figsize=(6, 4), constrained_layout=True)
-        sns.histplot(dados_coluna, kde=True, bins=20, color=cor_primaria)
-        plt.xlabel(nome_exibicao, color=cor_texto)
-        plt.ylabel('Frequência', color=cor_texto)
         caminho_hist = os.path.join(caminho_saida, f'{nome_dataset.lower()}_hist_{nome_seguro}.png')
-        plt.savefig(caminho_hist, format='png', dpi=300)
-        plt.close()
-
-        # --- Boxplot ---
-        plt.figure(figsize=(6, 4), constrained_layout=True)
-        sns.boxplot(y=dados_coluna, color=cor_primaria)
-        plt.ylabel(nome_exibicao, color=cor_texto)
         caminho_box = os.path.join(caminho_saida, f'{nome_dataset.lower()}_box_{nome_seguro}.png')
-        plt.savefig(caminho_box, format='png', dpi=300)
-        plt.close()
-
-        print(f" ✓ Gráficos para '{nome_exibicao}' salvos.")
+        tarefas.append(figure_task('hist', dados_coluna, nome_exibicao, caminho_hist, **estilo))
+        tarefas.append(figure_task('box', dados_coluna, nome_exibicao, caminho_box, **estilo))
+    return tarefas
+
+def gerar_graficos_individuais(datasets, caminho_saida, processos=None, usar_cache=True):
+    """
+    Gera e salva histogramas e boxplots para cada coluna de cada dataframe de `datasets`
+    ({nome: df}), em paralelo e pulando as figuras que não mudaram desde a última execução.
+    """
+    tarefas = []
+    for nome_dataset, df in datasets.items():
+        tarefas += montar_graficos_individuais(df, nome_dataset, caminho_saida)
+
+    print(f"\n--- Gerando {len(tarefas)} gráficos individuais ---")
+    status = render_figures(tarefas, processos=processos, cache=usar_cache)
+    for caminho, situacao in status.items():
+        print(f" {'✓' if situacao == 'gerado' else '='} {os.path.basename(caminho)} ({situacao})")
 
 # --- 5. EXECUÇÃO ---
-gerar_graficos_individuais(dados_fc, 'FC', caminho_visualizacoes)
-gerar_graficos_individuais(dados_hi, 'HI', caminho_visualizacoes)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera histogramas e boxplots dos dados originais.')
+    parser.add_argument('--processos', type=int, help='Processos para desenhar as figuras (padrão: núcleos disponíveis)')
+    parser.add_argument('--sem-cache', action='store_true', help='Desenha todas as figuras, mesmo as que não mudaram')
+    args = parser.parse_args()
+
+    # Carrega os datasets
+    dados_fc = carregar_arquivo_csv(caminho_dados_fc, arquivo_dados_fc)
+    dados_hi = carregar_arquivo_csv(caminho_dados_hi, arquivo_dados_hi)
+
+    gerar_graficos_individuais({'FC': dados_fc, 'HI': dados_hi}, caminho_visualizacoes,
+                               processos=args.processos, usar_cache=not args.sem_cache)
 
-print(f"\n--- Processo finalizado. Figuras salvas em: '{caminho_visualizacoes}' ---")
+    print(f"\n--- Processo finalizado. Figuras salvas em: '{caminho_visualizacoes}' ---")
@@ -0,0 +1,195 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing as mp
+import os
+import time
+import warnings
+
+import pandas as pd
+
+# --- 1. CONFIGURAÇÃO ---
+# O caminho base é definido como o diretório onde o script está localizado
+caminho_base = os.path.dirname(os.path.abspath(__file__))
+
+# Sintetizadores da SDV comparados (nomes das classes em `sdv.single_table`)
+SINTETIZADORES = ['CTGANSynthesizer', 'GaussianCopulaSynthesizer', 'TVAESynthesizer', 'CopulaGANSynthesizer']
+
+# Sintetizadores treinados por épocas (recebem o parâmetro `epochs`)
+SINTETIZADORES_COM_EPOCAS = {'CTGANSynthesizer', 'TVAESynthesizer', 'CopulaGANSynthesizer'}
+
+DATASETS = ['FC', 'HI']
+
+# Critério de fidelidade: |AUC - 0.5| abaixo deste limite é "Excelente" em Classificação_Novos_Dados.py
+LIMIAR_AUC_PADRAO = 0.15
+
+
+# Módulos cujos FutureWarning/UserWarning são ignorados durante o ajuste e a amostragem
+MODULOS_AVISOS_SDV = r'(sdv|rdt|ctgan|copulas)(\.|$)'
+
+
+# --- 2. EXECUÇÃO DE UM PAR (SINTETIZADOR, DATASET) ---
+
+@contextlib.contextmanager
+def _avisos_sdv():
+    """Ignora só os avisos conhecidos da SDV e das suas dependências, e só dentro do bloco."""
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="The 'SingleTableMetadata' is deprecated.*")
+        warnings.filterwarnings("ignore", message="We strongly recommend saving the metadata.*")
+        warnings.filterwarnings("ignore", category=FutureWarning, module=MODULOS_AVISOS_SDV)
+        warnings.filterwarnings("ignore", category=UserWarning, module=MODULOS_AVISOS_SDV)
+        yield
+
+
+def benchmark_synthesizer(nome, dataset, epocas, linhas_amostra, linhas_auc, threads):
+    """
+    Treina `nome` no dataset `dataset` ('FC' ou 'HI') e mede custo e fidelidade.
+
+    Retorna um dicionário com o tempo de treino, a vazão de amostragem (linhas/s), o
+    pico de memória do processo e a AUC real vs. sintético de Classificação_Novos_Dados.py.
+    O modelo treinado é salvo no cache de Geração_Dados_SDV.py (`modelos_sdv/`).
+    """
+    import torch
+    import sdv.single_table
+    from analise_risco.pontuacao import peak_rss_mb
+    from Classificação_Novos_Dados import load_data, real_vs_synthetic_auc
+    from Geração_Dados_SDV import caminho_modelos, fc_original_path, hi_original_path, model_path, prepare_training_data
+
+    torch.set_num_threads(threads)
+    classe = getattr(sdv.single_table, nome)
+    kwargs = {'epochs': epocas} if nome in SINTETIZADORES_COM_EPOCAS else {}
+    original_path = {'FC': fc_original_path, 'HI': hi_original_path}[dataset]
+
+    # As mensagens da preparação dos dados já aparecem na geração normal; aqui só atrapalham
+    with contextlib.redirect_stdout(io.StringIO()):
+        real_data, metadata = prepare_training_data(original_path)
+
+    inicio = time.perf_counter()
+    with _avisos_sdv():
+        synthesizer = classe(metadata, **kwargs)
+        synthesizer.fit(real_data)
+    tempo_ajuste = time.perf_counter() - inicio
+
+    os.makedirs(caminho_modelos, exist_ok=True)
+    synthesizer.save(model_path(classe, real_data, metadata, kwargs))
+
+    inicio = time.perf_counter()
+    with _avisos_sdv():
+        synthesizer.sample(num_rows=linhas_amostra)
+    tempo_amostragem = time.perf_counter() - inicio
+
+    with _avisos_sdv():
+        sinteticos = synthesizer.sample(num_rows=linhas_auc)
+    auc = real_vs_synthetic_auc(load_data(original_path), sinteticos)
+    return {
+        'sintetizador': nome,
+        'dataset': dataset,
+        'epocas': kwargs.get('epochs'),
+        'tempo_ajuste_s': tempo_ajuste,
+        'linhas_por_segundo_amostragem': linhas_amostra / tempo_amostragem,
+        'pico_memoria_mb': peak_rss_mb(),
+        'auc': float(auc),
+    }
+
+
+def _executar(tarefa):
+    """Executa uma tarefa do pool sem derrubar o benchmark se um sintetizador falhar."""
+    try:
+        return benchmark_synthesizer(*tarefa)
+    except Exception as e:
+        return {'sintetizador': tarefa[0], 'dataset': tarefa[1], 'erro': f'{type(e).__name__}: {e}'}
+
+
+# --- 3. BENCHMARK E RELATÓRIO ---
+
+def recommend(resultados, limiar_auc=LIMIAR_AUC_PADRAO):
+    """
+    Sintetizador mais barato (menor tempo total de treino) que atende ao critério de
+    fidelidade em todos os datasets, ou None se nenhum atender.
+    """
+    resumo = {}
+    for r in resultados:
+        item = resumo.setdefault(r['sintetizador'], {'tempo_ajuste_s': 0.0, 'atende': True, 'datasets': 0})
+        item['datasets'] += 1
+        if 'erro' in r:
+            item['atende'] = False
+            continue
+        item['tempo_ajuste_s'] += r['tempo_ajuste_s']
+        item['atende'] &= abs(r['auc'] - 0.5) < limiar_auc
+    aprovados = {nome: item for nome, item in resumo.items() if item['atende'] and item['datasets'] == len(DATASETS)}
+    if not aprovados:
+        return None
+    nome = min(aprovados, key=lambda n: aprovados[n]['tempo_ajuste_s'])
+    return {'sintetizador': nome, 'tempo_ajuste_total_s': aprovados[nome]['tempo_ajuste_s']}
+
+
+def run_benchmark(sintetizadores=SINTETIZADORES, epocas=1000, linhas_amostra=10000, linhas_auc=215,
+                  processos=None, limiar_auc=LIMIAR_AUC_PADRAO):
+    """
+    Treina cada sintetizador em FC e HI em paralelo (um processo novo por tarefa, para
+    que o pico de memória medido seja o da própria tarefa) e monta o relatório.
+    """
+    tarefas_base = [(nome, dataset) for nome in sintetizadores for dataset in DATASETS]
+    processos = min(processos or os.cpu_count() or 1, len(tarefas_base))
+    threads = max(1, (os.cpu_count() or 1) // processos)
+    tarefas = [(nome, dataset, epocas, linhas_amostra, linhas_auc, threads) for nome, dataset in tarefas_base]
+    print(f"Benchmark: {len(sintetizadores)} sintetizador(es) x {len(DATASETS)} datasets, "
+          f"{processos} processo(s) com {threads} thread(s) cada")
+
+    inicio = time.perf_counter()
+    resultados = []
+    with mp.Pool(processes=processos, maxtasksperchild=1) as pool:
+        for r in pool.imap_unordered(_executar, tarefas):
+            resultados.append(r)
+            if 'erro' in r:
+                print(f" ✗ {r['sintetizador']:<28} {r['dataset']}: {r['erro']}")
+            else:
+                status = '✓' if abs(r['auc'] - 0.5) < limiar_auc else '✗'
+                print(f" {status} {r['sintetizador']:<28} {r['dataset']}: treino {r['tempo_ajuste_s']:8.1f} s | "
+                      f"{r['linhas_por_segundo_amostragem']:>10,.0f} linhas/s | "
+                      f"{r['pico_memoria_mb']:>7,.0f} MB | AUC {r['auc']:.4f}")
+
+    resultados.sort(key=lambda r: (sintetizadores.index(r['sintetizador']), DATASETS.index(r['dataset'])))
+    return {
+        'parametros': {
+            'sintetizadores': list(sintetizadores), 'epocas': epocas, 'linhas_amostra': linhas_amostra,
+            'linhas_auc': linhas_auc, 'processos': processos, 'limiar_auc': limiar_auc,
+        },
+        'tempo_total_s': time.perf_counter() - inicio,
+        'resultados': resultados,
+        'recomendacao': recommend(resultados, limiar_auc),
+    }
+
+
+# --- 4. EXECUÇÃO PRINCIPAL ---
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compara o custo e a fidelidade dos sintetizadores da SDV.')
+    parser.add_argument('--sintetizadores', nargs='+', choices=SINTETIZADORES, default=SINTETIZADORES)
+    parser.add_argument('--epocas', type=int, default=1000, help='Épocas de CTGAN, TVAE e CopulaGAN')
+    parser.add_argument('--linhas-amostra', type=int, default=10000, help='Linhas usadas na medição da vazão')
+    parser.add_argument('--linhas-auc', type=int, default=215, help='Linhas sintéticas usadas no cálculo da AUC')
+    parser.add_argument('--processos', type=int, help='Processos em paralelo (padrão: núcleos disponíveis)')
+    parser.add_argument('--limiar-auc', type=float, default=LIMIAR_AUC_PADRAO, help='Máximo aceito para |AUC - 0.5|')
+    parser.add_argument('--saida', default=os.path.join(caminho_base, 'benchmark_sintetizadores.json'),
+                        help='Relatório em JSON (uma tabela .csv com o mesmo nome também é gravada)')
+    args = parser.parse_args()
+
+    relatorio = run_benchmark(args.sintetizadores, args.epocas, args.linhas_amostra, args.linhas_auc,
+                              args.processos, args.limiar_auc)
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    pd.DataFrame(relatorio['resultados']).to_csv(os.path.splitext(args.saida)[0] + '.csv', index=False,
+                                                 encoding='utf-8-sig')
+    print(f"-> Relatório salvo em: '{args.saida}'")
+
+    recomendacao = relatorio['recomendacao']
+    if recomendacao:
+        print(f"\n--> Recomendação: {recomendacao['sintetizador']} (mais barato que atende |AUC - 0.5| < "
+              f"{args.limiar_auc}, {recomendacao['tempo_ajuste_total_s']:.1f} s de treino no total)")
+    else:
+        print(f"\n--> Nenhum sintetizador atendeu |AUC - 0.5| < {args.limiar_auc} em todos os datasets.")
+
+    print(f"\n{'='*25} Benchmark Concluído {'='*25}")
@@ -1,14 +1,22 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
 from sklearn.metrics import classification_report, roc_auc_score
 # Importante: A biblioteca imbalanced-learn já deve estar instalada.
 from imblearn.over_sampling import SMOTE
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import argparse
+import json
+import time
 import warnings
+from contextlib import nullcontext
+from joblib import Parallel, delayed
+from threadpoolctl import threadpool_limits
+from analise_risco import perfil
+from analise_risco.dados import load_table
 
 # Ignora avisos para uma saída mais limpa
 warnings.simplefilter(action='ignore', category=FutureWarning)
@@ -37,7 +45,7 @@ def load_data(file_path):
         print(f"ERRO: Arquivo não encontrado em '{file_path}'. Pulando.")
         return None
     try:
-        return pd.read_csv(file_path)
+        return load_table(file_path)
     except Exception as e:
         print(f"ERRO: Falha ao ler o arquivo '{file_path}'. Erro: {e}")
         return None
@@ -49,31 +57,19 @@ def preprocess_dataframe(df):
         df_copy = df_copy.drop(columns=['No.'])
     return df_copy.select_dtypes(include=np.number)
 
-# --- 3. LOOP PRINCIPAL DE PROCESSAMENTO ---
-
-for dataset_name, files in datasets_to_process.items():
-    print(f"\n{'='*20} Processando Conjunto de Dados: {dataset_name} {'='*20}")
-
-    # Constrói os caminhos completos dos arquivos usando o caminho base dinâmico
-    real_file_path = os.path.join(caminho_base, files['real'])
-    sint_file_path = os.path.join(caminho_base, files['synthetic'])
-
-    # Carrega os dados reais e sintéticos
-    df_real = load_data(real_file_path)
-    df_sint = load_data(sint_file_path)
-
-    if df_real is None or df_sint is None:
-        continue
-
+def build_classification_data(df_real, df_sint, verbose=True):
+    """Junta reais (rótulo 0) e sintéticos (rótulo 1) nas colunas numéricas em comum. Retorna (X, y)."""
     # Pré-processa os dataframes
     df_real_proc = preprocess_dataframe(df_real)
     df_sint_proc = preprocess_dataframe(df_sint)
 
-    # Garante que ambos os dataframes tenham as mesmas colunas para a análise
-    common_cols = list(set(df_real_proc.columns) & set(df_sint_proc.columns))
+    # Garante que ambos os dataframes tenham as mesmas colunas para a análise (na ordem das reais,
+    # para que o resultado não dependa da ordem de iteração de um set)
+    common_cols = [col for col in df_real_proc.columns if col in df_sint_proc.columns]
     df_real_proc = df_real_proc[common_cols]
     df_sint_proc = df_sint_proc[common_cols]
-    print(f"Analisando {len(common_cols)} colunas em comum.")
+    if verbose:
+        print(f"Analisando {len(common_cols)} colunas em comum.")
 
     # Cria os rótulos (0 para real, 1 para sintético)
     df_real_proc['label'] = 0
@@ -84,62 +80,209 @@ for dataset_name, files in datasets_to_process.items():
 
     # Preenche valores nulos com a média da coluna, se houver
     if df_total.isnull().sum().sum() > 0:
-        print("Atenção: Valores nulos detectados. Preenchendo com a média da coluna.")
+        if verbose:
+            print("Atenção: Valores nulos detectados. Preenchendo com a média da coluna.")
         df_total = df_total.fillna(df_total.mean())
 
     # Separa as features (X) e o alvo (y)
-    X = df_total.drop(columns=['label'])
-    y = df_total['label']
+    return df_total.drop(columns=['label']), df_total['label']
 
+def train_classifier(X, y, random_state=42, verbose=True):
+    """
+    Divide em treino/teste, aplica SMOTE no treino e treina o RandomForest.
+
+    Retorna (clf, X_test, y_test).
+    """
     # Divide em treino e teste (estratificado para manter a proporção de classes)
     X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.3, random_state=42, stratify=y
+        X, y, test_size=0.3, random_state=random_state, stratify=y
     )
 
     # Aplica a técnica de oversampling SMOTE apenas nos dados de TREINO para evitar vazamento de dados
-    print(f"Distribuição original de classes no treino: \n{y_train.value_counts().to_string()}")
-    smote = SMOTE(random_state=42)
-    X_train_resampled, y_train_resampled = smote.fit_resample(X_train, y_train)
-    print(f"\nDistribuição de classes após SMOTE: \n{y_train_resampled.value_counts().to_string()}")
-    
+    if verbose:
+        print(f"Distribuição original de classes no treino: \n{y_train.value_counts().to_string()}")
+    smote = SMOTE(random_state=random_state)
+    with perfil.stage('classificacao.smote'):
+        X_train_resampled, y_train_resampled = smote.fit_resample(X_train, y_train)
+    if verbose:
+        print(f"\nDistribuição de classes após SMOTE: \n{y_train_resampled.value_counts().to_string()}")
+
     # Treina o classificador RandomForest com os dados de treino balanceados
-    clf = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
-    clf.fit(X_train_resampled, y_train_resampled)
+    clf = RandomForestClassifier(n_estimators=100, random_state=random_state, n_jobs=-1)
+    with perfil.stage('classificacao.random_forest'):
+        clf.fit(X_train_resampled, y_train_resampled)
+    return clf, X_test, y_test
 
-    # Faz previsões no conjunto de teste original
-    y_pred = clf.predict(X_test)
-    y_proba = clf.predict_proba(X_test)[:, 1]
+def real_vs_synthetic_auc(df_real, df_sint, random_state=42):
+    """AUC ROC do classificador real vs. sintético (≈ 0.5 indica dados indistinguíveis)."""
+    X, y = build_classification_data(df_real, df_sint, verbose=False)
+    clf, X_test, y_test = train_classifier(X, y, random_state, verbose=False)
+    return roc_auc_score(y_test, clf.predict_proba(X_test)[:, 1])
 
-    # --- APRESENTAÇÃO DOS RESULTADOS ---
-    print(f"\n--- Relatório de Classificação Final: {dataset_name} ---")
-    print(classification_report(y_test, y_pred, target_names=['Real', 'Sintético']))
-    
-    auc_score = roc_auc_score(y_test, y_proba)
-    print(f"--> Pontuação AUC ROC: {auc_score:.4f}")
-    
-    # Interpretação da qualidade dos dados sintéticos com base na pontuação AUC
+# --- 3. AVALIAÇÃO POR VALIDAÇÃO CRUZADA ---
+
+def make_classifier(backend='rf', random_state=42, n_jobs=-1):
+    """Classificador real vs. sintético: 'rf' (RandomForest, como na análise padrão) ou 'hgb' (para N grande)."""
+    if backend == 'rf':
+        return RandomForestClassifier(n_estimators=100, random_state=random_state, n_jobs=n_jobs)
+    if backend == 'hgb':
+        return HistGradientBoostingClassifier(random_state=random_state)
+    raise ValueError(f"Classificador inválido: '{backend}'. Use 'rf' ou 'hgb'.")
+
+def _auc_fold(X, y, train_idx, test_idx, backend, random_state, n_jobs):
+    """
+    Treina um fold (SMOTE só na parte de treino do fold) e retorna a AUC na parte de teste.
+
+    Com `n_jobs=1` (folds em paralelo), as bibliotecas nativas (OpenMP do
+    HistGradientBoosting, BLAS) também ficam limitadas a uma thread neste processo.
+    """
+    with threadpool_limits(limits=1) if n_jobs == 1 else nullcontext():
+        smote = SMOTE(random_state=random_state)
+        X_train_resampled, y_train_resampled = smote.fit_resample(X.iloc[train_idx], y.iloc[train_idx])
+        clf = make_classifier(backend, random_state, n_jobs)
+        clf.fit(X_train_resampled, y_train_resampled)
+        return roc_auc_score(y.iloc[test_idx], clf.predict_proba(X.iloc[test_idx])[:, 1])
+
+@perfil.profiled('classificacao.auc_cv')
+def cross_validated_auc(df_real, df_sint, folds=5, backend='rf', max_synthetic=None, workers=None,
+                        random_state=42, confidence=0.95):
+    """
+    AUC real vs. sintético por validação cruzada estratificada em `folds` partes.
+
+    Os folds rodam em paralelo (`workers` processos, padrão: um por fold até o número
+    de núcleos), cada um com SMOTE aplicado apenas no seu treino. Com `max_synthetic`,
+    conjuntos sintéticos maiores são subamostrados antes da avaliação. Retorna a AUC
+    média, o desvio padrão, o intervalo de confiança (t de Student) e o tempo total.
+    """
+    from scipy.stats import t
+
+    inicio = time.perf_counter()
+    linhas_sinteticas = len(df_sint)
+    if max_synthetic and len(df_sint) > max_synthetic:
+        df_sint = df_sint.sample(n=max_synthetic, random_state=random_state)
+    X, y = build_classification_data(df_real, df_sint, verbose=False)
+
+    workers = min(folds, os.cpu_count() or 1) if workers is None else workers
+    # Com folds em paralelo, cada fold usa um único núcleo (n_jobs do RandomForest e threads
+    # OpenMP/BLAS do HistGradientBoosting) para não disputar CPU
+    n_jobs_modelo = -1 if workers == 1 else 1
+    divisoes = StratifiedKFold(n_splits=folds, shuffle=True, random_state=random_state).split(X, y)
+    aucs = Parallel(n_jobs=workers)(
+        delayed(_auc_fold)(X, y, train_idx, test_idx, backend, random_state, n_jobs_modelo)
+        for train_idx, test_idx in divisoes
+    )
+
+    aucs = np.array(aucs)
+    media = float(aucs.mean())
+    desvio = float(aucs.std(ddof=1)) if folds > 1 else 0.0
+    meia_largura = float(t.ppf(0.5 + confidence / 2, folds - 1) * desvio / np.sqrt(folds)) if folds > 1 else 0.0
+    return {
+        'auc_media': media,
+        'auc_desvio': desvio,
+        'auc_ic': [max(media - meia_largura, 0.0), min(media + meia_largura, 1.0)],
+        'confianca': confidence,
+        'aucs_por_fold': aucs.tolist(),
+        'folds': folds,
+        'classificador': backend,
+        'linhas_reais': int((y == 0).sum()),
+        'linhas_sinteticas': int((y == 1).sum()),
+        'linhas_sinteticas_originais': linhas_sinteticas,
+        'segundos': time.perf_counter() - inicio,
+    }
+
+def interpret_auc(auc_score):
+    """Interpretação da qualidade dos dados sintéticos com base na pontuação AUC."""
     distance_from_half = abs(auc_score - 0.5)
     if distance_from_half < 0.15: # AUC entre 0.35 e 0.65
-        print("--> Interpretação: Excelente! O modelo tem dificuldade em distinguir os dados, sugerindo alta qualidade dos dados sintéticos.")
+        return "Excelente! O modelo tem dificuldade em distinguir os dados, sugerindo alta qualidade dos dados sintéticos."
     elif distance_from_half < 0.25: # AUC entre 0.25-0.35 ou 0.65-0.75
-        print("--> Interpretação: Bom. Os dados são muito semelhantes, embora o modelo tenha alguma capacidade de distingui-los.")
+        return "Bom. Os dados são muito semelhantes, embora o modelo tenha alguma capacidade de distingui-los."
     else: # AUC < 0.25 ou > 0.75
-        print("--> Interpretação: Atenção. O modelo consegue distinguir os dados, indicando que podem não ser uma boa imitação dos reais.")
+        return "Atenção. O modelo consegue distinguir os dados, indicando que podem não ser uma boa imitação dos reais."
+
+# --- 4. LOOP PRINCIPAL DE PROCESSAMENTO ---
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Avalia a similaridade entre dados reais e sintéticos (AUC).')
+    parser.add_argument('--cv', type=int, metavar='K',
+                        help='Validação cruzada estratificada com K folds em paralelo (AUC média e IC)')
+    parser.add_argument('--classificador', choices=['rf', 'hgb'], default='rf',
+                        help="'rf' (RandomForest) ou 'hgb' (HistGradientBoosting, indicado para N grande)")
+    parser.add_argument('--max-sinteticos', type=int, help='Subamostra os dados sintéticos até este número de linhas')
+    parser.add_argument('--processos', type=int, help='Folds avaliados em paralelo (padrão: um por fold)')
+    parser.add_argument('--sintetico-fc', help='CSV sintético de FC (padrão: Dados_FC_Sinteticos_Final.csv)')
+    parser.add_argument('--sintetico-hi', help='CSV sintético de HI (padrão: Dados_HI_Sinteticos_Final.csv)')
+    parser.add_argument('--saida-json', help='Grava os resultados da validação cruzada neste arquivo')
+    args = parser.parse_args()
+
+    if args.sintetico_fc:
+        datasets_to_process['FC']['synthetic'] = args.sintetico_fc
+    if args.sintetico_hi:
+        datasets_to_process['HI']['synthetic'] = args.sintetico_hi
+    resultados_cv = {}
+
+    for dataset_name, files in datasets_to_process.items():
+        print(f"\n{'='*20} Processando Conjunto de Dados: {dataset_name} {'='*20}")
+
+        # Constrói os caminhos completos dos arquivos usando o caminho base dinâmico
+        real_file_path = os.path.join(caminho_base, files['real'])
+        sint_file_path = os.path.join(caminho_base, files['synthetic'])
+
+        # Carrega os dados reais e sintéticos
+        df_real = load_data(real_file_path)
+        df_sint = load_data(sint_file_path)
 
-    # Plota a importância das features para o modelo
-    feat_importances = pd.Series(clf.feature_importances_, index=X.columns).sort_values(ascending=False)
+        if df_real is None or df_sint is None:
+            continue
+
+        if args.cv:
+            r = cross_validated_auc(df_real, df_sint, args.cv, args.classificador, args.max_sinteticos, args.processos)
+            resultados_cv[dataset_name] = r
+            print(f"Validação cruzada: {r['folds']} folds, classificador '{r['classificador']}', "
+                  f"{r['linhas_reais']:,} linhas reais x {r['linhas_sinteticas']:,} sintéticas "
+                  f"(de {r['linhas_sinteticas_originais']:,})")
+            print(f"--> AUC ROC: {r['auc_media']:.4f} ± {r['auc_desvio']:.4f} "
+                  f"(IC {r['confianca']:.0%}: {r['auc_ic'][0]:.4f} a {r['auc_ic'][1]:.4f}) em {r['segundos']:.1f} s")
+            print(f"--> Interpretação: {interpret_auc(r['auc_media'])}")
+            continue
+
+        # Monta as features (X) e o alvo (y) e treina o classificador
+        X, y = build_classification_data(df_real, df_sint)
+        clf, X_test, y_test = train_classifier(X, y)
+
+        # Faz previsões no conjunto de teste original
+        y_pred = clf.predict(X_test)
+        y_proba = clf.predict_proba(X_test)[:, 1]
+
+        # --- APRESENTAÇÃO DOS RESULTADOS ---
+        print(f"\n--- Relatório de Classificação Final: {dataset_name} ---")
+        print(classification_report(y_test, y_pred, target_names=['Real', 'Sintético']))
     
-    plt.figure(figsize=(12, 8))
-    sns.barplot(x=feat_importances.values, y=feat_importances.index, palette='viridis', hue=feat_importances.index, legend=False, dodge=False)
-    plt.title(f'Importância das Features ({dataset_name}) para Distinguir Real vs. Sintético', fontsize=16)
-    plt.xlabel('Nível de Importância', fontsize=12)
-    plt.ylabel('Feature', fontsize=12)
-    plt.tight_layout()
+        auc_score = roc_auc_score(y_test, y_proba)
+        print(f"--> Pontuação AUC ROC: {auc_score:.4f}")
     
-    # Salva o gráfico no mesmo diretório do script
-    plot_path = os.path.join(caminho_base, f'importancia_features_{dataset_name}.png')
-    plt.savefig(plot_path)
-    print(f"--> Gráfico de importância salvo em: {plot_path}")
-    plt.close()
+        # Interpretação da qualidade dos dados sintéticos com base na pontuação AUC
+        print(f"--> Interpretação: {interpret_auc(auc_score)}")
+
+        # Plota a importância das features para o modelo
+        feat_importances = pd.Series(clf.feature_importances_, index=X.columns).sort_values(ascending=False)
+    
+        plt.figure(figsize=(12, 8))
+        sns.barplot(x=feat_importances.values, y=feat_importances.index, palette='viridis', hue=feat_importances.index, legend=False, dodge=False)
+        plt.title(f'Importância das Features ({dataset_name}) para Distinguir Real vs. Sintético', fontsize=16)
+        plt.xlabel('Nível de Importância', fontsize=12)
+        plt.ylabel('Feature', fontsize=12)
+        plt.tight_layout()
+    
+        # Salva o gráfico no mesmo diretório do script
+        plot_path = os.path.join(caminho_base, f'importancia_features_{dataset_name}.png')
+        plt.savefig(plot_path)
+        print(f"--> Gráfico de importância salvo em: {plot_path}")
+        plt.close()
+
+    if args.saida_json and resultados_cv:
+        with open(args.saida_json, 'w', encoding='utf-8') as f:
+            json.dump(resultados_cv, f, indent=2, ensure_ascii=False)
+        print(f"\n-> Resultados da validação cruzada salvos em: '{args.saida_json}'")
 
-print(f"\n{'='*25} Análise Final Concluída {'='*25}")
+    print(f"\n{'='*25} Análise Final Concluída {'='*25}")
@@ -1,7 +1,17 @@
 import pandas as pd
 import os
+import argparse
+import hashlib
+import json
+import time
+import types
+from collections import deque
+from importlib.metadata import version
 import numpy as np
 import torch
+from analise_risco import perfil
+from analise_risco.aumento import augment_fc, feature_columns
+from analise_risco.dados import load_table
 # Importante: As bibliotecas sdv e torch já devem estar instaladas.
 from sdv.single_table import CTGANSynthesizer
 from sdv.metadata import SingleTableMetadata
@@ -12,10 +22,11 @@ warnings.filterwarnings("ignore", message="The 'SingleTableMetadata' is deprecat
 warnings.filterwarnings("ignore", message="We strongly recommend saving the metadata.*")
 
 # --- Define a seed para reprodutibilidade dos resultados ---
-np.random.seed(42)
+SEMENTE = 42
+np.random.seed(SEMENTE)
 if torch.cuda.is_available():
-    torch.cuda.manual_seed_all(42)
-torch.manual_seed(42)
+    torch.cuda.manual_seed_all(SEMENTE)
+torch.manual_seed(SEMENTE)
 
 
 # --- 1. CONFIGURAÇÃO DE CAMINHOS DINÂMICOS ---
@@ -30,70 +41,321 @@ hi_original_path = os.path.join(caminho_base, 'Dados Fis HI.csv')
 fc_synthetic_path = os.path.join(caminho_base, 'Dados_FC_Sinteticos_Final.csv')
 hi_synthetic_path = os.path.join(caminho_base, 'Dados_HI_Sinteticos_Final.csv')
 
+# Pasta com os modelos já treinados e os checkpoints de treinamento
+caminho_modelos = os.path.join(caminho_base, 'modelos_sdv')
 
-# --- 2. FUNÇÃO PARA GERAR DADOS SINTÉTICOS ---
+# Intervalo padrão, em épocas, entre dois checkpoints do CTGAN
+EPOCAS_POR_CHECKPOINT = 100
 
-def generate_synthetic_data(synthesizer_class, original_file_path, output_file_path, num_rows=215, **kwargs):
+# Versões do ctgan (mínima inclusive, máxima exclusive) cujo `fit` usa os nomes trocados pelos checkpoints
+VERSOES_CTGAN_CHECKPOINT = ((0, 9), (0, 13))
+
+
+# --- 2. CACHE E CHECKPOINTS DOS MODELOS ---
+
+def model_cache_key(synthesizer_class, real_data, metadata, kwargs):
+    """
+    Hash que identifica um modelo treinado: dados de treino, metadados, classe,
+    hiperparâmetros e semente. Qualquer alteração gera um novo modelo.
+    """
+    hash_dados = hashlib.sha256(pd.util.hash_pandas_object(real_data, index=True).to_numpy().tobytes())
+    hash_dados.update(json.dumps([list(real_data.columns), [str(t) for t in real_data.dtypes]]).encode('utf-8'))
+    texto = json.dumps({
+        'dados': hash_dados.hexdigest(),
+        'metadados': metadata.to_dict(),
+        'classe': synthesizer_class.__name__,
+        'kwargs': kwargs,
+        'semente': SEMENTE,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:16]
+
+
+def model_path(synthesizer_class, real_data, metadata, kwargs):
+    """Caminho do modelo treinado em `modelos_sdv/` (existindo ou não)."""
+    chave = model_cache_key(synthesizer_class, real_data, metadata, kwargs)
+    return os.path.join(caminho_modelos, f'{synthesizer_class.__name__}_{chave}.pkl')
+
+
+class _EpocasComCheckpoint:
+    """Laço de épocas do CTGAN que começa em `inicio` e chama `ao_fim(n)` a cada `a_cada` épocas."""
+
+    def __init__(self, barra, total, a_cada, ao_fim):
+        self.barra, self.total, self.a_cada, self.ao_fim = barra, total, a_cada, ao_fim
+
+    def __iter__(self):
+        for epoca in self.barra:
+            yield epoca
+            # Neste ponto a época `epoca` já foi concluída pelo laço de treino
+            concluidas = epoca + 1
+            if concluidas % self.a_cada == 0 and concluidas < self.total:
+                self.ao_fim(concluidas)
+
+    def set_description(self, texto):
+        self.barra.set_description(texto)
+
+
+class CTGANCheckpoints:
+    """
+    Salva o estado do treinamento do CTGAN a cada `a_cada` épocas e retoma dele.
+
+    O `fit` da biblioteca ctgan não tem ganchos nem retomada, então, dentro deste
+    contexto, os nomes que ele usa no módulo `ctgan.synthesizers.ctgan`
+    (`DataTransformer`, `Generator`, `Discriminator`, `optim` e `tqdm`) são trocados
+    por fábricas que registram os objetos criados. Isso depende dos nomes internos
+    do ctgan, conferidos no código das versões em `VERSOES_CTGAN_CHECKPOINT`; com
+    outra versão, o contexto falha antes de treinar (use `--checkpoint-a-cada 0`).
+
+    O checkpoint guarda o transformador, os dados já transformados, as duas redes,
+    os estados dos otimizadores, os geradores aleatórios do NumPy e do torch (CPU)
+    e o histórico de perdas (`loss_values`). Na retomada, o transformador não é
+    reajustado nem reaplicado (o `transform` sorteia valores e mudaria o estado
+    aleatório), e o laço de épocas recomeça de onde parou com os estados salvos.
+    A retomada ainda não foi comparada com um treinamento sem interrupção: trate o
+    modelo retomado como equivalente, não como idêntico. O gerador aleatório da
+    CUDA não é salvo.
+    """
+    NOMES = ('DataTransformer', 'Generator', 'Discriminator', 'optim', 'tqdm')
+
+    def __init__(self, caminho, a_cada, chave, synthesizer=None):
+        self.caminho, self.a_cada, self.chave = caminho, a_cada, chave
+        # Sintetizador do sdv, para ler e restaurar o `loss_values` do modelo CTGAN interno
+        self.synthesizer = synthesizer
+        self.salvo = self._ler()
+        self.objetos = {}
+        self.otimizadores = []
+
+    def _ler(self):
+        if not os.path.exists(self.caminho):
+            return None
+        estado = torch.load(self.caminho, map_location='cpu', weights_only=False)
+        # Checkpoints de versões anteriores (sem os dados transformados) não são retomados
+        return estado if estado.get('chave') == self.chave and 'dados' in estado else None
+
+    def __enter__(self):
+        from ctgan.synthesizers import ctgan as modulo
+
+        self._verificar_versao(modulo)
+        self.modulo = modulo
+        self.originais = {nome: getattr(modulo, nome) for nome in self.NOMES}
+        modulo.DataTransformer = self._transformador
+        modulo.Generator = self._componente('gerador', self.originais['Generator'])
+        modulo.Discriminator = self._componente('discriminador', self.originais['Discriminator'])
+        modulo.optim = types.SimpleNamespace(Adam=self._adam)
+        modulo.tqdm = self._epocas
+        return self
+
+    def _verificar_versao(self, modulo):
+        instalada = version('ctgan')
+        minima, maxima = VERSOES_CTGAN_CHECKPOINT
+        numeros = tuple(int(p) for p in instalada.split('.')[:2] if p.isdigit())
+        faltando = [nome for nome in self.NOMES if not hasattr(modulo, nome)]
+        if not minima <= numeros < maxima or faltando:
+            raise RuntimeError(
+                f"Checkpoints do CTGAN não suportados no ctgan {instalada} (suportado: "
+                f"{'.'.join(map(str, minima))} a {'.'.join(map(str, maxima))} exclusive). "
+                "Use --checkpoint-a-cada 0 para treinar sem checkpoints."
+            )
+
+    def __exit__(self, *exc):
+        for nome, original in self.originais.items():
+            setattr(self.modulo, nome, original)
+        transformador = self.objetos.get('transformador')
+        if transformador is not None:
+            transformador.__dict__.pop('fit', None)
+            transformador.__dict__.pop('transform', None)
+
+    # Fábricas usadas pelo `CTGAN.fit`
+
+    def _transformador(self):
+        # `fit` e `transform` são trocados só na instância e se removem na primeira chamada,
+        # então nenhum checkpoint guarda referências a este script
+        if self.salvo:
+            transformador = self.salvo['transformador']
+
+            def ajuste_ignorado(*args, **kwargs):
+                transformador.__dict__.pop('fit', None)
+
+            def dados_salvos(*args, **kwargs):
+                transformador.__dict__.pop('transform', None)
+                self.objetos['dados'] = self.salvo['dados']
+                return self.salvo['dados']
+
+            transformador.fit = ajuste_ignorado
+            transformador.transform = dados_salvos
+        else:
+            transformador = self.originais['DataTransformer']()
+
+            def transformar(*args, **kwargs):
+                transformador.__dict__.pop('transform', None)
+                self.objetos['dados'] = transformador.transform(*args, **kwargs)
+                return self.objetos['dados']
+
+            transformador.transform = transformar
+        self.objetos['transformador'] = transformador
+        return transformador
+
+    def _modelo(self):
+        return getattr(self.synthesizer, '_model', None)
+
+    def _componente(self, nome, classe):
+        def fabrica(*args, **kwargs):
+            objeto = self.salvo[nome] if self.salvo else classe(*args, **kwargs)
+            self.objetos[nome] = objeto
+            return objeto
+        return fabrica
+
+    def _adam(self, parametros, **kwargs):
+        otimizador = torch.optim.Adam(parametros, **kwargs)
+        if self.salvo:
+            otimizador.load_state_dict(self.salvo['otimizadores'][len(self.otimizadores)])
+        self.otimizadores.append(otimizador)
+        return otimizador
+
+    def _epocas(self, epocas, **kwargs):
+        inicio = self.salvo['epocas_concluidas'] if self.salvo else 0
+        if self.salvo:
+            np.random.set_state(self.salvo['estado_numpy'])
+            torch.set_rng_state(self.salvo['estado_torch'])
+            modelo = self._modelo()
+            if modelo is not None and self.salvo.get('perdas') is not None:
+                modelo.loss_values = self.salvo['perdas']
+        barra = self.originais['tqdm'](range(inicio, len(epocas)), **kwargs)
+        return _EpocasComCheckpoint(barra, len(epocas), self.a_cada, self._salvar)
+
+    def _salvar(self, concluidas):
+        estado = {
+            'chave': self.chave,
+            'epocas_concluidas': concluidas,
+            'transformador': self.objetos['transformador'],
+            'dados': self.objetos['dados'],
+            'gerador': self.objetos['gerador'],
+            'discriminador': self.objetos['discriminador'],
+            'otimizadores': [o.state_dict() for o in self.otimizadores],
+            'estado_numpy': np.random.get_state(),
+            'estado_torch': torch.get_rng_state(),
+            'perdas': getattr(self._modelo(), 'loss_values', None),
+        }
+        tmp = f'{self.caminho}.tmp'
+        torch.save(estado, tmp)
+        os.replace(tmp, self.caminho)
+        print(f"   checkpoint salvo: {concluidas} épocas concluídas")
+
+
+def load_or_fit_synthesizer(synthesizer_class, real_data, metadata, checkpoint_every=EPOCAS_POR_CHECKPOINT,
+                            retrain=False, sample_only=False, **kwargs):
+    """
+    Devolve o sintetizador treinado para estes dados, metadados e hiperparâmetros.
+
+    Se o modelo já estiver em `modelos_sdv/`, ele é apenas carregado. Caso contrário é
+    treinado (o CTGAN com checkpoints a cada `checkpoint_every` épocas, retomando de um
+    checkpoint anterior se houver) e salvo no cache. Com `sample_only=True`, nunca
+    treina: retorna None se o modelo não estiver no cache.
+    """
+    chave = model_cache_key(synthesizer_class, real_data, metadata, kwargs)
+    caminho_modelo = model_path(synthesizer_class, real_data, metadata, kwargs)
+    caminho_checkpoint = caminho_modelo.replace('.pkl', '.checkpoint.pt')
+
+    if os.path.exists(caminho_modelo) and not retrain:
+        print(f"Modelo treinado encontrado no cache: '{caminho_modelo}'")
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return synthesizer_class.load(caminho_modelo)
+    if sample_only:
+        print(f"ERRO: Nenhum modelo treinado no cache para estes dados e parâmetros ('{caminho_modelo}').")
+        return None
+
+    os.makedirs(caminho_modelos, exist_ok=True)
+    if retrain and os.path.exists(caminho_checkpoint):
+        os.remove(caminho_checkpoint)
+    synthesizer = synthesizer_class(metadata, **kwargs)
+
+    print("Iniciando o treinamento do modelo... (Isso pode levar alguns minutos)")
+    if isinstance(synthesizer, CTGANSynthesizer) and checkpoint_every:
+        with CTGANCheckpoints(caminho_checkpoint, checkpoint_every, chave, synthesizer) as checkpoints:
+            if checkpoints.salvo:
+                print(f"Retomando o treinamento a partir da época {checkpoints.salvo['epocas_concluidas']}...")
+            with perfil.stage('geracao.ajuste'):
+                synthesizer.fit(real_data)
+    else:
+        with perfil.stage('geracao.ajuste'):
+            synthesizer.fit(real_data)
+    print("Treinamento concluído.")
+
+    synthesizer.save(caminho_modelo)
+    if os.path.exists(caminho_checkpoint):
+        os.remove(caminho_checkpoint)
+    print(f"-> Modelo salvo no cache: '{caminho_modelo}'")
+    return synthesizer
+
+
+# --- 3. FUNÇÃO PARA GERAR DADOS SINTÉTICOS ---
+
+def prepare_training_data(original_file_path):
+    """
+    Carrega e limpa os dados reais e detecta os metadados da SDV.
+
+    No dataset FC, adiciona as features `Condicao_Corta_Chama` e `Nivel_Reservatorio_Oleo`.
+    Retorna (real_data, metadata).
+    """
+    dataset_name = os.path.basename(original_file_path)
+
+    # Carrega e limpa os dados originais
+    real_data = load_table(original_file_path)
+    print(f"Dados reais carregados com {real_data.shape[0]} linhas e {real_data.shape[1]} colunas.")
+
+    # Lógica para adicionar colunas extras ao dataset FC, se aplicável
+    if 'FC' in dataset_name:
+        print("Adicionando features extras ao dataset FC original com lógica aprimorada...")
+
+        # Identifica as colunas de features existentes (excluindo 'No.')
+        feature_cols = feature_columns(real_data)
+
+        if len(feature_cols) > 0:
+            # Aumento vetorizado (analise_risco.aumento), com gerador próprio e a semente do
+            # script: as features (e o hash do modelo em cache) não dependem do que já foi
+            # sorteado antes nesta execução
+            real_data = augment_fc(real_data, rng=np.random.default_rng(SEMENTE))
+
+            print(f"Novas features lógicas adicionadas. O shape para treino agora é: {real_data.shape}")
+        else:
+            print("Nenhuma feature encontrada para basear a lógica. Pulando adição de colunas.")
+
+    # Detecção automática de metadados pela SDV
+    metadata = SingleTableMetadata()
+    metadata.detect_from_dataframe(data=real_data)
+
+    # Define a coluna 'No.' como um identificador, se existir
+    if 'No.' in real_data.columns:
+        metadata.update_column(column_name='No.', sdtype='id')
+
+    return real_data, metadata
+
+
+def generate_synthetic_data(synthesizer_class, original_file_path, output_file_path, num_rows=215,
+                            checkpoint_every=EPOCAS_POR_CHECKPOINT, retrain=False, sample_only=False, **kwargs):
     """
     Carrega dados reais, aprende a estrutura com um sintetizador da SDV e gera dados sintéticos.
+
+    O modelo treinado fica em cache (ver `load_or_fit_synthesizer`); com `sample_only=True`
+    apenas amostra de um modelo já treinado, sem treinar.
     """
     dataset_name = os.path.basename(original_file_path)
     model_name = synthesizer_class.__name__
     print(f"\n{'='*20} Processando: {dataset_name} com {model_name} {'='*20}")
 
     try:
-        # Carrega e limpa os dados originais
-        real_data = pd.read_csv(original_file_path)
-        real_data = real_data.loc[:, ~real_data.columns.str.contains('^Unnamed')]
-        print(f"Dados reais carregados com {real_data.shape[0]} linhas e {real_data.shape[1]} colunas.")
-
-        # Lógica para adicionar colunas extras ao dataset FC, se aplicável
-        if 'FC' in dataset_name:
-            print("Adicionando features extras ao dataset FC original com lógica aprimorada...")
-            
-            # Identifica as colunas de features existentes (excluindo 'No.')
-            feature_cols = [col for col in real_data.columns if col != 'No.']
-            
-            if len(feature_cols) > 0:
-                # Normaliza as features para a escala [0, 1] para combiná-las
-                normalized_features = real_data[feature_cols].apply(lambda x: (x - x.min()) / (x.max() - x.min()) if x.max() > x.min() else 0)
-
-                # Cria um "fator de degradação" baseado na média das features normalizadas.
-                # Valores mais altos nas features indicam uma condição pior.
-                degradation_factor = normalized_features.mean(axis=1)
-
-                # Gera 'Condicao_Corta_Chama' com base na degradação.
-                condicao_base = 1.0 - (degradation_factor * 0.8) # Degradação máxima (1.0) -> condição 0.2
-                ruido_condicao = np.random.uniform(-0.05, 0.05, size=len(real_data))
-                real_data['Condicao_Corta_Chama'] = np.round(np.clip(condicao_base + ruido_condicao, 0.0, 1.0), 2)
-
-                # Gera 'Nivel_Reservatorio_Oleo' com base na degradação.
-                nivel_base = 100 - (degradation_factor * 70) # Degradação máxima (1.0) -> nível 30
-                ruido_nivel = np.random.uniform(-5, 5, size=len(real_data))
-                real_data['Nivel_Reservatorio_Oleo'] = np.round(np.clip(nivel_base + ruido_nivel, 10, 100), 1)
-                
-                print(f"Novas features lógicas adicionadas. O shape para treino agora é: {real_data.shape}")
-            else:
-                print("Nenhuma feature encontrada para basear a lógica. Pulando adição de colunas.")
-
-        # Detecção automática de metadados pela SDV
-        metadata = SingleTableMetadata()
-        metadata.detect_from_dataframe(data=real_data)
-        
-        # Define a coluna 'No.' como um identificador, se existir
-        if 'No.' in real_data.columns:
-            metadata.update_column(column_name='No.', sdtype='id')
-        
-        # Inicialização do Modelo (Sintetizador)
-        synthesizer = synthesizer_class(metadata, **kwargs)
-        
-        print("Iniciando o treinamento do modelo... (Isso pode levar alguns minutos)")
-        synthesizer.fit(real_data)
-        print("Treinamento concluído.")
+        real_data, metadata = prepare_training_data(original_file_path)
+
+        # Modelo (Sintetizador) do cache ou treinado agora
+        synthesizer = load_or_fit_synthesizer(synthesizer_class, real_data, metadata, checkpoint_every,
+                                              retrain, sample_only, **kwargs)
+        if synthesizer is None:
+            return None
 
         # Geração dos Dados Sintéticos
         print(f"Gerando {num_rows} novas linhas sintéticas...")
-        synthetic_data = synthesizer.sample(num_rows=num_rows) 
+        with perfil.stage('geracao.amostragem'):
+            synthetic_data = synthesizer.sample(num_rows=num_rows)
         print("Geração de dados sintéticos concluída.")
 
         # Salvando os dados gerados em um arquivo CSV
@@ -110,21 +372,173 @@ def generate_synthetic_data(synthesizer_class, original_file_path, output_file_p
         return None
 
 
-# --- 3. EXECUÇÃO PRINCIPAL ---
+# --- 4. FROTAS SINTÉTICAS GRANDES (AMOSTRAGEM EM LOTES) ---
+
+# Linhas geradas por lote na amostragem em larga escala
+LINHAS_POR_LOTE_FROTA = 50_000
+
+# Sintetizadores de FC e HI de cada processo do pool, carregados por `_iniciar_amostragem`
+_sintetizadores = {}
+
+
+def _sementes_do_lote(seed, indice_lote):
+    """
+    Sementes (FC, HI) do lote `indice_lote`: filho `indice_lote` de `SeedSequence(seed)`.
+
+    Cada lote tem seu próprio fluxo aleatório, independente de qual processo o gera
+    e da ordem de execução; a frota é a mesma com 1 ou N processos.
+    """
+    semente_fc, semente_hi = np.random.SeedSequence(seed, spawn_key=(indice_lote,)).generate_state(2)
+    return int(semente_fc), int(semente_hi)
+
+
+def _iniciar_amostragem(synthesizer_class, model_paths, single_thread=False):
+    # Só os processos do pool ficam com 1 thread (vários processos já ocupam os núcleos)
+    if single_thread:
+        torch.set_num_threads(1)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for chave, caminho in model_paths.items():
+            _sintetizadores[chave] = synthesizer_class.load(caminho)
+
+
+def _amostrar_lote(indice_lote, first_id, num_rows, seed):
+    """
+    Gera um lote de FC e HI com os mesmos `No.` (de `first_id` em diante).
+
+    A semente de cada lote é aplicada com `_set_random_state`, método privado dos
+    sintetizadores de tabela única do sdv 1.x (o mesmo que o `reset_sampling` usa).
+    """
+    ids = np.arange(first_id, first_id + num_rows, dtype=np.int64)
+    lotes = {}
+    for chave, semente in zip(['fc', 'hi'], _sementes_do_lote(seed, indice_lote)):
+        synthesizer = _sintetizadores[chave]
+        synthesizer.reset_sampling()
+        if not hasattr(synthesizer, '_set_random_state'):
+            raise RuntimeError("Esta versão do sdv não tem `_set_random_state`; a amostragem em lotes requer o sdv 1.x.")
+        synthesizer._set_random_state(semente)
+        dados = synthesizer.sample(num_rows=num_rows).reset_index(drop=True)
+        if len(dados) != num_rows:
+            raise RuntimeError(f"O sintetizador de {chave.upper()} gerou {len(dados)} linhas em vez de {num_rows}.")
+        dados['No.'] = ids
+        lotes[chave] = dados[['No.'] + [c for c in dados.columns if c != 'No.']]
+    return lotes['fc'], lotes['hi']
+
+
+def generate_synthetic_fleet(num_rows, fc_output_path, hi_output_path, synthesizer_class=CTGANSynthesizer,
+                             batch_size=LINHAS_POR_LOTE_FROTA, workers=1, seed=SEMENTE, first_id=1,
+                             checkpoint_every=EPOCAS_POR_CHECKPOINT, retrain=False, sample_only=False, **kwargs):
+    """
+    Gera uma frota sintética de `num_rows` transformadores em lotes de `batch_size` linhas.
+
+    Os arquivos de FC e HI (CSV ou Parquet, pela extensão) são gravados lote a lote,
+    com os mesmos `No.` nas duas saídas, então continuam juntáveis. Com `workers > 1`
+    os lotes são amostrados por um pool de processos, e no máximo `2 * workers` lotes
+    ficam em memória ao mesmo tempo. Cada lote tem sementes próprias, derivadas de
+    `seed`, então o resultado não depende do número de processos.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from analise_risco.pontuacao import ResultWriter, peak_rss_mb
+
+    model_paths, colunas = {}, {}
+    for chave, original_path in [('fc', fc_original_path), ('hi', hi_original_path)]:
+        print(f"\n{'='*20} Modelo de {chave.upper()}: {os.path.basename(original_path)} {'='*20}")
+        real_data, metadata = prepare_training_data(original_path)
+        if load_or_fit_synthesizer(synthesizer_class, real_data, metadata, checkpoint_every,
+                                   retrain, sample_only, **kwargs) is None:
+            return None
+        model_paths[chave] = model_path(synthesizer_class, real_data, metadata, kwargs)
+        colunas[chave] = ['No.'] + [c for c in real_data.columns if c != 'No.']
+
+    lotes = [(k, first_id + inicio, min(batch_size, num_rows - inicio))
+             for k, inicio in enumerate(range(0, num_rows, batch_size))]
+    print(f"\nGerando {num_rows:,} transformadores em {len(lotes)} lote(s) de até {batch_size:,} linhas "
+          f"com {workers} processo(s)...")
+
+    inicio = time.perf_counter()
+    geradas = 0
+    with ResultWriter(fc_output_path, colunas['fc']) as saida_fc, \
+            ResultWriter(hi_output_path, colunas['hi']) as saida_hi:
+        def gravar(fc_lote, hi_lote):
+            nonlocal geradas
+            saida_fc.write(fc_lote)
+            saida_hi.write(hi_lote)
+            geradas += len(fc_lote)
+            segundos = time.perf_counter() - inicio
+            print(f" → {geradas:>12,} linhas | {geradas / segundos:>10,.0f} linhas/s | "
+                  f"pico de memória {peak_rss_mb():,.0f} MB")
+
+        if workers <= 1:
+            _iniciar_amostragem(synthesizer_class, model_paths)
+            try:
+                for indice_lote, primeiro, n in lotes:
+                    gravar(*_amostrar_lote(indice_lote, primeiro, n, seed))
+            finally:
+                _sintetizadores.clear()
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_amostragem,
+                                     initargs=(synthesizer_class, model_paths, True)) as pool:
+                # Janela deslizante: os lotes são gravados em ordem sem acumular resultados
+                pendentes = deque()
+                for indice_lote, primeiro, n in lotes:
+                    pendentes.append(pool.submit(_amostrar_lote, indice_lote, primeiro, n, seed))
+                    if len(pendentes) >= 2 * workers:
+                        gravar(*pendentes.popleft().result())
+                while pendentes:
+                    gravar(*pendentes.popleft().result())
+
+    segundos = time.perf_counter() - inicio
+    print(f"✓ {geradas:,} transformadores gerados em {segundos:.1f} s ({geradas / segundos:,.0f} linhas/s)")
+    print(f"-> Arquivos salvos em: '{fc_output_path}' e '{hi_output_path}'")
+    return {'linhas': geradas, 'segundos': segundos, 'linhas_por_segundo': geradas / segundos,
+            'pico_memoria_mb': peak_rss_mb()}
+
+
+# --- 5. EXECUÇÃO PRINCIPAL ---
 
-# Usando CTGAN para ambos os datasets com 1000 épocas para melhor qualidade.
-generate_synthetic_data(
-    synthesizer_class=CTGANSynthesizer,
-    original_file_path=fc_original_path,
-    output_file_path=fc_synthetic_path,
-    epochs=1000
-)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera os dados sintéticos de FC e HI com o CTGAN.')
+    parser.add_argument('--linhas', type=int, default=215, help='Número de linhas sintéticas por dataset')
+    parser.add_argument('--epocas', type=int, default=1000)
+    parser.add_argument('--checkpoint-a-cada', type=int, default=EPOCAS_POR_CHECKPOINT,
+                        help='Épocas entre checkpoints do treinamento (0 desativa)')
+    parser.add_argument('--somente-amostrar', action='store_true',
+                        help='Só gera linhas a partir dos modelos já treinados em cache')
+    parser.add_argument('--retreinar', action='store_true', help='Ignora os modelos em cache')
+    parser.add_argument('--frota', type=int,
+                        help='Gera uma frota deste tamanho em lotes, com FC e HI pareados pelo No.')
+    parser.add_argument('--linhas-por-lote', type=int, default=LINHAS_POR_LOTE_FROTA)
+    parser.add_argument('--processos', type=int, default=1, help='Processos usados na amostragem da frota')
+    parser.add_argument('--saida-fc', default=os.path.join(caminho_base, 'Frota_FC_Sintetica.csv'),
+                        help='Arquivo de FC da frota (.csv ou .parquet)')
+    parser.add_argument('--saida-hi', default=os.path.join(caminho_base, 'Frota_HI_Sintetica.csv'),
+                        help='Arquivo de HI da frota (.csv ou .parquet)')
+    args = parser.parse_args()
+    if args.retreinar and args.somente_amostrar:
+        parser.error('--retreinar e --somente-amostrar não podem ser usados juntos.')
 
-generate_synthetic_data(
-    synthesizer_class=CTGANSynthesizer,
-    original_file_path=hi_original_path,
-    output_file_path=hi_synthetic_path,
-    epochs=1000
-)
+    if args.frota:
+        generate_synthetic_fleet(
+            args.frota, args.saida_fc, args.saida_hi,
+            batch_size=args.linhas_por_lote,
+            workers=args.processos,
+            checkpoint_every=args.checkpoint_a_cada,
+            retrain=args.retreinar,
+            sample_only=args.somente_amostrar,
+            epochs=args.epocas
+        )
+    else:
+        # Usando CTGAN para ambos os datasets com 1000 épocas para melhor qualidade.
+        for original_path, synthetic_path in [(fc_original_path, fc_synthetic_path), (hi_original_path, hi_synthetic_path)]:
+            generate_synthetic_data(
+                synthesizer_class=CTGANSynthesizer,
+                original_file_path=original_path,
+                output_file_path=synthetic_path,
+                num_rows=args.linhas,
+                checkpoint_every=args.checkpoint_a_cada,
+                retrain=args.retreinar,
+                sample_only=args.somente_amostrar,
+                epochs=args.epocas
+            )
 
-print("\n--- Processo de Geração Finalizado ---")
+    print("\n--- Processo de Geração Finalizado ---")
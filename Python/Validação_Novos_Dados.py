@@ -1,10 +1,12 @@
-import pandas as pd
+import argparse
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
 import os
 
+from analise_risco.aumento import augment_fc
+from analise_risco.dados import MAPA_TRADUCAO, load_table
+from analise_risco.fidelidade import fidelity_report, print_report, save_report
+from analise_risco.graficos import figure_task, render_figures
+
 # --- 1. CONFIGURAÇÃO DE PALETA DE CORES E CAMINHOS ---
 cor_primaria = '#003366'  # Azul UNIFEI
 cor_texto = '#000000'  # Preto
@@ -21,23 +23,33 @@ os.makedirs(caminho_visualizacoes, exist_ok=True)
 caminho_dados_fc = os.path.join(caminho_base, 'Dados_FC_Sinteticos_Final.csv')
 caminho_dados_hi = os.path.join(caminho_base, 'Dados_HI_Sinteticos_Final.csv')
 
+# Dados reais, referência do relatório estatístico
+caminho_real_fc = os.path.join(caminho_base, 'Dados Fis FC.csv')
+caminho_real_hi = os.path.join(caminho_base, 'Dados Fis HI.csv')
+caminho_relatorio = os.path.join(caminho_visualizacoes, 'relatorio_fidelidade.json')
+
+# Mesma semente do aumento do FC real em Geração_Dados_SDV.py
+SEMENTE = 42
+
 # --- 2. CARREGAMENTO E LIMPEZA DOS DADOS ---
-try:
-    # Remove espaços em branco dos nomes das colunas ao carregar
-    dados_fc = pd.read_csv(caminho_dados_fc).rename(columns=lambda x: x.strip())
-    dados_hi = pd.read_csv(caminho_dados_hi).rename(columns=lambda x: x.strip())
-    print("Arquivos de dados sintéticos finais carregados com sucesso.")
-    print(f"Dados carregados de: {caminho_base}")
-except FileNotFoundError as e:
-    print(f"Erro: Arquivo não encontrado. Verifique se os arquivos CSV estão na mesma pasta do script. Detalhes: {e}")
-    exit()
+def carregar_dados():
+    """Carrega os CSVs sintéticos finais (já limpos pela camada comum de analise_risco.dados)."""
+    try:
+        dados_fc = load_table(caminho_dados_fc)
+        dados_hi = load_table(caminho_dados_hi)
+        print("Arquivos de dados sintéticos finais carregados com sucesso.")
+        print(f"Dados carregados de: {caminho_base}")
+        return dados_fc, dados_hi
+    except FileNotFoundError as e:
+        print(f"Erro: Arquivo não encontrado. Verifique se os arquivos CSV estão na mesma pasta do script. Detalhes: {e}")
+        exit()
 
 # --- 3. FUNÇÃO DE ANÁLISE E VISUALIZAÇÃO ---
 def analisar_e_salvar_plots_individuais(df, nome_dataset, caminho_viz):
     """
-    Gera e salva cada gráfico de distribuição como um arquivo PDF separado.
+    Monta a tarefa de cada gráfico de distribuição (um arquivo PDF separado por coluna),
+    para ser desenhada por `render_figures`.
     """
-    print(f"\n--- Gerando gráficos individuais para: {nome_dataset} ---")
 
     # Remove a coluna 'No.' se ela existir, para não gerar gráfico para ela
     if 'No.' in df.columns:
@@ -45,54 +57,52 @@ def analisar_e_salvar_plots_individuais(df, nome_dataset, caminho_viz):
     else:
         df_caracteristicas = df.copy()
 
-    # Mapa para traduzir os nomes das colunas para os gráficos
-    mapa_traducao = {
-        'Overload level': 'Nível de Sobrecarga',
-        'Mean Load (MVA)': 'Carga Média (MVA)',
-        'Critical Loads': 'Cargas Críticas',
-        'Oil Volume (L)': 'Volume de Óleo (L)',
-        'Proximity of other buildings (m)': 'Proximidade de Edifícios (m)',
-        'Penalties (MVA)': 'Penalidades (MVA)',
-        'Nivel_Reservatorio_Oleo': 'Nível do Reservatório de Óleo',
-        'Condicao_Corta_Chama': 'Condição do Corta-Chama',
-        'Humidity [ppm]': 'Umidade [ppm]',
-        'Acidity [mg KOH/g]': 'Acidez [mg KOH/g]',
-        'Dielectric Strength [kV]': 'Rigidez Dielétrica [kV]',
-        'Dissipation factor  [%]': 'Fator de Dissipação [%]', 
-        'Dissolved gases [ppm]': 'Gases Dissolvidos [ppm]',
-        'DP': 'Grau de Polimerização',
-        'HI': 'Índice de Integridade'
-    }
+    # Mapa para traduzir os nomes das colunas para os gráficos (compartilhado em analise_risco.dados)
+    mapa_traducao = MAPA_TRADUCAO
     
-    # Renomeia as colunas para usar nos plots
-    df_caracteristicas_renamed = df_caracteristicas.rename(columns=mapa_traducao)
-
+    estilo = {'cor': cor_primaria, 'cor_texto': cor_texto, 'formato': 'pdf', 'dpi': None,
+              'layout': 'tight', 'bbox_inches': 'tight'}
+    tarefas = []
     for col_original in df_caracteristicas.columns:
         # Verifica se a coluna tem uma tradução correspondente
         if col_original in mapa_traducao:
             col_traduzida = mapa_traducao[col_original]
-            
-            plt.figure(figsize=(6, 4))
-            sns.histplot(df_caracteristicas[col_original], kde=True, bins=20, color=cor_primaria)
-            
-            # plt.title(f'Distribuição de {col_traduzida}', color=cor_texto)
-            
-            plt.xlabel(col_traduzida)
-            plt.ylabel('Frequência')
-            plt.tight_layout()
-            
+
             # Cria um nome de arquivo seguro para evitar erros
             nome_arquivo_seguro = col_original.replace('[','').replace(']','').replace('%','').replace('/','').split(" ")[0].lower()
             nome_arquivo_plot = f'dist_{nome_dataset.lower()}_{nome_arquivo_seguro}.pdf'
             caminho_plot = os.path.join(caminho_viz, nome_arquivo_plot)
-            
-            plt.savefig(caminho_plot, format='pdf', bbox_inches='tight')
-            plt.close()
-            print(f" → Gráfico salvo em: {caminho_plot}")
+
+            tarefas.append(figure_task('hist', df_caracteristicas[col_original], col_traduzida, caminho_plot, **estilo))
+    return tarefas
 
 # --- 4. EXECUÇÃO DA ANÁLISE ---
-analisar_e_salvar_plots_individuais(dados_fc, 'FC_Final', caminho_visualizacoes)
-analisar_e_salvar_plots_individuais(dados_hi, 'HI_Final', caminho_visualizacoes)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gráficos e relatório estatístico dos dados sintéticos finais.')
+    parser.add_argument('--processos', type=int, help='Processos para desenhar as figuras (padrão: núcleos disponíveis)')
+    parser.add_argument('--sem-cache', action='store_true', help='Desenha todas as figuras, mesmo as que não mudaram')
+    args = parser.parse_args()
+
+    dados_fc, dados_hi = carregar_dados()
+
+    print(f"\n--- Gerando gráficos individuais ---")
+    tarefas = (analisar_e_salvar_plots_individuais(dados_fc, 'FC_Final', caminho_visualizacoes)
+               + analisar_e_salvar_plots_individuais(dados_hi, 'HI_Final', caminho_visualizacoes))
+    for caminho_plot, situacao in render_figures(tarefas, processos=args.processos, cache=not args.sem_cache).items():
+        print(f" → Gráfico {'salvo' if situacao == 'gerado' else 'sem alterações'} em: {caminho_plot}")
+
+    print(f"\n--- Geração de gráficos individuais concluída ---")
+    print(f"Todos os arquivos .pdf foram salvos em: {caminho_visualizacoes}")
+
+    # --- 5. RELATÓRIO ESTATÍSTICO (REAL VS. SINTÉTICO) ---
+    # KS, Wasserstein, quantis e correlações por coluna. Para arquivos sintéticos grandes
+    # demais para a memória, ou para usar limites no job noturno, veja `python -m analise_risco.fidelidade`.
+    real_fc = load_table(caminho_real_fc).dropna(how='all')
+    real_hi = load_table(caminho_real_hi).dropna(how='all')
+    real_fc = augment_fc(real_fc, rng=np.random.default_rng(SEMENTE))
 
-print(f"\n--- Geração de gráficos individuais concluída ---")
-print(f"Todos os arquivos .pdf foram salvos em: {caminho_visualizacoes}")
+    relatorios = {'FC': fidelity_report(real_fc, dados_fc), 'HI': fidelity_report(real_hi, dados_hi)}
+    for nome, relatorio in relatorios.items():
+        print_report(nome, relatorio)
+    caminho_csv = save_report(relatorios, caminho_relatorio)
+    print(f"\n-> Relatório estatístico salvo em: '{caminho_relatorio}' e '{caminho_csv}'")
@@ -0,0 +1,44 @@
+"""
+Biblioteca de análise de risco de ativos (transformadores de potência).
+
+Reúne em Python o cálculo fuzzy de HI, FC e RI feito originalmente pelos scripts
+MATLAB da pasta `/matlab`, lendo diretamente os mesmos arquivos `.fis`. O cálculo
+dos índices da frota fica em `analise_risco.indices`, e o relatório de risco de
+`Cenario_BR.m` (categorias, Pareto e quadrantes), em `analise_risco.relatorio`.
+
+Os submódulos só são importados quando usados: `import analise_risco` carrega
+apenas o motor fuzzy, e funções como `analise_risco.score_fleet` importam o seu
+módulo no primeiro acesso.
+"""
+import importlib
+
+from analise_risco.fis import FuzzySystem, evalfis, load_fis
+
+# Nome exportado -> submódulo onde está definido (importado no primeiro acesso)
+_EXPORTACOES_TARDIAS = {
+    'calculate_indices': 'indices',
+    'load_systems': 'indices',
+    'score_fleet': 'relatorio',
+    'categorize': 'relatorio',
+    'pareto': 'relatorio',
+    'decision_quadrants': 'relatorio',
+    'fleet_report': 'relatorio',
+    'monte_carlo': 'incerteza',
+    'load_table': 'dados',
+    'fidelity_report': 'fidelidade',
+}
+
+__all__ = ['FuzzySystem', 'evalfis', 'load_fis', *_EXPORTACOES_TARDIAS]
+
+
+def __getattr__(nome):
+    modulo = _EXPORTACOES_TARDIAS.get(nome)
+    if modulo is None:
+        raise AttributeError(f"module 'analise_risco' has no attribute '{nome}'")
+    valor = getattr(importlib.import_module(f'analise_risco.{modulo}'), nome)
+    globals()[nome] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,159 @@
+"""
+Aumento do dataset FC com `Condicao_Corta_Chama` e `Nivel_Reservatorio_Oleo`.
+
+O FC exportado pelo campo (`Dados Fis FC.csv`) tem 6 colunas de entrada, mas o
+sistema fuzzy do FC usa 8. As duas colunas que faltam são derivadas de um "fator
+de degradação": a média das colunas existentes normalizadas para [0, 1] com o
+mínimo e o máximo de cada coluna, mais um ruído uniforme.
+- Condicao_Corta_Chama = 1 - 0.8 * degradação + U(-0.05, 0.05), em [0, 1], 2 casas;
+- Nivel_Reservatorio_Oleo = 100 - 70 * degradação + U(-5, 5), em [10, 100], 1 casa.
+
+O cálculo é vetorizado e recebe o mínimo/máximo já calculados, então funciona
+bloco a bloco em arquivos grandes (exportações reais ou dados de treino). O ruído
+vem de um `np.random.Generator` explícito; na leitura em blocos, o bloco k usa o
+filho k de `SeedSequence(seed)`, e o resultado é o mesmo em qualquer ordem ou
+processo em que os blocos sejam gerados.
+
+Uso:
+    python -m analise_risco.aumento "Dados Fis FC.csv" "Dados FC Aumentados.csv" --semente 42
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+COLUNAS_AUMENTO = ['Condicao_Corta_Chama', 'Nivel_Reservatorio_Oleo']
+
+
+def feature_columns(table):
+    """Colunas usadas no fator de degradação: todas menos `No.` e as próprias colunas aumentadas."""
+    return [c for c in table.columns if c != 'No.' and c not in COLUNAS_AUMENTO]
+
+
+class MinMaxStats:
+    """Mínimo e máximo de cada coluna acumulados bloco a bloco (ignorando NaN)."""
+
+    def __init__(self):
+        self.mins = self.maxs = None
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return self
+        with np.errstate(all='ignore'):
+            bloco_min, bloco_max = np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+        self.mins = bloco_min if self.mins is None else np.fmin(self.mins, bloco_min)
+        self.maxs = bloco_max if self.maxs is None else np.fmax(self.maxs, bloco_max)
+        return self
+
+    def as_dict(self):
+        if self.mins is None:
+            raise ValueError("Nenhuma linha foi acumulada nas estatísticas.")
+        return {'mins': self.mins.tolist(), 'maxs': self.maxs.tolist()}
+
+
+def degradation_factor(values, mins, maxs):
+    """Média, por linha, das colunas normalizadas para [0, 1]; colunas constantes contam como 0."""
+    values = np.asarray(values, dtype=float)
+    mins, maxs = np.asarray(mins, dtype=float), np.asarray(maxs, dtype=float)
+    amplitude = maxs - mins
+    with np.errstate(invalid='ignore', divide='ignore'):
+        normalizadas = np.where(amplitude > 0, (values - mins) / amplitude, 0.0)
+        return np.nanmean(normalizadas, axis=1)
+
+
+def augment_fc(table, stats=None, rng=None):
+    """
+    Retorna uma cópia de `table` com `Condicao_Corta_Chama` e `Nivel_Reservatorio_Oleo`.
+
+    `stats` ({'mins', 'maxs'} das colunas de `feature_columns`) permite usar o
+    mínimo/máximo do arquivo inteiro em vez dos do próprio bloco. `rng` é o
+    `np.random.Generator` do ruído (por padrão, um gerador novo sem semente).
+    """
+    colunas = feature_columns(table)
+    if not colunas:
+        raise ValueError("A tabela de FC não tem colunas de entrada para calcular o fator de degradação.")
+    valores = table[colunas].to_numpy(dtype=float)
+    stats = MinMaxStats().update(valores).as_dict() if stats is None else stats
+    rng = np.random.default_rng() if rng is None else rng
+
+    degradacao = degradation_factor(valores, stats['mins'], stats['maxs'])
+    n = len(table)
+    # Degradação máxima (1.0) -> condição 0.2 e nível 30
+    condicao = np.round(np.clip(1.0 - degradacao * 0.8 + rng.uniform(-0.05, 0.05, size=n), 0.0, 1.0), 2)
+    nivel = np.round(np.clip(100 - degradacao * 70 + rng.uniform(-5, 5, size=n), 10, 100), 1)
+    aumentada = table.copy()
+    aumentada['Condicao_Corta_Chama'] = condicao
+    aumentada['Nivel_Reservatorio_Oleo'] = nivel
+    return aumentada
+
+
+def chunk_rng(seed, chunk_index):
+    """Gerador do bloco `chunk_index`: filho `chunk_index` de `SeedSequence(seed)`."""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk_index,)))
+
+
+# --- LEITURA EM BLOCOS ---
+
+def augmentation_stats(path, chunk_size=None):
+    """Mínimo e máximo das colunas de `feature_columns`, em uma passada em fluxo pelo arquivo."""
+    from analise_risco.dados import LINHAS_POR_BLOCO_PADRAO, iter_table
+
+    stats = MinMaxStats()
+    for bloco in iter_table(path, chunk_size or LINHAS_POR_BLOCO_PADRAO):
+        stats.update(bloco[feature_columns(bloco)].to_numpy(dtype=float))
+    return stats.as_dict()
+
+
+def iter_augmented(path, chunk_size=None, stats=None, seed=0):
+    """Itera sobre o FC (CSV ou Parquet) em blocos já aumentados; sem `stats`, faz antes uma passada para calculá-las."""
+    from analise_risco.dados import LINHAS_POR_BLOCO_PADRAO, iter_table
+
+    chunk_size = chunk_size or LINHAS_POR_BLOCO_PADRAO
+    stats = augmentation_stats(path, chunk_size) if stats is None else stats
+    for k, bloco in enumerate(iter_table(path, chunk_size)):
+        yield augment_fc(bloco, stats, chunk_rng(seed, k))
+
+
+def augment_file(input_path, output_path, chunk_size=None, stats=None, seed=0):
+    """Grava em `output_path` (CSV ou Parquet) o FC de `input_path` com as duas colunas aumentadas."""
+    from analise_risco.pontuacao import ResultWriter
+
+    linhas = 0
+    with ResultWriter(output_path) as escritor:
+        for bloco in iter_augmented(input_path, chunk_size, stats, seed):
+            escritor.write(bloco)
+            linhas += len(bloco)
+    return linhas
+
+
+def main(argv=None):
+    from analise_risco.dados import LINHAS_POR_BLOCO_PADRAO
+
+    parser = argparse.ArgumentParser(description='Adiciona Condicao_Corta_Chama e Nivel_Reservatorio_Oleo ao FC.')
+    parser.add_argument('entrada', help="CSV no formato de 'Dados Fis FC.csv'")
+    parser.add_argument('saida', help='Arquivo aumentado (.csv ou .parquet)')
+    parser.add_argument('--linhas-por-bloco', type=int, default=LINHAS_POR_BLOCO_PADRAO)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--estatisticas', help='JSON com mins/maxs das colunas de entrada; criado se não existir')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    stats = None
+    if args.estatisticas:
+        try:
+            with open(args.estatisticas, encoding='utf-8') as f:
+                stats = json.load(f)
+        except FileNotFoundError:
+            stats = augmentation_stats(args.entrada, args.linhas_por_bloco)
+            with open(args.estatisticas, 'w', encoding='utf-8') as f:
+                json.dump(stats, f, indent=2)
+    linhas = augment_file(args.entrada, args.saida, args.linhas_por_bloco, stats, args.semente)
+    segundos = time.perf_counter() - inicio
+    print(f"✓ {linhas:,} linhas aumentadas em {segundos:.2f} s ({linhas / max(segundos, 1e-9):,.0f} linhas/s)")
+    print(f"-> Arquivo salvo em: '{args.saida}'")
+
+
+if __name__ == '__main__':
+    main()
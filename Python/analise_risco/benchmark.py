@@ -0,0 +1,440 @@
+"""
+Suíte de benchmarks do pipeline, com histórico em JSON e detecção de regressões.
+
+Cada etapa é medida com dados de tamanho parametrizável, gerados a partir do esquema
+dos CSVs do projeto (`analise_risco.paralelo.synthetic_fleet`: linhas reamostradas
+com ruído, sempre com a mesma semente):
+- `fuzzy` e `fuzzy_compilado`: `score_arrays` (sistema de risco exato e compilado);
+- `pontuacao`: pontuação em fluxo de CSVs para Parquet (`score_files`);
+- `parquet`: conversão de um CSV para Parquet e leitura de volta;
+- `graficos`: histogramas e boxplots das 6 colunas de HI (`render_figures`, sem cache; vazão em linhas);
+- `fidelidade`: relatório de fidelidade real vs. sintético;
+- `classificacao`: AUC por validação cruzada com SMOTE + RandomForest (Classificação_Novos_Dados.py);
+- `ctgan`: treino e amostragem do CTGAN (Geração_Dados_SDV.py; requer `sdv`);
+- `incerteza`: Monte Carlo com 100 amostras por ativo.
+
+Cada caso (etapa x tamanho) roda em um processo novo, para que o pico de memória
+medido seja só o dele. A preparação dos dados fica fora da medição. O tempo é a
+mediana de `--repeticoes` execuções. Cada rodada é acrescentada ao histórico
+(`historico_benchmark.json`) e comparada com a linha de base: tempo ou memória da
+etapa (pico do processo menos a memória já ocupada antes da medição) acima da
+tolerância é marcado como regressão, e o script sai com código 1.
+
+Uso:
+    python -m analise_risco.benchmark                          # todas as etapas, tamanhos padrão
+    python -m analise_risco.benchmark --etapas fuzzy pontuacao --tamanhos 100000 1000000
+    python -m analise_risco.benchmark --definir-linha-base     # grava esta rodada como linha de base
+    python -m analise_risco.benchmark --perfil                 # inclui o perfil por etapa (analise_risco.perfil)
+"""
+import argparse
+import datetime
+import importlib.util
+import json
+import math
+import multiprocessing as mp
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analise_risco import perfil
+from analise_risco.indices import caminho_python
+
+ARQUIVO_HISTORICO = os.path.join(caminho_python, 'historico_benchmark.json')
+ARQUIVO_LINHA_BASE = os.path.join(caminho_python, 'linha_base_benchmark.json')
+
+# Aumento relativo tolerado antes de marcar uma regressão
+TOLERANCIA_TEMPO_PADRAO = 0.25
+TOLERANCIA_MEMORIA_PADRAO = 0.25
+# Aumentos de memória da etapa abaixo deste valor (MB) são ruído do alocador, não regressão
+MEMORIA_MINIMA_MB = 16
+
+REPETICOES_PADRAO = 3
+SEMENTE_PADRAO = 0
+
+# Épocas do CTGAN no benchmark (o suficiente para medir o custo por época, não para treinar)
+EPOCAS_CTGAN = 10
+
+# Amostras por ativo na etapa de incerteza
+AMOSTRAS_INCERTEZA = 100
+
+
+class StageUnavailable(Exception):
+    """A etapa depende de uma biblioteca que não está instalada."""
+
+
+# --- 1. DADOS DE TESTE ---
+
+def synthetic_tables(num_rows, seed=SEMENTE_PADRAO):
+    """Tabelas de HI e FC com `num_rows` ativos e as colunas de `Dados_*_Sinteticos_Final.csv`."""
+    from analise_risco.dados import table_columns
+    from analise_risco.paralelo import synthetic_fleet
+
+    hi, fc = synthetic_fleet(num_rows, seed)
+    colunas_hi = table_columns(os.path.join(caminho_python, 'Dados_HI_Sinteticos_Final.csv'))
+    colunas_fc = table_columns(os.path.join(caminho_python, 'Dados_FC_Sinteticos_Final.csv'))
+    ids = np.arange(1, num_rows + 1)
+    hi_table = pd.DataFrame({'No.': ids, **dict(zip(colunas_hi[1:7], hi.T))})
+    fc_table = pd.DataFrame({'No.': ids, **dict(zip(colunas_fc[1:9], fc.T))})
+    return hi_table, fc_table
+
+
+def _importar_script(nome, dependencia):
+    """Importa um script da pasta Python/ (ex.: Classificação_Novos_Dados) se `dependencia` existir."""
+    if importlib.util.find_spec(dependencia) is None:
+        raise StageUnavailable(f"biblioteca '{dependencia}' não instalada")
+    if caminho_python not in sys.path:
+        sys.path.insert(0, caminho_python)
+    return importlib.import_module(nome)
+
+
+# --- 2. ETAPAS ---
+# Cada etapa tem `preparar(tamanho, semente, pasta) -> estado` (fora da medição) e
+# `executar(estado) -> itens processados` (medida).
+
+def _preparar_fuzzy(tamanho, semente, pasta, compiled=False):
+    from analise_risco.indices import load_systems
+    from analise_risco.paralelo import synthetic_fleet
+
+    hi, fc = synthetic_fleet(tamanho, semente)
+    return {'hi': hi, 'fc': fc, 'systems': load_systems(compiled=compiled)}
+
+
+def _executar_fuzzy(estado):
+    from analise_risco.indices import score_arrays
+
+    score_arrays(estado['hi'], estado['fc'], estado['systems'])
+    return len(estado['hi'])
+
+
+def _preparar_pontuacao(tamanho, semente, pasta):
+    from analise_risco.indices import load_systems
+
+    hi, fc = synthetic_tables(tamanho, semente)
+    # CSVs fora da pasta do projeto não ganham cópia em Parquet (`analise_risco.dados`):
+    # todas as repetições leem o CSV, e nada fica em `cache_dados/`
+    caminhos = {'hi': os.path.join(pasta, 'hi.csv'), 'fc': os.path.join(pasta, 'fc.csv')}
+    hi.to_csv(caminhos['hi'], index=False)
+    fc.to_csv(caminhos['fc'], index=False)
+    return {**caminhos, 'saida': os.path.join(pasta, 'resultado.parquet'), 'systems': load_systems(),
+            'linhas': tamanho}
+
+
+def _executar_pontuacao(estado):
+    from analise_risco.pontuacao import score_files
+
+    score_files(estado['hi'], estado['fc'], estado['saida'], systems=estado['systems'], verbose=False)
+    return estado['linhas']
+
+
+def _preparar_parquet(tamanho, semente, pasta):
+    hi, _ = synthetic_tables(tamanho, semente)
+    caminho = os.path.join(pasta, 'hi.csv')
+    hi.to_csv(caminho, index=False)
+    return {'csv': caminho, 'parquet': os.path.join(pasta, 'hi.parquet'), 'linhas': tamanho}
+
+
+def _executar_parquet(estado):
+    from analise_risco.dados import convert_csv, load_table
+
+    convert_csv(estado['csv'], estado['parquet'])
+    load_table(estado['parquet'])
+    return estado['linhas']
+
+
+def _preparar_graficos(tamanho, semente, pasta):
+    from analise_risco.graficos import figure_task
+
+    hi, _ = synthetic_tables(tamanho, semente)
+    tarefas = []
+    for k, coluna in enumerate(hi.columns[1:]):
+        tarefas.append(figure_task('hist', hi[coluna], coluna, os.path.join(pasta, f'hist_{k}.png')))
+        tarefas.append(figure_task('box', hi[coluna], coluna, os.path.join(pasta, f'box_{k}.png')))
+    return {'tarefas': tarefas, 'linhas': tamanho}
+
+
+def _executar_graficos(estado):
+    from analise_risco.graficos import render_figures
+
+    render_figures(estado['tarefas'], processos=1, cache=False)
+    return estado['linhas']
+
+
+def _preparar_fidelidade(tamanho, semente, pasta):
+    from analise_risco.dados import load_table
+
+    hi, _ = synthetic_tables(tamanho, semente)
+    return {'real': load_table(os.path.join(caminho_python, 'Dados Fis HI.csv')), 'sintetico': hi}
+
+
+def _executar_fidelidade(estado):
+    from analise_risco.fidelidade import fidelity_report
+
+    fidelity_report(estado['real'], estado['sintetico'])
+    return len(estado['sintetico'])
+
+
+def _preparar_classificacao(tamanho, semente, pasta):
+    from analise_risco.dados import load_table
+
+    classificacao = _importar_script('Classificação_Novos_Dados', 'imblearn')
+    hi, _ = synthetic_tables(tamanho, semente)
+    return {'modulo': classificacao, 'real': load_table(os.path.join(caminho_python, 'Dados Fis HI.csv')),
+            'sintetico': hi}
+
+
+def _executar_classificacao(estado):
+    estado['modulo'].cross_validated_auc(estado['real'], estado['sintetico'], workers=1)
+    return len(estado['real']) + len(estado['sintetico'])
+
+
+def _preparar_ctgan(tamanho, semente, pasta):
+    import contextlib
+    import io
+
+    geracao = _importar_script('Geração_Dados_SDV', 'sdv')
+    with contextlib.redirect_stdout(io.StringIO()):
+        real_data, metadata = geracao.prepare_training_data(geracao.hi_original_path)
+    return {'modulo': geracao, 'real': real_data, 'metadata': metadata, 'linhas': tamanho}
+
+
+def _executar_ctgan(estado):
+    synthesizer = estado['modulo'].CTGANSynthesizer(estado['metadata'], epochs=EPOCAS_CTGAN)
+    with perfil.stage('geracao.ajuste'):
+        synthesizer.fit(estado['real'])
+    with perfil.stage('geracao.amostragem'):
+        synthesizer.sample(num_rows=estado['linhas'])
+    return estado['linhas']
+
+
+def _preparar_incerteza(tamanho, semente, pasta):
+    from analise_risco.paralelo import synthetic_fleet
+
+    hi, fc = synthetic_fleet(tamanho, semente)
+    return {'hi': hi, 'fc': fc}
+
+
+def _executar_incerteza(estado):
+    from analise_risco.incerteza import monte_carlo_arrays
+
+    monte_carlo_arrays(estado['hi'], estado['fc'], num_samples=AMOSTRAS_INCERTEZA)
+    return len(estado['hi']) * AMOSTRAS_INCERTEZA
+
+
+# Nome -> (preparar, executar, unidade dos itens, tamanhos padrão)
+ETAPAS = {
+    'fuzzy': (_preparar_fuzzy, _executar_fuzzy, 'ativos', [10_000, 100_000]),
+    'fuzzy_compilado': (lambda t, s, p: _preparar_fuzzy(t, s, p, compiled=True), _executar_fuzzy, 'ativos',
+                        [100_000]),
+    'pontuacao': (_preparar_pontuacao, _executar_pontuacao, 'ativos', [100_000]),
+    'parquet': (_preparar_parquet, _executar_parquet, 'linhas', [100_000]),
+    'graficos': (_preparar_graficos, _executar_graficos, 'linhas', [1_000, 100_000]),
+    'fidelidade': (_preparar_fidelidade, _executar_fidelidade, 'linhas', [100_000]),
+    'classificacao': (_preparar_classificacao, _executar_classificacao, 'linhas', [1_000, 10_000]),
+    'ctgan': (_preparar_ctgan, _executar_ctgan, 'linhas', [1_000]),
+    'incerteza': (_preparar_incerteza, _executar_incerteza, 'amostras', [1_000]),
+}
+
+
+# --- 3. EXECUÇÃO DE UM CASO ---
+
+def run_case(etapa, tamanho, repeticoes=REPETICOES_PADRAO, semente=SEMENTE_PADRAO, com_perfil=False):
+    """
+    Prepara os dados e mede `repeticoes` execuções de uma etapa no processo atual.
+
+    Retorna tempo (mediana e mínimo), vazão, pico de memória do processo, memória
+    ocupada antes da medição (interpretador, imports e dados preparados) e, com
+    `com_perfil`, o resumo de `analise_risco.perfil`.
+    """
+    preparar, executar, unidade, _ = ETAPAS[etapa]
+    caso = {'etapa': etapa, 'tamanho': tamanho, 'unidade': unidade}
+    pasta = tempfile.mkdtemp(prefix=f'benchmark_{etapa}_')
+    try:
+        estado = preparar(tamanho, semente, pasta)
+        memoria_base = perfil.peak_rss_mb()
+        if com_perfil:
+            perfil.enable()
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            itens = executar(estado)
+            tempos.append(time.perf_counter() - inicio)
+        mediana = statistics.median(tempos)
+        caso.update({
+            'itens': itens,
+            'repeticoes': repeticoes,
+            'segundos': mediana,
+            'segundos_min': min(tempos),
+            'segundos_todos': tempos,
+            'itens_por_segundo': itens / mediana if mediana > 0 else 0.0,
+            'memoria_base_mb': memoria_base,
+            'pico_memoria_mb': perfil.peak_rss_mb(),
+        })
+        if com_perfil:
+            caso['perfil'] = perfil.summary()
+    except StageUnavailable as e:
+        caso['indisponivel'] = str(e)
+    except Exception as e:
+        caso['erro'] = f'{type(e).__name__}: {e}'
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+    return caso
+
+
+def run_isolated(etapa, tamanho, repeticoes=REPETICOES_PADRAO, semente=SEMENTE_PADRAO, com_perfil=False):
+    """Executa `run_case` em um processo novo ('spawn'), para medir o pico de memória só deste caso."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context('spawn')) as executor:
+        return executor.submit(run_case, etapa, tamanho, repeticoes, semente, com_perfil).result()
+
+
+# --- 4. HISTÓRICO E LINHA DE BASE ---
+
+def environment():
+    """Versões e máquina, gravadas com cada rodada (comparar rodadas de máquinas diferentes engana)."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=caminho_python, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'nucleos': os.cpu_count(),
+    }
+
+
+def memory_increase(caso):
+    """Memória da etapa em MB: pico do processo menos a memória antes da medição (NaN se indisponível)."""
+    return caso['pico_memoria_mb'] - caso.get('memoria_base_mb', math.nan)
+
+
+def compare(resultados, linha_base, tolerancia_tempo=TOLERANCIA_TEMPO_PADRAO,
+            tolerancia_memoria=TOLERANCIA_MEMORIA_PADRAO):
+    """
+    Compara cada caso com o mesmo (etapa, tamanho) da linha de base.
+
+    Há regressão quando o tempo passa de `1 + tolerancia_tempo` vezes o da linha de base,
+    ou a memória da etapa (`memory_increase`) passa de `1 + tolerancia_memoria` vezes e
+    de `MEMORIA_MINIMA_MB` a mais. O pico absoluto do processo não é comparado: ele é
+    quase todo interpretador, imports e dados preparados, e esconderia a etapa.
+    """
+    base = {(r['etapa'], r['tamanho']): r for r in linha_base.get('resultados', []) if 'segundos' in r}
+    comparacao = []
+    for r in resultados:
+        b = base.get((r['etapa'], r['tamanho']))
+        if b is None or 'segundos' not in r:
+            continue
+        razao_tempo = r['segundos'] / b['segundos'] if b['segundos'] > 0 else float('inf')
+        memoria, memoria_base = memory_increase(r), memory_increase(b)
+        if math.isnan(memoria) or math.isnan(memoria_base):
+            razao_memoria = math.nan
+        else:
+            razao_memoria = memoria / memoria_base if memoria_base > 0 else (math.inf if memoria > 0 else 1.0)
+        comparacao.append({
+            'etapa': r['etapa'],
+            'tamanho': r['tamanho'],
+            'razao_tempo': razao_tempo,
+            'razao_memoria': razao_memoria,
+            'regressao_tempo': razao_tempo > 1 + tolerancia_tempo,
+            'regressao_memoria': (razao_memoria > 1 + tolerancia_memoria
+                                  and memoria - memoria_base > MEMORIA_MINIMA_MB),
+        })
+    return comparacao
+
+
+def append_history(rodada, path=ARQUIVO_HISTORICO):
+    """Acrescenta a rodada ao histórico (uma lista de rodadas em JSON)."""
+    historico = []
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            historico = json.load(f)
+    historico.append(rodada)
+    temporario = f'{path}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(historico, f, indent=2, ensure_ascii=False)
+    os.replace(temporario, path)
+    return len(historico)
+
+
+def _linha(r, comparacao):
+    if 'indisponivel' in r:
+        return f" - {r['etapa']:<16} {r['tamanho']:>10,}: indisponível ({r['indisponivel']})"
+    if 'erro' in r:
+        return f" ✗ {r['etapa']:<16} {r['tamanho']:>10,}: {r['erro']}"
+    texto = (f"{r['etapa']:<16} {r['tamanho']:>10,}: {r['segundos']:8.3f} s | "
+             f"{r['itens_por_segundo']:>12,.0f} {r['unidade']}/s | {memory_increase(r):>7,.0f} MB na etapa")
+    if comparacao is None:
+        return f" ✓ {texto}"
+    regressao = comparacao['regressao_tempo'] or comparacao['regressao_memoria']
+    return (f" {'✗' if regressao else '✓'} {texto} | tempo {comparacao['razao_tempo'] - 1:+.0%}, "
+            f"memória {comparacao['razao_memoria'] - 1:+.0%} vs. linha de base")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks do pipeline, com histórico e detecção de regressões.')
+    parser.add_argument('--etapas', nargs='+', choices=list(ETAPAS), default=list(ETAPAS))
+    parser.add_argument('--tamanhos', type=int, nargs='+', help='Tamanhos para todas as etapas (padrão: os de cada etapa)')
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES_PADRAO)
+    parser.add_argument('--semente', type=int, default=SEMENTE_PADRAO)
+    parser.add_argument('--perfil', action='store_true', help='Inclui o perfil por etapa de cada caso')
+    parser.add_argument('--historico', default=ARQUIVO_HISTORICO)
+    parser.add_argument('--linha-base', default=ARQUIVO_LINHA_BASE)
+    parser.add_argument('--definir-linha-base', action='store_true', help='Grava esta rodada como a linha de base')
+    parser.add_argument('--tolerancia-tempo', type=float, default=TOLERANCIA_TEMPO_PADRAO)
+    parser.add_argument('--tolerancia-memoria', type=float, default=TOLERANCIA_MEMORIA_PADRAO)
+    args = parser.parse_args(argv)
+
+    linha_base = None
+    if os.path.exists(args.linha_base) and not args.definir_linha_base:
+        with open(args.linha_base, encoding='utf-8') as f:
+            linha_base = json.load(f)
+        print(f"Linha de base: {linha_base['data']} (commit {linha_base['ambiente'].get('commit')})")
+
+    resultados, comparacao = [], []
+    for etapa in args.etapas:
+        for tamanho in args.tamanhos or ETAPAS[etapa][3]:
+            r = run_isolated(etapa, tamanho, args.repeticoes, args.semente, args.perfil)
+            resultados.append(r)
+            c = compare([r], linha_base, args.tolerancia_tempo, args.tolerancia_memoria) if linha_base else []
+            comparacao.extend(c)
+            print(_linha(r, c[0] if c else None), flush=True)
+            for item in r.get('perfil', [])[:5]:
+                print(f"      {item['etapa']:<40} {item['segundos']:8.3f} s ({item['chamadas']:,} chamadas)")
+
+    rodada = {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'ambiente': environment(),
+        'parametros': {'repeticoes': args.repeticoes, 'semente': args.semente},
+        'resultados': resultados,
+        'comparacao': comparacao,
+    }
+    total = append_history(rodada, args.historico)
+    print(f"\n-> Rodada {total} salva no histórico: '{args.historico}'")
+    if args.definir_linha_base:
+        with open(args.linha_base, 'w', encoding='utf-8') as f:
+            json.dump(rodada, f, indent=2, ensure_ascii=False)
+        print(f"-> Linha de base salva em: '{args.linha_base}'")
+
+    regressoes = [c for c in comparacao if c['regressao_tempo'] or c['regressao_memoria']]
+    falhas = [r for r in resultados if 'erro' in r]
+    if regressoes:
+        print(f"\n✗ {len(regressoes)} regressão(ões) acima da tolerância "
+              f"(tempo {args.tolerancia_tempo:.0%}, memória {args.tolerancia_memoria:.0%}).")
+    if regressoes or falhas:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
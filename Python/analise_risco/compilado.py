@@ -0,0 +1,323 @@
+"""
+Modo compilado dos sistemas fuzzy: tabela de consulta + interpolação multilinear.
+
+A superfície de saída de um `FuzzySystem` é amostrada uma única vez em uma grade
+retilínea e as consultas passam a ser respondidas por interpolação (bilinear no caso
+do sistema de risco, de duas entradas). Dois tipos de grade:
+- `dense`: pontos uniformes em cada eixo (indicado para 1 ou 2 entradas);
+- `sparse`: nós apenas nos vértices das funções de pertinência de cada entrada,
+  subdivididos quando necessário. Entre dois vértices todas as pertinências são
+  lineares, então poucos nós por eixo bastam e a grade do HI (6 entradas) fica
+  com centenas de milhares de pontos em vez de bilhões.
+
+A superfície tem dobras (troca do termo mínimo de uma regra) e descontinuidades
+(regiões onde nenhuma regra dispara e a saída salta para o meio da faixa). Por
+isso cada célula da grade é conferida no seu centro: as que não respeitam o erro
+máximo são marcadas e, nelas, a consulta cai para a avaliação exata. Em seguida o
+erro é verificado em pontos aleatórios e a grade é refinada até respeitar
+`max_error` (em fração da faixa de cada saída). As tabelas ficam em cache no
+disco, identificadas pelo hash do arquivo .fis e pelos parâmetros da compilação.
+"""
+import hashlib
+import json
+import os
+from bisect import bisect_right
+
+import numpy as np
+
+from analise_risco.fis import TAMANHO_BLOCO_PADRAO
+
+caminho_python = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+caminho_cache_padrao = os.path.join(caminho_python, 'cache_fuzzy')
+
+# Erro máximo padrão, em fração da faixa de cada saída
+ERRO_MAXIMO_PADRAO = 5e-3
+
+# Limite de pontos da grade (por saída) antes de desistir do refinamento
+PONTOS_MAXIMOS_PADRAO = 4_000_000
+
+# Pontos aleatórios usados na verificação do erro
+PONTOS_VERIFICACAO_PADRAO = 100000
+
+
+class CompiledSystem:
+    """
+    Tabela de consulta de um sistema fuzzy em uma grade retilínea.
+
+    Expõe `evaluate(X)` com a mesma assinatura de `FuzzySystem.evaluate`, de modo que
+    pode substituir o sistema exato em qualquer ponto do cálculo dos índices. As
+    células marcadas em `exact_cells` são respondidas pelo sistema exato `fis`.
+    """
+
+    def __init__(self, name, axes, values, output_ranges, fingerprint, measured_error, mode,
+                 exact_cells=None, fis=None):
+        self.name = name
+        self.axes = [np.asarray(a, dtype=float) for a in axes]
+        self.values = np.asarray(values, dtype=float).reshape(-1, len(output_ranges))
+        self.output_ranges = [tuple(r) for r in output_ranges]
+        self.fingerprint = fingerprint
+        self.measured_error = float(measured_error)
+        self.mode = mode
+        self.fis = fis
+        self._shape = tuple(len(a) for a in self.axes)
+        self._cell_shape = tuple(n - 1 for n in self._shape)
+        if exact_cells is None:
+            exact_cells = np.zeros(int(np.prod(self._cell_shape)), dtype=bool)
+        self.exact_cells = np.asarray(exact_cells, dtype=bool).ravel()
+        self._strides = np.array([int(np.prod(self._shape[i + 1:])) for i in range(len(self._shape))])
+        self._cell_strides = np.array([int(np.prod(self._cell_shape[i + 1:])) for i in range(len(self._shape))])
+        dims = len(self.axes)
+        self._corners = (np.arange(2 ** dims)[:, None] >> np.arange(dims)[::-1]) & 1
+        self._corner_offsets = self._corners @ self._strides
+        # Cópias em listas Python para o caminho de consulta unitária (`query`)
+        self._axes_list = [a.tolist() for a in self.axes]
+        self._strides_list = self._strides.tolist()
+        self._cell_strides_list = self._cell_strides.tolist()
+        self._corner_list = list(zip(self._corners.tolist(), self._corner_offsets.tolist()))
+
+    @property
+    def num_points(self):
+        return int(np.prod(self._shape))
+
+    @property
+    def exact_fraction(self):
+        """Fração das células respondidas pela avaliação exata."""
+        return float(self.exact_cells.mean()) if self.exact_cells.size else 0.0
+
+    def evaluate(self, X, chunk_size=TAMANHO_BLOCO_PADRAO):
+        """Interpola a tabela para uma matriz de entradas (N, num_inputs)."""
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        if X.shape[1] != len(self.axes):
+            raise ValueError(
+                f"O sistema compilado '{self.name}' espera {len(self.axes)} entradas, recebeu {X.shape[1]}."
+            )
+        # Cada linha consulta 2^d vértices; o bloco é reduzido para manter a memória constante
+        passo = max(1, (chunk_size * 64) // len(self._corners))
+        resultado = np.empty((X.shape[0], self.values.shape[1]))
+        for inicio in range(0, X.shape[0], passo):
+            bloco = X[inicio:inicio + passo]
+            resultado[inicio:inicio + len(bloco)] = self._evaluate_block(bloco)
+        return resultado
+
+    __call__ = evaluate
+
+    def query(self, x):
+        """
+        Consulta de um único ponto em Python puro, sem o custo fixo das operações em
+        arrays; indicada para consultas interativas ("e se?") de um ativo.
+        """
+        if len(x) != len(self.axes):
+            raise ValueError(
+                f"O sistema compilado '{self.name}' espera {len(self.axes)} entradas, recebeu {len(x)}."
+            )
+        base = celula = 0
+        fracoes = []
+        for valor, eixo, passo, passo_celula in zip(x, self._axes_list, self._strides_list, self._cell_strides_list):
+            valor = min(max(float(valor), eixo[0]), eixo[-1])
+            i = min(max(bisect_right(eixo, valor) - 1, 0), len(eixo) - 2)
+            fracoes.append((valor - eixo[i]) / (eixo[i + 1] - eixo[i]))
+            base += i * passo
+            celula += i * passo_celula
+        if self.exact_cells[celula]:
+            return tuple(self._evaluate_block(np.array([x], dtype=float))[0])
+        resultado = [0.0] * self.values.shape[1]
+        for canto, deslocamento in self._corner_list:
+            peso = 1.0
+            for bit, t in zip(canto, fracoes):
+                peso *= t if bit else 1.0 - t
+            if peso:
+                linha = self.values[base + deslocamento]
+                for j in range(len(resultado)):
+                    resultado[j] += peso * float(linha[j])
+        return tuple(resultado)
+
+    def _locate(self, X):
+        indices = np.empty(X.shape, dtype=np.int64)
+        fracoes = np.empty(X.shape)
+        for d, eixo in enumerate(self.axes):
+            x = np.clip(X[:, d], eixo[0], eixo[-1])
+            i = np.clip(np.searchsorted(eixo, x, side='right') - 1, 0, len(eixo) - 2)
+            indices[:, d] = i
+            fracoes[:, d] = (x - eixo[i]) / (eixo[i + 1] - eixo[i])
+        return indices, fracoes
+
+    def _interpolate(self, indices, fracoes):
+        base = indices @ self._strides
+        vertices = self.values[base[:, None] + self._corner_offsets[None, :]]
+        # Reduz um eixo por vez: a primeira metade dos vértices tem o índice inferior no eixo
+        for d in range(len(self.axes)):
+            t = fracoes[:, d, None, None]
+            metade = vertices.shape[1] // 2
+            vertices = vertices[:, :metade] * (1.0 - t) + vertices[:, metade:] * t
+        return vertices[:, 0]
+
+    def _evaluate_block(self, X):
+        indices, fracoes = self._locate(X)
+        resultado = self._interpolate(indices, fracoes)
+        exatas = self.exact_cells[indices @ self._cell_strides]
+        if exatas.any():
+            if self.fis is None:
+                raise ValueError(
+                    f"O sistema compilado '{self.name}' tem células de avaliação exata, "
+                    "mas foi carregado sem o sistema fuzzy original (`fis`)."
+                )
+            resultado[exatas] = self.fis.evaluate(X[exatas])
+        return resultado
+
+    # --- Persistência ---
+
+    def save(self, path):
+        metadados = {
+            'name': self.name,
+            'output_ranges': self.output_ranges,
+            'fingerprint': self.fingerprint,
+            'measured_error': self.measured_error,
+            'mode': self.mode,
+        }
+        eixos = {f'axis_{i}': a for i, a in enumerate(self.axes)}
+        tmp = f'{path}.{os.getpid()}.tmp.npz'
+        np.savez(tmp, values=self.values, exact_cells=np.packbits(self.exact_cells),
+                 metadata=json.dumps(metadados), **eixos)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, fis=None):
+        with np.load(path) as dados:
+            metadados = json.loads(str(dados['metadata']))
+            num_eixos = sum(1 for chave in dados.files if chave.startswith('axis_'))
+            eixos = [dados[f'axis_{i}'] for i in range(num_eixos)]
+            valores = dados['values']
+            num_celulas = int(np.prod([len(e) - 1 for e in eixos]))
+            exatas = np.unpackbits(dados['exact_cells'], count=num_celulas).astype(bool)
+        return cls(metadados['name'], eixos, valores, metadados['output_ranges'],
+                   metadados['fingerprint'], metadados['measured_error'], metadados['mode'],
+                   exact_cells=exatas, fis=fis)
+
+
+# --- 1. CONSTRUÇÃO DAS GRADES ---
+
+def breakpoint_axis(variable, subdivisions=1):
+    """Nós de um eixo nos vértices das pertinências, cada intervalo dividido em `subdivisions`."""
+    lo, hi = variable.range
+    vertices = {lo, hi}
+    for mf in variable.mfs:
+        vertices.update(p for p in mf.params if lo <= p <= hi)
+    vertices = np.array(sorted(vertices))
+    if subdivisions <= 1:
+        return vertices
+    partes = [np.linspace(a, b, subdivisions + 1)[:-1] for a, b in zip(vertices[:-1], vertices[1:])]
+    return np.append(np.concatenate(partes), vertices[-1])
+
+
+def uniform_axis(variable, resolution):
+    return np.linspace(variable.range[0], variable.range[1], resolution)
+
+
+def _grid_points(axes):
+    malha = np.meshgrid(*axes, indexing='ij')
+    return np.column_stack([m.ravel() for m in malha])
+
+
+def _relative_error(exato, aproximado, output_ranges):
+    amplitude = np.array([r[1] - r[0] for r in output_ranges])
+    return (np.abs(exato - aproximado) / amplitude).max(axis=1)
+
+
+def measure_error(compiled, fis, num_points=PONTOS_VERIFICACAO_PADRAO, seed=0):
+    """Maior erro absoluto da tabela contra o sistema exato em pontos aleatórios, em fração da faixa das saídas."""
+    rng = np.random.default_rng(seed)
+    baixo = np.array([v.range[0] for v in fis.inputs])
+    alto = np.array([v.range[1] for v in fis.inputs])
+    pontos = baixo + rng.random((num_points, len(fis.inputs))) * (alto - baixo)
+    erro = _relative_error(fis.evaluate(pontos), compiled.evaluate(pontos), compiled.output_ranges)
+    return float(erro.max())
+
+
+# --- 2. COMPILAÇÃO COM GARANTIA DE ERRO ---
+
+def _cell_oscillation(compiled):
+    """Maior variação (em fração da faixa) entre os vértices de cada célula."""
+    amplitude = np.array([r[1] - r[0] for r in compiled.output_ranges])
+    valores = (compiled.values / amplitude).reshape(*compiled._shape, -1)
+    maximo = minimo = None
+    for canto in compiled._corners:
+        fatia = valores[tuple(slice(b, n - 1 + b) for b, n in zip(canto, compiled._shape))]
+        maximo = fatia if maximo is None else np.maximum(maximo, fatia)
+        minimo = fatia if minimo is None else np.minimum(minimo, fatia)
+    return (maximo - minimo).max(axis=-1).ravel()
+
+
+def _build(fis, axes, mode, max_error):
+    faixas = [v.range for v in fis.outputs]
+    compilado = CompiledSystem(fis.name, axes, fis.evaluate(_grid_points(axes)), faixas,
+                               fis.fingerprint, np.inf, mode, fis=fis)
+    # Confere o centro de cada célula; as que excedem o erro passam a ser exatas
+    centros = _grid_points([(a[:-1] + a[1:]) / 2 for a in compilado.axes])
+    indices, fracoes = compilado._locate(centros)
+    erro = _relative_error(fis.evaluate(centros), compilado._interpolate(indices, fracoes), faixas)
+    exatas = erro > max_error / 4
+    if mode == 'sparse':
+        # Células grandes: um único ponto de conferência é pouco, então também são
+        # exatas as células cuja saída varia mais que o erro aceito entre os vértices
+        exatas |= _cell_oscillation(compilado) > max_error
+    compilado.exact_cells = exatas
+    return compilado
+
+
+def compile_system(fis, mode='dense', resolution=129, subdivisions=1, max_error=ERRO_MAXIMO_PADRAO,
+                   max_points=PONTOS_MAXIMOS_PADRAO, num_check=PONTOS_VERIFICACAO_PADRAO, seed=0):
+    """
+    Amostra a superfície de `fis` e refina a grade até o erro medido ficar abaixo de `max_error`.
+
+    No modo `dense` a resolução de cada eixo é dobrada a cada rodada; no modo
+    `sparse` aumenta-se o número de subdivisões entre vértices. Levanta
+    `ValueError` se a garantia não puder ser atingida dentro de `max_points`.
+    """
+    if mode not in ('dense', 'sparse'):
+        raise ValueError(f"Modo de compilação inválido: '{mode}'. Use 'dense' ou 'sparse'.")
+    while True:
+        if mode == 'dense':
+            eixos = [uniform_axis(v, resolution) for v in fis.inputs]
+        else:
+            eixos = [breakpoint_axis(v, subdivisions) for v in fis.inputs]
+        tamanho = int(np.prod([len(a) for a in eixos]))
+        if tamanho > max_points:
+            raise ValueError(
+                f"Não foi possível compilar '{fis.name}' com erro <= {max_error:g} "
+                f"usando até {max_points} pontos de grade."
+            )
+        compilado = _build(fis, eixos, mode, max_error)
+        compilado.measured_error = measure_error(compilado, fis, num_check, seed)
+        if compilado.measured_error <= max_error:
+            return compilado
+        resolution = 2 * resolution - 1
+        subdivisions += 1
+
+
+def _cache_key(fis, parametros):
+    texto = json.dumps({'fingerprint': fis.fingerprint, **parametros}, sort_keys=True)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:16]
+
+
+def load_compiled(fis, cache_dir=caminho_cache_padrao, mode='dense', resolution=129, subdivisions=1,
+                  max_error=ERRO_MAXIMO_PADRAO, max_points=PONTOS_MAXIMOS_PADRAO,
+                  num_check=PONTOS_VERIFICACAO_PADRAO, seed=0):
+    """
+    Retorna a versão compilada de `fis`, lendo do cache em disco quando possível.
+
+    O arquivo de cache é identificado pelo hash do .fis e pelos parâmetros de
+    compilação; qualquer alteração no .fis gera uma nova tabela.
+    """
+    parametros = {
+        'mode': mode, 'resolution': resolution, 'subdivisions': subdivisions,
+        'max_error': max_error, 'max_points': max_points, 'num_check': num_check, 'seed': seed,
+    }
+    caminho = os.path.join(cache_dir, f'{fis.name}_{mode}_{_cache_key(fis, parametros)}.npz')
+    if os.path.exists(caminho):
+        compilado = CompiledSystem.load(caminho, fis=fis)
+        if compilado.fingerprint == fis.fingerprint:
+            return compilado
+    compilado = compile_system(fis, mode, resolution, subdivisions, max_error, max_points, num_check, seed)
+    os.makedirs(cache_dir, exist_ok=True)
+    compilado.save(caminho)
+    return compilado
@@ -0,0 +1,341 @@
+"""
+Camada comum de acesso aos dados (CSV e Parquet).
+
+Todos os scripts leem os mesmos CSVs (`Dados Fis *.csv`, `Dados_*_Sinteticos_Final.csv`
+e exportações da frota). Aqui fica, em um só lugar:
+- a limpeza comum: sem colunas 'Unnamed', sem o BOM e sem espaços nas pontas dos
+  nomes das colunas;
+- o mapa de tradução das colunas para os gráficos (`MAPA_TRADUCAO`);
+- uma cópia em Parquet dos CSVs do projeto (os da pasta `Python/`), criada na
+  primeira leitura em `cache_dados/` e refeita quando o CSV muda (tamanho ou data
+  de modificação).
+
+A cópia em Parquet é tipada com os mesmos tipos que o pandas infere do CSV: inteiros
+continuam inteiros e o texto continua texto. Ela é lida com memória mapeada e só
+com as colunas pedidas (`columns`). Outros CSVs (exportações, arquivos temporários)
+são lidos diretamente, a menos que tenham sido convertidos antes pela linha de
+comando abaixo ou que a leitura peça `use_cache=True`. As cópias de CSVs que não
+existem mais ou que mudaram são apagadas, e o cache é limitado a
+`LIMITE_CACHE_MB`: passando dele, saem as cópias usadas há mais tempo.
+
+Os CSVs continuam sendo o formato de troca (o MATLAB lê os mesmos arquivos), e
+arquivos `.parquet` também são aceitos como entrada. Sem `pyarrow` instalado, tudo
+funciona lendo os CSVs diretamente, como antes.
+
+Uso (pré-conversão, opcional):
+    python -m analise_risco.dados "Dados Fis FC.csv" "Dados Fis HI.csv" Frota_FC.csv
+"""
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import time
+
+import pandas as pd
+
+from analise_risco import perfil
+from analise_risco.indices import caminho_python
+
+caminho_cache_dados = os.path.join(caminho_python, 'cache_dados')
+
+# Linhas lidas por bloco nas leituras em fluxo e na conversão para Parquet
+LINHAS_POR_BLOCO_PADRAO = 100_000
+
+# Chaves dos metadados do Parquet que identificam o CSV de origem (versão e caminho)
+CHAVE_ORIGEM = b'analise_risco.origem'
+CHAVE_CAMINHO = b'analise_risco.caminho'
+
+# Tamanho máximo das cópias em `cache_dados/`
+LIMITE_CACHE_MB = 2048
+
+MAPA_TRADUCAO = {
+    'Overload level': 'Nível de Sobrecarga',
+    'Mean Load (MVA)': 'Carga Média (MVA)',
+    'Critical Loads': 'Cargas Críticas',
+    'Oil Volume (L)': 'Volume de Óleo (L)',
+    'Proximity of other buildings (m)': 'Proximidade de Edifícios (m)',
+    'Penalties (MVA)': 'Penalidades (MVA)',
+    'Nivel_Reservatorio_Oleo': 'Nível do Reservatório de Óleo',
+    'Condicao_Corta_Chama': 'Condição do Corta-Chama',
+    'Humidity [ppm]': 'Umidade [ppm]',
+    'Acidity [mg KOH/g]': 'Acidez [mg KOH/g]',
+    'Dielectric Strength [kV]': 'Rigidez Dielétrica [kV]',
+    'Dissipation factor  [%]': 'Fator de Dissipação [%]',  # Com o espaço duplo do arquivo original
+    'Dissolved gases [ppm]': 'Gases Dissolvidos [ppm]',
+    'DP': 'Grau de Polimerização',
+    'HI': 'Índice de Integridade',
+}
+
+
+def translate_columns(df):
+    """Cópia de `df` com as colunas renomeadas por `MAPA_TRADUCAO` (as demais ficam como estão)."""
+    return df.rename(columns=MAPA_TRADUCAO)
+
+
+def _coluna_util(nome):
+    return not str(nome).startswith('Unnamed')
+
+
+def _limpar_nomes(df):
+    return df.rename(columns=lambda c: str(c).strip())
+
+
+def _limpar(df):
+    """Mesma limpeza dos CSVs para tabelas lidas de Parquet: sem colunas 'Unnamed' e nomes sem espaços."""
+    if not all(_coluna_util(c) for c in df.columns):
+        df = df.loc[:, [_coluna_util(c) for c in df.columns]]
+    return _limpar_nomes(df)
+
+
+def iter_csv(path, chunk_size=LINHAS_POR_BLOCO_PADRAO, columns=None):
+    """Itera sobre um CSV de dados em blocos, sem colunas 'Unnamed' e sem o BOM do cabeçalho."""
+    usecols = _coluna_util if columns is None else (lambda c: _coluna_util(c) and str(c).strip() in columns)
+    for bloco in pd.read_csv(path, encoding='utf-8-sig', usecols=usecols, chunksize=chunk_size):
+        yield _limpar_nomes(bloco) if columns is None else _limpar_nomes(bloco)[list(columns)]
+
+
+def _pyarrow_disponivel():
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def _is_parquet(path):
+    return str(path).lower().endswith(('.parquet', '.pq'))
+
+
+# --- CÓPIA EM PARQUET ---
+
+def _origem(csv_path):
+    info = os.stat(csv_path)
+    return {'tamanho': info.st_size, 'mtime_ns': info.st_mtime_ns}
+
+
+def parquet_path(csv_path, cache_dir=caminho_cache_dados):
+    """Caminho da cópia em Parquet de `csv_path` (o nome inclui um hash do caminho absoluto)."""
+    absoluto = os.path.abspath(csv_path)
+    nome = os.path.splitext(os.path.basename(absoluto))[0]
+    return os.path.join(cache_dir, f"{nome}-{hashlib.sha1(absoluto.encode('utf-8')).hexdigest()[:10]}.parquet")
+
+
+def _do_projeto(path):
+    """Se `path` é um dos CSVs de dados do projeto (os que ficam na pasta `Python/`)."""
+    return os.path.dirname(os.path.abspath(path)) == os.path.abspath(caminho_python)
+
+
+def is_fresh(csv_path, path):
+    """Se a cópia em `path` existe e foi gerada a partir da versão atual de `csv_path`."""
+    import pyarrow.parquet as pq
+
+    try:
+        metadados = pq.read_schema(path).metadata or {}
+    except (OSError, ValueError):
+        return False
+    return metadados.get(CHAVE_ORIGEM) == json.dumps(_origem(csv_path)).encode('utf-8')
+
+
+def _tipos_dos_blocos(csv_path, chunk_size):
+    """Tipos de cada coluna no arquivo inteiro, unificados como o pandas faria em uma leitura única."""
+    tipos = {}
+    for bloco in iter_csv(csv_path, chunk_size):
+        for coluna, tipo in bloco.dtypes.items():
+            anterior = tipos.get(coluna, tipo)
+            if anterior == tipo:
+                tipos[coluna] = tipo
+            elif pd.api.types.is_numeric_dtype(anterior) and pd.api.types.is_numeric_dtype(tipo):
+                tipos[coluna] = 'float64'
+            else:
+                tipos[coluna] = 'object'
+    return tipos
+
+
+@perfil.profiled('dados.conversao_parquet')
+def convert_csv(csv_path, output_path=None, chunk_size=LINHAS_POR_BLOCO_PADRAO):
+    """
+    Converte `csv_path` para Parquet, em blocos, e retorna o caminho gravado.
+
+    Os tipos vêm do primeiro bloco. Se um bloco posterior não couber neles (por
+    exemplo, um decimal em uma coluna até então inteira), a conversão é refeita
+    com os tipos do arquivo inteiro.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    output_path = output_path or parquet_path(csv_path)
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    origem = json.dumps(_origem(csv_path)).encode('utf-8')
+    metadados = {CHAVE_ORIGEM: origem, CHAVE_CAMINHO: os.path.abspath(csv_path).encode('utf-8')}
+    temporario = f'{output_path}.{os.getpid()}.tmp'
+
+    tipos = None
+    while True:
+        escritor = None
+        try:
+            for bloco in iter_csv(csv_path, chunk_size):
+                if tipos is not None:
+                    bloco = bloco.astype(tipos)
+                if escritor is None:
+                    tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+                    esquema = tabela.schema.with_metadata({**(tabela.schema.metadata or {}), **metadados})
+                    escritor = pq.ParquetWriter(temporario, esquema)
+                else:
+                    tabela = pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False)
+                escritor.write_table(tabela)
+            if escritor is None:
+                # CSV só com o cabeçalho
+                vazio = next(pd.read_csv(csv_path, encoding='utf-8-sig', usecols=_coluna_util, chunksize=1), None)
+                esquema = pa.Table.from_pandas(_limpar_nomes(vazio), preserve_index=False).schema
+                escritor = pq.ParquetWriter(temporario, esquema.with_metadata(metadados))
+            escritor.close()
+            break
+        except (pa.ArrowInvalid, pa.ArrowTypeError, ValueError):
+            if escritor is not None:
+                escritor.close()
+            if tipos is not None:
+                raise
+            tipos = _tipos_dos_blocos(csv_path, chunk_size)
+    os.replace(temporario, output_path)
+    return output_path
+
+
+def prune_cache(cache_dir=caminho_cache_dados, max_mb=LIMITE_CACHE_MB):
+    """
+    Apaga as cópias cujo CSV não existe mais ou mudou e, se o cache passar de `max_mb`,
+    as usadas há mais tempo. Retorna os caminhos apagados.
+    """
+    import pyarrow.parquet as pq
+
+    if not os.path.isdir(cache_dir):
+        return []
+    apagados, validos = [], []
+    for nome in os.listdir(cache_dir):
+        caminho = os.path.join(cache_dir, nome)
+        if not nome.endswith('.parquet'):
+            continue
+        try:
+            metadados = pq.read_schema(caminho).metadata or {}
+            origem = metadados.get(CHAVE_CAMINHO, b'').decode('utf-8')
+            valido = bool(origem) and os.path.exists(origem) and is_fresh(origem, caminho)
+            info = os.stat(caminho)
+        except (OSError, ValueError):
+            valido, info = False, None
+        if valido:
+            validos.append((info.st_mtime, info.st_size, caminho))
+        else:
+            apagados.append(caminho)
+    total = sum(tamanho for _, tamanho, _ in validos)
+    for _, tamanho, caminho in sorted(validos):
+        if total <= max_mb * 2**20:
+            break
+        apagados.append(caminho)
+        total -= tamanho
+    for caminho in apagados:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+    return apagados
+
+
+def ensure_parquet(csv_path, cache_dir=caminho_cache_dados, chunk_size=LINHAS_POR_BLOCO_PADRAO):
+    """Caminho da cópia em Parquet de `csv_path`, convertendo o CSV se a cópia não existir ou estiver velha."""
+    destino = parquet_path(csv_path, cache_dir)
+    if is_fresh(csv_path, destino):
+        # A data de modificação da cópia marca o último uso, para o limite de `prune_cache`
+        os.utime(destino)
+        return destino
+    convert_csv(csv_path, destino, chunk_size)
+    prune_cache(cache_dir)
+    return destino
+
+
+def _fonte_parquet(path, use_cache):
+    """
+    Parquet de onde ler `path`, ou None para ler o CSV diretamente.
+
+    `use_cache=None` usa a cópia só para os CSVs do projeto ou quando já existe uma
+    cópia atualizada (convertida pela linha de comando); True sempre converte.
+    """
+    if _is_parquet(path):
+        return path
+    if use_cache is False or not _pyarrow_disponivel():
+        return None
+    if use_cache is None and not _do_projeto(path) and not is_fresh(path, parquet_path(path)):
+        return None
+    try:
+        return ensure_parquet(path)
+    except OSError:
+        # Sem permissão de escrita no cache, por exemplo: segue pelo CSV
+        return None
+
+
+# --- LEITURA ---
+
+@perfil.profiled('dados.leitura')
+def load_table(path, columns=None, use_cache=None):
+    """
+    Lê uma tabela de dados inteira (CSV ou Parquet) já limpa.
+
+    `columns` restringe a leitura a essas colunas. Por padrão, só os CSVs do projeto
+    (ou os já convertidos) passam pela cópia em Parquet; com `use_cache=True` qualquer
+    CSV é convertido, e com `use_cache=False` o CSV é sempre lido diretamente.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Arquivo não encontrado: '{path}'")
+    fonte = _fonte_parquet(path, use_cache)
+    if fonte is None:
+        return pd.concat(iter_csv(path, LINHAS_POR_BLOCO_PADRAO, columns), ignore_index=True)
+    import pyarrow.parquet as pq
+
+    tabela = pq.read_table(fonte, columns=list(columns) if columns is not None else None, memory_map=True)
+    return _limpar(tabela.to_pandas())
+
+
+def iter_table(path, chunk_size=LINHAS_POR_BLOCO_PADRAO, columns=None, use_cache=None):
+    """Itera sobre uma tabela de dados (CSV ou Parquet) em blocos de até `chunk_size` linhas (veja `load_table`)."""
+    fonte = _fonte_parquet(path, use_cache)
+    if fonte is None:
+        yield from iter_csv(path, chunk_size, columns)
+        return
+    import pyarrow.parquet as pq
+
+    arquivo = pq.ParquetFile(fonte, memory_map=True)
+    for lote in arquivo.iter_batches(batch_size=chunk_size, columns=list(columns) if columns is not None else None):
+        yield _limpar(lote.to_pandas())
+
+
+def table_columns(path):
+    """Nomes das colunas (limpos) de uma tabela de dados, sem ler as linhas."""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        return [str(c).strip() for c in pq.read_schema(path).names if _coluna_util(c)]
+    cabecalho = pd.read_csv(path, encoding='utf-8-sig', usecols=_coluna_util, nrows=0)
+    return list(_limpar_nomes(cabecalho).columns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Converte CSVs de dados para a cópia em Parquet (cache_dados/).')
+    parser.add_argument('arquivos', nargs='*', help='CSVs a converter')
+    parser.add_argument('--linhas-por-bloco', type=int, default=LINHAS_POR_BLOCO_PADRAO)
+    parser.add_argument('--forcar', action='store_true', help='Converte mesmo que a cópia esteja atualizada')
+    parser.add_argument('--limpar', action='store_true',
+                        help=f'Apaga as cópias de CSVs removidos ou alterados e aplica o limite de {LIMITE_CACHE_MB} MB')
+    args = parser.parse_args(argv)
+
+    if args.limpar:
+        apagados = prune_cache()
+        print(f"✓ {len(apagados)} cópia(s) apagada(s) de '{caminho_cache_dados}'")
+
+    for arquivo in args.arquivos:
+        inicio = time.perf_counter()
+        destino = parquet_path(arquivo)
+        if not args.forcar and is_fresh(arquivo, destino):
+            print(f"= '{arquivo}': cópia em Parquet já atualizada ({destino})")
+            continue
+        convert_csv(arquivo, destino, args.linhas_por_bloco)
+        print(f"✓ '{arquivo}' -> '{destino}' em {time.perf_counter() - inicio:.2f} s "
+              f"({os.path.getsize(arquivo) / 2**20:,.1f} MB -> {os.path.getsize(destino) / 2**20:,.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
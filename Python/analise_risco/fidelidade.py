@@ -0,0 +1,366 @@
+"""
+Relatório estatístico de fidelidade: dados reais vs. sintéticos.
+
+Para cada coluna em comum entre o dataset real e o sintético, o relatório traz:
+- a estatística KS (exata) e o seu p-valor assintótico;
+- a distância de Wasserstein-1, também normalizada pelo desvio padrão real;
+- os quantis dos dois lados e a diferença entre eles;
+- a diferença de média e de desvio padrão.
+
+Para o conjunto de colunas, traz a diferença entre as matrizes de correlação de
+Pearson.
+
+O real (poucas linhas) fica em memória. O sintético é lido uma única
+vez, em blocos, por acumuladores de tamanho fixo, e não precisa caber na memória.
+Cada coluna tem um histograma cujas bordas são os valores reais distintos mais uma
+grade uniforme sobre a faixa real com uma folga e, além dela, células que crescem
+geometricamente. O histograma guarda, por célula, a contagem e a soma dos valores;
+o que passa das últimas células tem acumuladores próprios.
+Com isso:
+- a KS e as caudas da Wasserstein são exatas;
+- dentro da faixa, a Wasserstein só é aproximada nas células em que as duas
+  distribuições acumuladas se cruzam;
+- o erro dos quantis sintéticos é menor que a largura de uma célula (uniforme
+  dentro da faixa real, proporcional à distância até ela nas caudas);
+- as correlações vêm das somas e dos produtos cruzados, acumulados sobre desvios
+  em relação à média real para manter a precisão.
+
+Uso:
+    python -m analise_risco.fidelidade --par FC "Dados Fis FC.csv" Dados_FC_Sinteticos_Final.csv \\
+        --par HI "Dados Fis HI.csv" Dados_HI_Sinteticos_Final.csv --saida-json fidelidade.json --max-ks 0.2
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from analise_risco import perfil
+
+QUANTIS_PADRAO = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+# Células da grade uniforme de cada coluna (além das bordas nos valores reais)
+CELULAS_PADRAO = 2048
+
+# Folga da grade em cada lado, como fração da faixa real
+FOLGA_GRADE = 0.1
+
+# Células geométricas de cada lado da grade, cada uma RAZAO_CAUDA vezes mais larga que a anterior
+CELULAS_CAUDA = 256
+RAZAO_CAUDA = 1.06
+
+
+class ColumnSketch:
+    """Acumulador em fluxo da distribuição sintética de uma coluna, comparada a uma amostra real fixa."""
+
+    def __init__(self, real_values, cells=CELULAS_PADRAO):
+        real = np.asarray(real_values, dtype=float)
+        real = np.sort(real[np.isfinite(real)])
+        if len(real) == 0:
+            raise ValueError("A coluna real não tem valores numéricos.")
+        self.real = real
+        self.distintos = np.unique(real)
+        amplitude = real[-1] - real[0]
+        folga = FOLGA_GRADE * amplitude if amplitude > 0 else max(abs(real[0]) * FOLGA_GRADE, 1.0)
+        grade = np.linspace(real[0] - folga, real[-1] + folga, cells + 1)
+        # Fora da grade, células que crescem geometricamente, para que os quantis das caudas sintéticas
+        # também tenham erro pequeno (relativo à distância até a faixa real)
+        largura = grade[1] - grade[0]
+        cauda = largura * (RAZAO_CAUDA ** np.arange(1, CELULAS_CAUDA + 1) - 1) / (RAZAO_CAUDA - 1)
+        self.bordas = np.union1d(np.concatenate([grade[0] - cauda[::-1], grade, grade[-1] + cauda]), self.distintos)
+        self.lo, self.hi = self.bordas[0], self.bordas[-1]
+
+        num_celulas = len(self.bordas) - 1
+        self.contagens = np.zeros(num_celulas)
+        self.somas = np.zeros(num_celulas)
+        self.iguais = np.zeros(len(self.distintos))
+        self.n = 0
+        self.abaixo = self.acima = 0
+        self.excesso_abaixo = self.excesso_acima = 0.0
+        self.minimo, self.maximo = np.inf, -np.inf
+
+    def update(self, values):
+        x = np.asarray(values, dtype=float)
+        x = x[np.isfinite(x)]
+        if len(x) == 0:
+            return self
+        self.n += len(x)
+        self.minimo, self.maximo = min(self.minimo, x.min()), max(self.maximo, x.max())
+
+        abaixo, acima = x < self.lo, x >= self.hi
+        self.abaixo += int(abaixo.sum())
+        self.acima += int(acima.sum())
+        self.excesso_abaixo += float((self.lo - x[abaixo]).sum())
+        self.excesso_acima += float((x[acima] - self.hi).sum())
+
+        dentro = x[~(abaixo | acima)]
+        celula = np.searchsorted(self.bordas, dentro, side='right') - 1
+        num_celulas = len(self.contagens)
+        self.contagens += np.bincount(celula, minlength=num_celulas)
+        self.somas += np.bincount(celula, weights=dentro, minlength=num_celulas)
+
+        # Valores sintéticos iguais a um valor real (colunas discretas): necessários para a KS exata
+        esquerda = np.searchsorted(self.distintos, dentro, side='left')
+        direita = np.searchsorted(self.distintos, dentro, side='right')
+        igual = direita > esquerda
+        self.iguais += np.bincount(esquerda[igual], minlength=len(self.distintos))
+        return self
+
+    def _menores_que(self, pontos):
+        """Quantos valores sintéticos são estritamente menores que cada ponto de `pontos` (bordas da grade)."""
+        acumulado = self.abaixo + np.concatenate([[0.0], np.cumsum(self.contagens)])
+        return acumulado[np.searchsorted(self.bordas, pontos)]
+
+    def ks(self):
+        """KS exata: o supremo de |F_real - F_sint| é atingido nos valores reais (limites à esquerda e à direita)."""
+        n_real = len(self.real)
+        real_menores = np.searchsorted(self.real, self.distintos, side='left') / n_real
+        real_ate = np.searchsorted(self.real, self.distintos, side='right') / n_real
+        sint_menores = self._menores_que(self.distintos)
+        sint_ate = (sint_menores + self.iguais) / self.n
+        sint_menores = sint_menores / self.n
+        return float(max(np.abs(real_menores - sint_menores).max(), np.abs(real_ate - sint_ate).max()))
+
+    def ks_pvalue(self, d):
+        """P-valor assintótico de duas amostras, como o `ks_2samp(method='asymp')` do SciPy."""
+        n_real = len(self.real)
+        efetivo = round(n_real * self.n / (n_real + self.n))
+        from scipy import stats  # Só aqui: o SciPy leva mais de 1 s para importar
+
+        return float(np.clip(stats.kstwo.sf(d, max(efetivo, 1)), 0.0, 1.0))
+
+    def wasserstein(self):
+        """Integral de |F_real - F_sint|, célula por célula e nas duas caudas."""
+        largura = np.diff(self.bordas)
+        inicio = self.bordas[:-1]
+        # F_real é constante dentro de cada célula (as bordas incluem todos os valores reais)
+        f_real = np.searchsorted(self.real, inicio, side='right') / len(self.real)
+        s0 = self._menores_que(inicio) / self.n
+        s1 = s0 + self.contagens / self.n
+        # Integral exata de F_sint na célula: s0 * largura + soma(b - x) / n
+        integral = s0 * largura + (self.contagens * self.bordas[1:] - self.somas) / self.n
+        area = np.where(f_real <= s0, integral - f_real * largura, f_real * largura - integral)
+        cruza = (f_real > s0) & (f_real < s1)
+        if cruza.any():
+            # Onde as acumuladas se cruzam, F_sint é tomada como linear dentro da célula
+            c, a, b, w = f_real[cruza], s0[cruza], s1[cruza], largura[cruza]
+            area[cruza] = w * ((c - a) ** 2 + (b - c) ** 2) / (2 * (b - a))
+        return float(np.abs(area).sum() + (self.excesso_abaixo + self.excesso_acima) / self.n)
+
+    def quantiles(self, qs):
+        """Quantis sintéticos por interpolação linear no histograma (nas caudas, até o mínimo/máximo vistos)."""
+        bordas = np.concatenate([[min(self.minimo, self.lo)], self.bordas, [max(self.maximo, self.hi)]])
+        contagens = np.concatenate([[self.abaixo], self.contagens, [self.acima]])
+        acumulado = np.concatenate([[0.0], np.cumsum(contagens)])
+        return np.interp(np.asarray(qs, dtype=float) * self.n, acumulado, bordas)
+
+
+class FidelityAccumulator:
+    """Acumula, em uma passada pelos blocos sintéticos, tudo o que o relatório de um dataset precisa."""
+
+    def __init__(self, real, columns=None, cells=CELULAS_PADRAO):
+        self.colunas = list(columns) if columns is not None else [c for c in real.columns if c != 'No.']
+        if not self.colunas:
+            raise ValueError("Não há colunas para comparar.")
+        self.real = real[self.colunas].apply(pd.to_numeric, errors='coerce')
+        self.sketches = {c: ColumnSketch(self.real[c], cells) for c in self.colunas}
+
+        self.deslocamento = self.real.mean().to_numpy()
+        k = len(self.colunas)
+        self.n_completas = 0
+        self.soma = np.zeros(k)
+        self.produtos = np.zeros((k, k))
+
+    def update(self, block):
+        valores = block[self.colunas].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        for j, coluna in enumerate(self.colunas):
+            self.sketches[coluna].update(valores[:, j])
+        completas = valores[np.isfinite(valores).all(axis=1)] - self.deslocamento
+        self.n_completas += len(completas)
+        self.soma += completas.sum(axis=0)
+        self.produtos += completas.T @ completas
+        return self
+
+    def _covariancia_sintetica(self):
+        n = self.n_completas
+        if n < 2:
+            return np.full((len(self.colunas),) * 2, np.nan)
+        return (self.produtos - np.outer(self.soma, self.soma) / n) / (n - 1)
+
+    def _correlacao_sintetica(self, covariancia):
+        desvio = np.sqrt(np.diag(covariancia))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return covariancia / np.outer(desvio, desvio)
+
+    def report(self, quantiles=QUANTIS_PADRAO):
+        covariancia = self._covariancia_sintetica()
+        colunas = {}
+        for coluna, sketch in self.sketches.items():
+            if sketch.n == 0:
+                raise ValueError(f"O dataset sintético não tem valores numéricos na coluna '{coluna}'.")
+            real = sketch.real
+            d = sketch.ks()
+            w = sketch.wasserstein()
+            desvio_real = float(real.std(ddof=1)) if len(real) > 1 else 0.0
+            j = self.colunas.index(coluna)
+            media_sint = self.deslocamento[j] + self.soma[j] / self.n_completas if self.n_completas else np.nan
+            desvio_sint = np.sqrt(covariancia[j, j]) if self.n_completas > 1 else np.nan
+            q_real = np.quantile(real, quantiles)
+            q_sint = sketch.quantiles(quantiles)
+            colunas[coluna] = {
+                'n_real': int(len(real)),
+                'n_sintetico': int(sketch.n),
+                'ks': d,
+                'ks_pvalor': sketch.ks_pvalue(d),
+                'wasserstein': w,
+                'wasserstein_normalizada': w / desvio_real if desvio_real > 0 else None,
+                'delta_media': float(media_sint - real.mean()),
+                'delta_desvio': float(desvio_sint - desvio_real),
+                'quantis': {f'{q:g}': {'real': float(a), 'sintetico': float(b), 'delta': float(b - a)}
+                            for q, a, b in zip(quantiles, q_real, q_sint)},
+            }
+
+        completas = self.real.dropna()
+        corr_real = np.corrcoef(completas.to_numpy(dtype=float), rowvar=False).reshape(len(self.colunas), -1)
+        delta = self._correlacao_sintetica(covariancia) - corr_real
+        delta_abs = np.abs(delta[np.triu_indices(len(self.colunas), k=1)])
+        return {
+            'colunas': colunas,
+            'correlacao': {
+                'max_abs_delta': float(np.nanmax(delta_abs)) if np.isfinite(delta_abs).any() else None,
+                'frobenius_delta': float(np.sqrt(np.nansum(delta ** 2))),
+                'colunas': self.colunas,
+                'real': corr_real.tolist(),
+                'delta': delta.tolist(),
+            },
+        }
+
+
+@perfil.profiled('fidelidade.relatorio')
+def fidelity_report(real, synthetic, columns=None, chunk_size=None, cells=CELULAS_PADRAO, quantiles=QUANTIS_PADRAO):
+    """
+    Relatório de fidelidade de um dataset.
+
+    `real` é um DataFrame. `synthetic` pode ser um DataFrame, um iterável de blocos ou o
+    caminho de um CSV, que é lido em blocos. Sem `columns`, usa as colunas em comum
+    (menos `No.`), na ordem do real.
+    """
+    from analise_risco.dados import LINHAS_POR_BLOCO_PADRAO, iter_table, table_columns
+
+    if isinstance(synthetic, (str, os.PathLike)):
+        if columns is None:
+            cabecalho = table_columns(synthetic)
+            columns = [c for c in real.columns if c != 'No.' and c in cabecalho]
+        # Só as colunas comparadas são lidas (projeção de colunas no Parquet)
+        blocos = iter_table(synthetic, chunk_size or LINHAS_POR_BLOCO_PADRAO, columns=columns)
+    elif isinstance(synthetic, pd.DataFrame):
+        if columns is None:
+            columns = [c for c in real.columns if c != 'No.' and c in synthetic.columns]
+        blocos = [synthetic]
+    else:
+        blocos = synthetic
+
+    acumulador = FidelityAccumulator(real, columns, cells)
+    for bloco in blocos:
+        acumulador.update(bloco)
+    return acumulador.report(quantiles)
+
+
+def check_thresholds(reports, max_ks=None, max_wasserstein=None, max_correlation=None):
+    """Lista de falhas (texto) dos relatórios `{dataset: relatório}` em relação aos limites dados."""
+    falhas = []
+    for dataset, relatorio in reports.items():
+        for coluna, m in relatorio['colunas'].items():
+            if max_ks is not None and m['ks'] > max_ks:
+                falhas.append(f"{dataset}/{coluna}: KS {m['ks']:.4f} > {max_ks}")
+            w = m['wasserstein_normalizada']
+            if max_wasserstein is not None and w is not None and w > max_wasserstein:
+                falhas.append(f"{dataset}/{coluna}: Wasserstein normalizada {w:.4f} > {max_wasserstein}")
+        delta = relatorio['correlacao']['max_abs_delta']
+        if max_correlation is not None and delta is not None and delta > max_correlation:
+            falhas.append(f"{dataset}: |delta correlação| máximo {delta:.4f} > {max_correlation}")
+    return falhas
+
+
+def report_table(reports):
+    """Tabela com uma linha por (dataset, coluna), para o CSV do relatório."""
+    linhas = []
+    for dataset, relatorio in reports.items():
+        for coluna, m in relatorio['colunas'].items():
+            linha = {'dataset': dataset, 'coluna': coluna}
+            linha.update({k: v for k, v in m.items() if k != 'quantis'})
+            linha.update({f'delta_q{q}': v['delta'] for q, v in m['quantis'].items()})
+            linhas.append(linha)
+    return pd.DataFrame(linhas)
+
+
+def save_report(reports, json_path, parameters=None, failures=None):
+    """Grava o relatório em JSON e a tabela por coluna em um CSV com o mesmo nome."""
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({'parametros': parameters or {}, 'falhas': failures or [], 'datasets': reports},
+                  f, indent=2, ensure_ascii=False)
+    caminho_csv = os.path.splitext(json_path)[0] + '.csv'
+    report_table(reports).to_csv(caminho_csv, index=False, encoding='utf-8-sig')
+    return caminho_csv
+
+
+def print_report(dataset, relatorio):
+    print(f"\n--- Fidelidade: {dataset} ---")
+    print(f"{'Coluna':<36}{'KS':>8}{'p-valor':>10}{'W1/desvio':>11}{'Δ mediana':>12}")
+    for coluna, m in relatorio['colunas'].items():
+        w = m['wasserstein_normalizada']
+        print(f"{coluna:<36}{m['ks']:>8.4f}{m['ks_pvalor']:>10.3g}{w if w is not None else np.nan:>11.4f}"
+              f"{m['quantis'].get('0.5', {}).get('delta', np.nan):>12.4g}")
+    delta = relatorio['correlacao']['max_abs_delta']
+    print(f"|Δ correlação| máximo: {delta if delta is not None else np.nan:.4f}")
+
+
+def main(argv=None):
+    from analise_risco.aumento import COLUNAS_AUMENTO, augment_fc
+    from analise_risco.dados import LINHAS_POR_BLOCO_PADRAO, load_table, table_columns
+
+    parser = argparse.ArgumentParser(description='Relatório estatístico de fidelidade (real vs. sintético).')
+    parser.add_argument('--par', nargs=3, action='append', required=True, metavar=('NOME', 'REAL', 'SINTETICO'),
+                        help='Dataset a comparar (pode ser repetido)')
+    parser.add_argument('--linhas-por-bloco', type=int, default=LINHAS_POR_BLOCO_PADRAO)
+    parser.add_argument('--celulas', type=int, default=CELULAS_PADRAO, help='Células da grade de cada coluna')
+    parser.add_argument('--semente-aumento', type=int, default=42,
+                        help='Semente do aumento do FC real quando só o sintético tem as colunas aumentadas')
+    parser.add_argument('--max-ks', type=float)
+    parser.add_argument('--max-wasserstein', type=float, help='Máximo da Wasserstein normalizada pelo desvio real')
+    parser.add_argument('--max-delta-correlacao', type=float)
+    parser.add_argument('--saida-json', help='Relatório em JSON (uma tabela .csv com o mesmo nome também é gravada)')
+    args = parser.parse_args(argv)
+
+    relatorios = {}
+    for nome, caminho_real, caminho_sintetico in args.par:
+        inicio = time.perf_counter()
+        real = load_table(caminho_real).dropna(how='all')
+        cabecalho = table_columns(caminho_sintetico)
+        if all(c in cabecalho for c in COLUNAS_AUMENTO) and not any(c in real.columns for c in COLUNAS_AUMENTO):
+            # Mesmo aumento aplicado ao FC real antes do treino em Geração_Dados_SDV.py
+            real = augment_fc(real, rng=np.random.default_rng(args.semente_aumento))
+        relatorios[nome] = fidelity_report(real, caminho_sintetico, chunk_size=args.linhas_por_bloco,
+                                           cells=args.celulas)
+        n = next(iter(relatorios[nome]['colunas'].values()))['n_sintetico']
+        print(f"✓ {nome}: {n:,} linhas sintéticas em {time.perf_counter() - inicio:.2f} s")
+        print_report(nome, relatorios[nome])
+
+    falhas = check_thresholds(relatorios, args.max_ks, args.max_wasserstein, args.max_delta_correlacao)
+    if args.saida_json:
+        caminho_csv = save_report(relatorios, args.saida_json, vars(args), falhas)
+        print(f"\n-> Relatório salvo em: '{args.saida_json}' e '{caminho_csv}'")
+
+    if falhas:
+        print("\n✗ Limites de fidelidade violados:")
+        for falha in falhas:
+            print(f"  - {falha}")
+        sys.exit(1)
+    print("\n✓ Todos os limites de fidelidade atendidos.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,358 @@
+"""
+Motor fuzzy Mamdani vetorizado em NumPy, compatível com os arquivos .fis do MATLAB.
+
+Lê os sistemas `Indice_Saude_BR.fis`, `Fator_Consequencia_BR.fis` e
+`Indice_Risco_BR.fis` e os avalia em lote (N ativos x regras x universo de saída
+discretizado), reproduzindo o `evalfis` do Fuzzy Logic Toolbox:
+- funções de pertinência `trapmf` e `trimf`;
+- métodos AND `min`/`prod`, OR `max`/`probor`, implicação `min`/`prod`, agregação `max`;
+- defuzzificação por centroide sobre 101 pontos (padrão `NumSamplePoints` do MATLAB);
+- entradas fora da faixa são saturadas no limite mais próximo;
+- quando nenhuma regra dispara, a saída é o ponto médio da faixa.
+"""
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+# Número de pontos do universo de saída (padrão do evalfis no MATLAB)
+NUM_PONTOS_SAIDA = 101
+
+# Tamanho padrão dos blocos de avaliação: limita a memória temporária (regras x bloco)
+# e mantém os arrays intermediários no cache do processador
+TAMANHO_BLOCO_PADRAO = 8192
+
+
+# --- 1. FUNÇÕES DE PERTINÊNCIA ---
+
+def trapmf(x, params):
+    """Pertinência trapezoidal, mesma convenção do `trapmf` do MATLAB."""
+    a, b, c, d = params
+    x = np.asarray(x, dtype=float)
+    if a == b:
+        y1 = np.where(x >= a, 1.0, 0.0)
+    else:
+        y1 = np.clip((x - a) / (b - a), 0.0, 1.0)
+    if c == d:
+        y2 = np.where(x <= d, 1.0, 0.0)
+    else:
+        y2 = np.clip((d - x) / (d - c), 0.0, 1.0)
+    return np.minimum(y1, y2)
+
+
+def trimf(x, params):
+    """Pertinência triangular, mesma convenção do `trimf` do MATLAB."""
+    a, b, c = params
+    x = np.asarray(x, dtype=float)
+    y = np.zeros_like(x)
+    if a != b:
+        y = np.where((a < x) & (x < b), (x - a) / (b - a), y)
+    if b != c:
+        y = np.where((b < x) & (x < c), (c - x) / (c - b), y)
+    return np.where(x == b, 1.0, y)
+
+
+FUNCOES_PERTINENCIA = {
+    'trapmf': trapmf,
+    'trimf': trimf,
+}
+
+
+# --- 2. ESTRUTURAS DO SISTEMA FUZZY ---
+
+@dataclass(frozen=True)
+class MembershipFunction:
+    name: str
+    type: str
+    params: tuple
+
+    def __call__(self, x):
+        return FUNCOES_PERTINENCIA[self.type](x, self.params)
+
+
+@dataclass(frozen=True)
+class Variable:
+    name: str
+    range: tuple
+    mfs: tuple
+
+    def memberships(self, x):
+        """Matriz (N, num_mfs) com a pertinência de cada valor a cada termo."""
+        x = np.clip(np.asarray(x, dtype=float), self.range[0], self.range[1])
+        return np.stack([mf(x) for mf in self.mfs], axis=-1)
+
+    def universe(self, num_points=NUM_PONTOS_SAIDA):
+        return np.linspace(self.range[0], self.range[1], num_points)
+
+
+@dataclass(frozen=True, eq=False)
+class FuzzySystem:
+    """
+    Sistema Mamdani carregado de um arquivo .fis.
+
+    As regras ficam em matrizes inteiras no formato do MATLAB: índice do termo
+    (1-based), 0 para "não importa" e negativo para negação.
+    """
+    name: str
+    inputs: tuple
+    outputs: tuple
+    antecedents: np.ndarray   # (R, num_inputs)
+    consequents: np.ndarray   # (R, num_outputs)
+    weights: np.ndarray       # (R,)
+    connections: np.ndarray   # (R,) 1 = AND, 2 = OR
+    and_method: str = 'min'
+    or_method: str = 'max'
+    imp_method: str = 'min'
+    agg_method: str = 'max'
+    defuzz_method: str = 'centroid'
+    fingerprint: str = ''
+    num_points: int = NUM_PONTOS_SAIDA
+
+    @property
+    def input_names(self):
+        return [v.name for v in self.inputs]
+
+    @property
+    def output_names(self):
+        return [v.name for v in self.outputs]
+
+    def evaluate(self, X, chunk_size=TAMANHO_BLOCO_PADRAO):
+        """
+        Avalia o sistema para uma matriz de entradas (N, num_inputs).
+
+        Retorna uma matriz (N, num_outputs). O processamento é feito em blocos de
+        `chunk_size` linhas para manter a memória temporária limitada.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        if X.shape[1] != len(self.inputs):
+            raise ValueError(
+                f"O sistema '{self.name}' espera {len(self.inputs)} entradas, recebeu {X.shape[1]}."
+            )
+        resultado = np.empty((X.shape[0], len(self.outputs)))
+        for inicio in range(0, X.shape[0], chunk_size):
+            bloco = X[inicio:inicio + chunk_size]
+            resultado[inicio:inicio + len(bloco)] = self._evaluate_block(bloco)
+        return resultado
+
+    def firing_strengths(self, X):
+        """Grau de ativação (N, R) de cada regra, já multiplicado pelo peso."""
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        return self._firing(X).T
+
+    def aggregate(self, ativacao, output_index=0):
+        """Conjunto fuzzy agregado (N, num_points) de uma saída a partir de `firing_strengths`."""
+        agregado, universo = self._aggregate(np.ascontiguousarray(np.asarray(ativacao).T), output_index)
+        return agregado.T, universo
+
+    def _firing(self, X):
+        # Layout (R, N): cada regra é uma linha contígua, o que barateia as reduções
+        n = X.shape[0]
+        ativ_and = np.ones((len(self.weights), n)) if self._has_and else None
+        ativ_or = np.zeros((len(self.weights), n)) if self._has_or else None
+        for i, variavel in enumerate(self.inputs):
+            idx = self.antecedents[:, i]
+            regras = np.flatnonzero(idx)
+            if regras.size == 0:
+                continue
+            # Só as regras que usam esta entrada são atualizadas ("não importa" é neutro)
+            mu = variavel.memberships(X[:, i]).T
+            termos = np.concatenate([mu, 1.0 - mu]) if (idx < 0).any() else mu
+            linhas = np.where(idx > 0, idx - 1, len(variavel.mfs) - idx - 1)[regras]
+            valores = termos[linhas]
+            if ativ_and is not None:
+                atual = ativ_and[regras]
+                ativ_and[regras] = np.minimum(atual, valores) if self.and_method == 'min' else atual * valores
+            if ativ_or is not None:
+                atual = ativ_or[regras]
+                ativ_or[regras] = (np.maximum(atual, valores) if self.or_method == 'max'
+                                   else atual + valores - atual * valores)
+        if ativ_or is None:
+            ativacao = ativ_and
+        elif ativ_and is None:
+            ativacao = ativ_or
+        else:
+            ativacao = np.where((self.connections == 1)[:, None], ativ_and, ativ_or)
+        return ativacao * self.weights[:, None]
+
+    @cached_property
+    def _output_terms(self):
+        """Para cada saída: universo e, por consequente usado, (regras, forma, fatia do suporte)."""
+        termos_saidas = []
+        for j, saida in enumerate(self.outputs):
+            universo = saida.universe(self.num_points)
+            formas = np.stack([mf(universo) for mf in saida.mfs])
+            formas = np.concatenate([formas, 1.0 - formas])
+            consequentes = self.consequents[:, j]
+            termos = []
+            for termo in np.unique(consequentes[consequentes != 0]):
+                forma = formas[termo - 1] if termo > 0 else formas[len(saida.mfs) - termo - 1]
+                # Fora do suporte do termo o conjunto implicado é nulo e não altera o máximo
+                suporte = np.flatnonzero(forma > 0)
+                if suporte.size:
+                    fatia = slice(suporte[0], suporte[-1] + 1)
+                    termos.append((np.flatnonzero(consequentes == termo), forma[fatia, None], fatia))
+            termos_saidas.append((universo, termos))
+        return termos_saidas
+
+    def _aggregate(self, ativacao, output_index):
+        universo, termos = self._output_terms[output_index]
+        agregado = np.zeros((self.num_points, ativacao.shape[1]))
+        # Com agregação `max`, regras com o mesmo consequente se reduzem à maior ativação
+        for regras, forma, fatia in termos:
+            forca = ativacao[regras].max(axis=0)
+            if self.imp_method == 'min':
+                implicado = np.minimum(forca[None, :], forma)
+            else:
+                implicado = forma * forca[None, :]
+            np.maximum(agregado[fatia], implicado, out=agregado[fatia])
+        return agregado, universo
+
+    def _evaluate_block(self, X):
+        ativacao = self._firing(X)
+        resultado = np.empty((X.shape[0], len(self.outputs)))
+        for j, saida in enumerate(self.outputs):
+            agregado, universo = self._aggregate(ativacao, j)
+            area = agregado.sum(axis=0)
+            centro = np.mean(saida.range)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                centroide = (universo @ agregado) / area
+            resultado[:, j] = np.where(area > 0, centroide, centro)
+        return resultado
+
+    @property
+    def _has_and(self):
+        return bool((self.connections == 1).any())
+
+    @property
+    def _has_or(self):
+        return bool((self.connections == 2).any())
+
+
+# --- 3. LEITURA DE ARQUIVOS .FIS ---
+
+_METODOS_SUPORTADOS = {
+    'AndMethod': ('min', 'prod'),
+    'OrMethod': ('max', 'probor'),
+    'ImpMethod': ('min', 'prod'),
+    'AggMethod': ('max',),
+    'DefuzzMethod': ('centroid',),
+}
+
+_PADRAO_MF = re.compile(r"MF\d+\s*=\s*'([^']*)'\s*:\s*'([^']*)'\s*,\s*\[([^\]]*)\]")
+_PADRAO_REGRA = re.compile(r"^([-\d\s.]+),([-\d\s.]+)\(([\d.eE+-]+)\)\s*:\s*(\d+)")
+
+
+def file_fingerprint(path):
+    """Hash SHA-256 do conteúdo de um arquivo .fis (identifica versões do sistema)."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _ler_texto(path):
+    with open(path, 'rb') as f:
+        bruto = f.read()
+    try:
+        return bruto.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return bruto.decode('latin-1')
+
+
+def _valor(texto):
+    texto = texto.strip()
+    if texto.startswith("'") and texto.endswith("'"):
+        return texto[1:-1]
+    return texto
+
+
+def _faixa(texto):
+    return tuple(float(v) for v in texto.strip().strip('[]').split())
+
+
+def _variavel(secao, nome_secao):
+    mfs = []
+    for chave, valor in secao:
+        if not chave.startswith('MF'):
+            continue
+        achado = _PADRAO_MF.match(f'{chave}={valor}')
+        if achado is None:
+            raise ValueError(f"Função de pertinência inválida em [{nome_secao}]: {chave}={valor}")
+        nome, tipo, params = achado.groups()
+        if tipo not in FUNCOES_PERTINENCIA:
+            raise ValueError(f"Tipo de pertinência '{tipo}' não suportado em [{nome_secao}].")
+        mfs.append(MembershipFunction(nome, tipo, tuple(float(p) for p in params.split())))
+    campos = dict(secao)
+    return Variable(_valor(campos['Name']), _faixa(campos['Range']), tuple(mfs))
+
+
+def load_fis(path):
+    """Carrega um arquivo .fis (formato texto do MATLAB) como um `FuzzySystem`."""
+    secoes = {}
+    regras = []
+    atual = None
+    for linha in _ler_texto(path).splitlines():
+        linha = linha.strip()
+        if not linha or linha.startswith('%'):
+            continue
+        if linha.startswith('[') and linha.endswith(']'):
+            atual = linha[1:-1]
+            secoes[atual] = []
+            continue
+        if atual == 'Rules':
+            regras.append(linha)
+        elif atual is not None and '=' in linha:
+            chave, valor = linha.split('=', 1)
+            secoes[atual].append((chave.strip(), valor.strip()))
+
+    sistema = dict(secoes.get('System', []))
+    if _valor(sistema.get('Type', "'mamdani'")).lower() != 'mamdani':
+        raise ValueError(f"'{os.path.basename(path)}': apenas sistemas Mamdani são suportados.")
+    metodos = {}
+    for chave, suportados in _METODOS_SUPORTADOS.items():
+        metodo = _valor(sistema.get(chave, f"'{suportados[0]}'"))
+        if metodo not in suportados:
+            raise ValueError(f"'{os.path.basename(path)}': {chave}='{metodo}' não suportado.")
+        metodos[chave] = metodo
+
+    num_in = int(sistema['NumInputs'])
+    num_out = int(sistema['NumOutputs'])
+    entradas = tuple(_variavel(secoes[f'Input{i}'], f'Input{i}') for i in range(1, num_in + 1))
+    saidas = tuple(_variavel(secoes[f'Output{i}'], f'Output{i}') for i in range(1, num_out + 1))
+
+    antecedentes, consequentes, pesos, conexoes = [], [], [], []
+    for regra in regras:
+        achado = _PADRAO_REGRA.match(regra)
+        if achado is None:
+            raise ValueError(f"Regra inválida em '{os.path.basename(path)}': {regra}")
+        ant, cons, peso, conexao = achado.groups()
+        ant = [int(float(v)) for v in ant.split()]
+        cons = [int(float(v)) for v in cons.split()]
+        if len(ant) != num_in or len(cons) != num_out:
+            raise ValueError(f"Regra com número de termos incorreto em '{os.path.basename(path)}': {regra}")
+        antecedentes.append(ant)
+        consequentes.append(cons)
+        pesos.append(float(peso))
+        conexoes.append(int(conexao))
+
+    return FuzzySystem(
+        name=_valor(sistema['Name']),
+        inputs=entradas,
+        outputs=saidas,
+        antecedents=np.array(antecedentes, dtype=int).reshape(-1, num_in),
+        consequents=np.array(consequentes, dtype=int).reshape(-1, num_out),
+        weights=np.array(pesos, dtype=float),
+        connections=np.array(conexoes, dtype=int),
+        and_method=metodos['AndMethod'],
+        or_method=metodos['OrMethod'],
+        imp_method=metodos['ImpMethod'],
+        agg_method=metodos['AggMethod'],
+        defuzz_method=metodos['DefuzzMethod'],
+        fingerprint=file_fingerprint(path),
+    )
+
+
+def evalfis(fis, X, chunk_size=TAMANHO_BLOCO_PADRAO):
+    """Atalho com a mesma assinatura do MATLAB: `evalfis(fis, entradas)`."""
+    return fis.evaluate(X, chunk_size=chunk_size)
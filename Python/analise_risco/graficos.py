@@ -0,0 +1,216 @@
+"""
+Renderização em paralelo, com cache, dos gráficos por coluna (histogramas e boxplots).
+
+`Analise_Dados_Originais.py` e `Validação_Novos_Dados.py` descrevem cada figura como
+uma tarefa (`figure_task`), e `render_figures` as desenha em um pool de processos com
+o backend Agg (sem janela).
+
+Cada pasta de saída guarda em `.cache_graficos.json` uma chave por figura: o hash dos
+valores da coluna, do tipo, do rótulo e do estilo. Uma figura só é desenhada de novo
+se a chave mudou ou se o arquivo não existe mais.
+
+Em colunas grandes (a partir de `LIMIAR_KDE_BINADA` valores), o histograma e a KDE
+são calculados antes do desenho. A KDE é binada: os dados vão para uma grade fina e
+são convoluídos com o núcleo gaussiano, com a mesma banda (Scott) e a mesma faixa
+(`cut=0`) do `sns.histplot(kde=True)`. O custo deixa de ser O(n x pontos da curva).
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analise_risco import perfil
+
+# Mude quando o desenho mudar, para invalidar o cache de todas as figuras
+VERSAO_RENDERIZACAO = 1
+
+NOME_CACHE = '.cache_graficos.json'
+
+ESTILO_PADRAO = {
+    'cor': '#003366',  # Azul UNIFEI
+    'cor_texto': '#000000',
+    'figsize': (6, 4),
+    'bins': 20,
+    'kde': True,
+    'formato': 'png',
+    'dpi': 300,
+    'layout': 'constrained',  # 'constrained' ou 'tight'
+    'bbox_inches': None,
+}
+
+# A partir deste número de valores, histograma e KDE são pré-calculados (KDE binada)
+LIMIAR_KDE_BINADA = 20_000
+
+# Pontos da curva da KDE (`gridsize` do seaborn) e células da grade da KDE binada
+PONTOS_KDE = 200
+CELULAS_KDE = 2048
+
+
+def figure_task(tipo, valores, rotulo, caminho, **estilo):
+    """Descreve uma figura: `tipo` é 'hist' ou 'box'; `estilo` sobrepõe chaves de `ESTILO_PADRAO`."""
+    if tipo not in ('hist', 'box'):
+        raise ValueError(f"Tipo de gráfico desconhecido: '{tipo}' (use 'hist' ou 'box').")
+    valores = np.asarray(valores, dtype=float)
+    return {
+        'tipo': tipo,
+        'valores': valores[~np.isnan(valores)],
+        'rotulo': rotulo,
+        'caminho': caminho,
+        'estilo': {**ESTILO_PADRAO, **estilo},
+    }
+
+
+def task_key(tarefa):
+    """Hash dos dados e de tudo o que define a aparência da figura."""
+    h = hashlib.sha256(np.ascontiguousarray(tarefa['valores']).tobytes())
+    h.update(json.dumps([VERSAO_RENDERIZACAO, tarefa['tipo'], tarefa['rotulo'], tarefa['estilo']],
+                        sort_keys=True, default=str).encode('utf-8'))
+    return h.hexdigest()
+
+
+# --- CÁLCULOS PRÉVIOS ---
+
+def binned_kde(values, gridsize=PONTOS_KDE, cells=CELULAS_KDE):
+    """
+    KDE gaussiana binada, na faixa [mínimo, máximo] dos dados.
+
+    A banda é a regra de Scott do `scipy.stats.gaussian_kde` (desvio padrão com
+    ddof=1 vezes n^(-1/5)). Retorna a grade de `gridsize` pontos e a densidade.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    lo, hi = values.min(), values.max()
+    grade = np.linspace(lo, hi, gridsize)
+    banda = values.std(ddof=1) * n ** (-1 / 5) if n > 1 else 0.0
+    if hi <= lo or banda <= 0:
+        return grade, np.zeros(gridsize)
+
+    # Binagem linear: cada valor é dividido entre os dois nós vizinhos da grade fina
+    nos = np.linspace(lo, hi, cells + 1)
+    passo = nos[1] - nos[0]
+    posicao = (values - lo) / passo
+    esquerda = np.minimum(np.floor(posicao).astype(np.int64), cells - 1)
+    fracao = posicao - esquerda
+    pesos = (np.bincount(esquerda, weights=1 - fracao, minlength=cells + 1)
+             + np.bincount(esquerda + 1, weights=fracao, minlength=cells + 1))
+
+    # Núcleo truncado em 4 bandas (ou na largura da grade, se for menor)
+    meia_largura = min(int(np.ceil(4 * banda / passo)), cells)
+    deslocamentos = np.arange(-meia_largura, meia_largura + 1) * passo
+    nucleo = np.exp(-0.5 * (deslocamentos / banda) ** 2) / (banda * np.sqrt(2 * np.pi))
+    # Convolução completa recortada à grade: 'same' devolveria o comprimento do núcleo
+    # quando ele é maior que a grade (n pequeno ou banda larga)
+    densidade = np.convolve(pesos, nucleo, mode='full')[meia_largura:meia_largura + cells + 1] / n
+    return grade, np.interp(grade, nos, densidade)
+
+
+def histogram_data(values, bins):
+    """Bordas e contagens do histograma (`bins` células iguais entre o mínimo e o máximo, como no seaborn)."""
+    contagens, bordas = np.histogram(values, bins=bins)
+    return bordas, contagens
+
+
+# --- DESENHO ---
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _desenhar_histograma(ax, valores, estilo):
+    import seaborn as sns
+
+    if len(valores) < LIMIAR_KDE_BINADA:
+        sns.histplot(valores, kde=estilo['kde'], bins=estilo['bins'], color=estilo['cor'], ax=ax)
+        return
+    bordas, contagens = histogram_data(valores, estilo['bins'])
+    # Com kde=True o seaborn usa alpha 0.5 nas barras; sem ela, 0.75
+    sns.histplot(x=(bordas[:-1] + bordas[1:]) / 2, weights=contagens, bins=len(contagens),
+                 binrange=(bordas[0], bordas[-1]), color=estilo['cor'], alpha=0.5 if estilo['kde'] else 0.75, ax=ax)
+    if estilo['kde']:
+        grade, densidade = binned_kde(valores)
+        # Mesma escala da curva do seaborn com stat='count': densidade * n * largura da barra
+        ax.plot(grade, densidade * len(valores) * (bordas[1] - bordas[0]), color=estilo['cor'])
+
+
+def _desenhar(tarefa):
+    """Desenha e grava uma figura; roda nos processos do pool."""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    estilo = tarefa['estilo']
+    fig, ax = plt.subplots(figsize=tuple(estilo['figsize']), constrained_layout=estilo['layout'] == 'constrained')
+    if tarefa['tipo'] == 'hist':
+        _desenhar_histograma(ax, tarefa['valores'], estilo)
+        ax.set_xlabel(tarefa['rotulo'], color=estilo['cor_texto'])
+        ax.set_ylabel('Frequência', color=estilo['cor_texto'])
+    else:
+        sns.boxplot(y=tarefa['valores'], color=estilo['cor'], ax=ax)
+        ax.set_ylabel(tarefa['rotulo'], color=estilo['cor_texto'])
+    if estilo['layout'] == 'tight':
+        fig.tight_layout()
+    kwargs = {'format': estilo['formato'], 'bbox_inches': estilo['bbox_inches']}
+    if estilo['dpi'] is not None:
+        kwargs['dpi'] = estilo['dpi']
+    fig.savefig(tarefa['caminho'], **kwargs)
+    plt.close(fig)
+    return tarefa['caminho']
+
+
+# --- CACHE E EXECUÇÃO ---
+
+def _ler_cache(pasta):
+    try:
+        with open(os.path.join(pasta, NOME_CACHE), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _gravar_cache(pasta, cache):
+    with open(os.path.join(pasta, NOME_CACHE), 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2, ensure_ascii=False)
+
+
+@perfil.profiled('graficos.renderizacao')
+def render_figures(tarefas, processos=None, cache=True):
+    """
+    Desenha as figuras de `tarefas` que mudaram desde a última execução.
+
+    Retorna `{caminho: 'gerado' | 'sem alterações'}`. Com `cache=False`, desenha todas.
+    `processos` é o tamanho do pool (padrão: núcleos disponíveis); com 1 processo ou uma
+    única figura pendente, o desenho é feito no próprio processo.
+    """
+    caches, chaves, status, pendentes = {}, {}, {}, []
+    for tarefa in tarefas:
+        pasta, nome = os.path.split(os.path.abspath(tarefa['caminho']))
+        if pasta not in caches:
+            os.makedirs(pasta, exist_ok=True)
+            caches[pasta] = _ler_cache(pasta)
+        chave = chaves[tarefa['caminho']] = task_key(tarefa)
+        if cache and caches[pasta].get(nome) == chave and os.path.exists(tarefa['caminho']):
+            status[tarefa['caminho']] = 'sem alterações'
+        else:
+            pendentes.append(tarefa)
+
+    processos = min(processos or os.cpu_count() or 1, len(pendentes))
+    if processos <= 1:
+        _init_worker()
+        feitos = map(_desenhar, pendentes)
+    else:
+        executor = ProcessPoolExecutor(max_workers=processos, initializer=_init_worker)
+        feitos = executor.map(_desenhar, pendentes)
+    try:
+        for caminho in feitos:
+            pasta, nome = os.path.split(os.path.abspath(caminho))
+            caches[pasta][nome] = chaves[caminho]
+            status[caminho] = 'gerado'
+    finally:
+        if processos > 1:
+            executor.shutdown()
+        # Grava o que ficou pronto, mesmo se alguma figura falhar
+        for pasta, conteudo in caches.items():
+            _gravar_cache(pasta, conteudo)
+    return {t['caminho']: status[t['caminho']] for t in tarefas}
@@ -0,0 +1,353 @@
+"""
+Propagação de incerteza de medição para o RI por Monte Carlo.
+
+`calculate_indices` (Cenario_BR.m) gera um único RI por transformador, mas as
+entradas do HI vêm de ensaios de laboratório com erro conhecido (umidade, acidez,
+rigidez dielétrica, fator de dissipação, gases dissolvidos e DP). Aqui cada ativo
+recebe K amostras perturbadas segundo um modelo de erro por entrada, e as N x K
+amostras são avaliadas em lote pelo motor vetorizado. Por ativo, o resultado é:
+- o RI nominal (sem perturbação), a média e o desvio padrão do RI;
+- percentis do RI;
+- a probabilidade de cada categoria de risco (Baixo/Moderado/Alto/Crítico).
+
+Modelos de erro (`ERROS_MEDICAO_PADRAO`, ou um JSON com o mesmo formato), por coluna:
+- `relativo`: normal com desvio `valor` x |medida|;
+- `absoluto`: normal com desvio `valor`, na unidade da coluna;
+- `uniforme`: uniforme em medida ± `valor`.
+Colunas do FC também podem ter erro; sem isso, o FC de cada ativo é calculado uma
+só vez. Amostras fora da faixa de uma entrada são limitadas a ela pelo motor fuzzy,
+como no `evalfis`.
+
+A memória é limitada: os ativos são processados em blocos de
+`amostras_por_lote // K` ativos, e só os resumos de cada ativo são guardados. Cada
+ativo tem o seu gerador, filho de `SeedSequence(seed)` com a chave do ativo (hash
+do `No.`, ou a posição na frota sem identificadores), então o resultado de um
+ativo não depende do tamanho dos blocos, do número de processos nem da junção.
+
+Uso:
+    python -m analise_risco.incerteza Dados_HI_Sinteticos_Final.csv Dados_FC_Sinteticos_Final.csv \\
+        incerteza.parquet --amostras 1000 --processos 8
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analise_risco import perfil
+from analise_risco.dados import LINHAS_POR_BLOCO_PADRAO, MAPA_TRADUCAO, table_columns
+from analise_risco.fis import TAMANHO_BLOCO_PADRAO
+from analise_risco.indices import caminho_matlab, input_arrays, load_systems, rescale_columns
+from analise_risco.relatorio import CATEGORIAS_RISCO, LIMITES_RISCO
+
+# Desvios típicos dos ensaios de óleo e papel, em fração da medida (ajuste ao laboratório)
+ERROS_MEDICAO_PADRAO = {
+    'Humidity [ppm]': {'tipo': 'relativo', 'valor': 0.10},
+    'Acidity [mg KOH/g]': {'tipo': 'relativo', 'valor': 0.10},
+    'Dielectric Strength [kV]': {'tipo': 'relativo', 'valor': 0.05},
+    'Dissipation factor  [%]': {'tipo': 'relativo', 'valor': 0.10},
+    'Dissolved gases [ppm]': {'tipo': 'relativo', 'valor': 0.15},
+    'DP': {'tipo': 'relativo', 'valor': 0.10},
+}
+
+TIPOS_ERRO = ('relativo', 'absoluto', 'uniforme')
+
+AMOSTRAS_PADRAO = 1000
+PERCENTIS_PADRAO = (5, 50, 95)
+
+# Amostras (ativos x K) avaliadas por bloco: ~30 MB de entradas perturbadas
+AMOSTRAS_POR_LOTE_PADRAO = 262_144
+
+# Estado de cada processo do pool, preenchido por `_iniciar_processo`
+_estado = {}
+
+
+def error_positions(error_models, hi_columns, fc_columns):
+    """
+    Converte `{coluna: {'tipo', 'valor'}}` em `(posições, tipos, valores)` sobre as 14 entradas.
+
+    As colunas são procuradas pelo nome original ou traduzido (`MAPA_TRADUCAO`), entre
+    as entradas de HI (`hi_columns`) e de FC (`fc_columns`), nessa ordem.
+    """
+    traducao = {v: k for k, v in MAPA_TRADUCAO.items()}
+    nomes = [str(c).strip() for c in [*hi_columns, *fc_columns]]
+    posicoes, tipos, valores = [], [], []
+    for coluna, modelo in error_models.items():
+        nome = traducao.get(coluna, coluna).strip()
+        if nome not in nomes:
+            raise KeyError(f"Coluna do modelo de erro não encontrada nas entradas: '{coluna}'")
+        if modelo['tipo'] not in TIPOS_ERRO:
+            raise ValueError(f"Tipo de erro desconhecido em '{coluna}': '{modelo['tipo']}' (use {', '.join(TIPOS_ERRO)}).")
+        posicoes.append(nomes.index(nome))
+        tipos.append(TIPOS_ERRO.index(modelo['tipo']))
+        valores.append(float(modelo['valor']))
+    return np.array(posicoes, dtype=int), np.array(tipos, dtype=int), np.array(valores, dtype=float)
+
+
+def perturb(entradas, num_samples, posicoes, tipos, valores, rngs):
+    """
+    Repete cada linha de `entradas` `num_samples` vezes e aplica o erro às colunas de `posicoes`.
+
+    `rngs` tem um gerador por linha: as amostras da linha i usam só o gerador i.
+    """
+    amostras = np.repeat(entradas, num_samples, axis=0)
+    medidas = amostras[:, posicoes]
+    escala = np.where(tipos == 0, valores * np.abs(medidas), valores)
+    uniformes = tipos == 2
+    num_normais, num_uniformes = int((~uniformes).sum()), int(uniformes.sum())
+    ruido = np.empty_like(medidas)
+    for i, rng in enumerate(rngs):
+        linhas = slice(i * num_samples, (i + 1) * num_samples)
+        ruido[linhas, ~uniformes] = rng.standard_normal((num_samples, num_normais))
+        ruido[linhas, uniformes] = rng.uniform(-1.0, 1.0, (num_samples, num_uniformes))
+    amostras[:, posicoes] = medidas + ruido * escala
+    return amostras
+
+
+def summarize(ri, percentiles=PERCENTIS_PADRAO):
+    """Resumo por linha de `ri` (ativos x K): média, desvio, percentis e probabilidade de cada categoria."""
+    resumo = {'RI_media': ri.mean(axis=1), 'RI_desvio': ri.std(axis=1, ddof=1) if ri.shape[1] > 1 else np.zeros(len(ri))}
+    for q, valores in zip(percentiles, np.percentile(ri, percentiles, axis=1)):
+        resumo[f'RI_p{q:g}'] = valores
+    limites = np.asarray(LIMITES_RISCO)
+    codigos = np.searchsorted(limites, ri, side='right') - 1
+    codigos[ri == limites[-1]] = len(CATEGORIAS_RISCO) - 1
+    for k, categoria in enumerate(CATEGORIAS_RISCO):
+        resumo[f'P_{categoria}'] = (codigos == k).mean(axis=1)
+    return resumo
+
+
+def result_columns(percentiles=PERCENTIS_PADRAO):
+    """Colunas do resultado por ativo, na ordem de `monte_carlo`."""
+    return (['No.', 'RI', 'RI_media', 'RI_desvio', *[f'RI_p{q:g}' for q in percentiles]]
+            + [f'P_{categoria}' for categoria in CATEGORIAS_RISCO])
+
+
+def _bloco(hi_inputs, fc_inputs, systems, num_samples, erro, fc_mins, fc_maxs, percentiles, rngs, chunk_size):
+    """Avalia as N x K amostras de um bloco de ativos e retorna os resumos por ativo."""
+    posicoes, tipos, valores = erro
+    num_hi = hi_inputs.shape[1]
+    faixas_fc = [v.range for v in systems['fc'].inputs]
+    n = len(hi_inputs)
+
+    saidas_hi = systems['hi'].evaluate(hi_inputs, chunk_size=chunk_size)
+    fc = systems['fc'].evaluate(rescale_columns(fc_inputs, faixas_fc, fc_mins, fc_maxs), chunk_size=chunk_size)[:, 0]
+    nominal = systems['risk'].evaluate(np.column_stack([saidas_hi[:, 0], fc]), chunk_size=chunk_size)[:, 0]
+
+    with perfil.stage('incerteza.perturbacao'):
+        amostras = perturb(np.hstack([hi_inputs, fc_inputs]), num_samples, posicoes, tipos, valores, rngs)
+    with perfil.stage('incerteza.avaliacao'):
+        hi_amostras = systems['hi'].evaluate(amostras[:, :num_hi], chunk_size=chunk_size)[:, 0]
+        if np.any(posicoes >= num_hi):
+            entradas_fc = rescale_columns(amostras[:, num_hi:], faixas_fc, fc_mins, fc_maxs)
+            fc_amostras = systems['fc'].evaluate(entradas_fc, chunk_size=chunk_size)[:, 0]
+        else:
+            fc_amostras = np.repeat(fc, num_samples)
+        ri = systems['risk'].evaluate(np.column_stack([hi_amostras, fc_amostras]), chunk_size=chunk_size)[:, 0]
+    with perfil.stage('incerteza.resumo'):
+        return {'RI': nominal, **summarize(ri.reshape(n, num_samples), percentiles)}
+
+
+def asset_keys(ids):
+    """Chave inteira de cada ativo (hash do `No.`), usada para semear o gerador do ativo."""
+    return pd.util.hash_pandas_object(pd.Series(ids), index=False).to_numpy()
+
+
+def _geradores(seed, chaves):
+    return [np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(int(c),))) for c in chaves]
+
+
+def _iniciar_processo(directory, compiled, parametros):
+    _estado['systems'] = load_systems(directory, compiled=compiled)
+    _estado['parametros'] = parametros
+
+
+def _processar_bloco(chaves, hi_inputs, fc_inputs):
+    p = _estado['parametros']
+    return _bloco(hi_inputs, fc_inputs, _estado['systems'], p['num_samples'], p['erro'], p['fc_mins'], p['fc_maxs'],
+                  p['percentiles'], _geradores(p['seed'], chaves), p['chunk_size'])
+
+
+def assets_per_batch(num_samples, samples_per_batch=AMOSTRAS_POR_LOTE_PADRAO):
+    """Ativos por bloco para que um bloco tenha no máximo `samples_per_batch` amostras."""
+    return max(1, samples_per_batch // num_samples)
+
+
+class _Executor:
+    """Avalia blocos de ativos no próprio processo ou em um pool."""
+
+    def __init__(self, directory, compiled, parametros, workers):
+        argumentos = (directory, compiled, parametros)
+        self.pool = None
+        if workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_processo, initargs=argumentos)
+        else:
+            _iniciar_processo(*argumentos)
+
+    def map(self, blocos):
+        """`blocos`: iterável de `(chaves, hi_inputs, fc_inputs)`; retorna os resumos na mesma ordem."""
+        if self.pool is None:
+            return (_processar_bloco(*b) for b in blocos)
+        return self.pool.map(_processar_bloco, *zip(*blocos)) if blocos else iter(())
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+        else:
+            _estado.clear()
+
+
+def monte_carlo_arrays(hi_inputs, fc_inputs, error_models=None, hi_columns=None, fc_columns=None,
+                       num_samples=AMOSTRAS_PADRAO, percentiles=PERCENTIS_PADRAO, seed=0, fc_mins=None, fc_maxs=None,
+                       directory=caminho_matlab, compiled=False, workers=1,
+                       samples_per_batch=AMOSTRAS_POR_LOTE_PADRAO, chunk_size=TAMANHO_BLOCO_PADRAO, ids=None):
+    """
+    Monte Carlo sobre as matrizes brutas de entrada (6 colunas de HI e 8 de FC por ativo).
+
+    `hi_columns`/`fc_columns` são os nomes das colunas, usados para localizar as
+    entradas de `error_models` (padrão: `ERROS_MEDICAO_PADRAO`). Como no MATLAB, sem
+    `fc_mins`/`fc_maxs` o `rescale` do FC usa o mínimo e o máximo da frota inteira.
+    `ids` (o `No.` de cada ativo) semeia o gerador de cada ativo; sem ele, vale a posição.
+    Retorna um dicionário de arrays por ativo: `RI`, `RI_media`, `RI_desvio`,
+    `RI_p<q>` e `P_<categoria>`.
+    """
+    error_models = ERROS_MEDICAO_PADRAO if error_models is None else error_models
+    # Sem nomes, as entradas de HI seguem a ordem de 'Dados_HI_Sinteticos_Final.csv' (a mesma de ERROS_MEDICAO_PADRAO)
+    hi_columns = list(ERROS_MEDICAO_PADRAO) if hi_columns is None else hi_columns
+    fc_columns = [] if fc_columns is None else fc_columns
+    if fc_mins is None or fc_maxs is None:
+        fc_mins, fc_maxs = np.nanmin(fc_inputs, axis=0), np.nanmax(fc_inputs, axis=0)
+    parametros = {
+        'num_samples': num_samples, 'erro': error_positions(error_models, hi_columns, fc_columns),
+        'fc_mins': fc_mins, 'fc_maxs': fc_maxs, 'percentiles': tuple(percentiles), 'seed': seed,
+        'chunk_size': chunk_size,
+    }
+    chaves = np.arange(len(hi_inputs)) if ids is None else asset_keys(ids)
+    por_bloco = assets_per_batch(num_samples, samples_per_batch)
+    blocos = [(chaves[inicio:inicio + por_bloco], hi_inputs[inicio:inicio + por_bloco],
+               fc_inputs[inicio:inicio + por_bloco])
+              for inicio in range(0, len(hi_inputs), por_bloco)]
+    executor = _Executor(directory, compiled, parametros, workers)
+    try:
+        resumos = list(executor.map(blocos))
+    finally:
+        executor.close()
+    if not resumos:
+        return {}
+    return {chave: np.concatenate([r[chave] for r in resumos]) for chave in resumos[0]}
+
+
+def monte_carlo(hi_table, fc_table, error_models=None, num_samples=AMOSTRAS_PADRAO, **options):
+    """
+    Versão probabilística de `calculate_indices` para DataFrames já carregados.
+
+    As tabelas são alinhadas por posição, como no MATLAB. `options` são repassadas a
+    `monte_carlo_arrays`. Retorna um DataFrame com `No.` e os resumos de cada ativo.
+    """
+    if len(hi_table) != len(fc_table):
+        raise ValueError(
+            f"As tabelas de HI ({len(hi_table)} linhas) e FC ({len(fc_table)} linhas) devem ter o mesmo tamanho."
+        )
+    hi_inputs, fc_inputs = input_arrays(hi_table, fc_table)
+    options.setdefault('ids', hi_table.iloc[:, 0].to_numpy())
+    resumos = monte_carlo_arrays(hi_inputs, fc_inputs, error_models, hi_table.columns[1:7], fc_table.columns[1:9],
+                                 num_samples, **options)
+    return pd.DataFrame({'No.': hi_table.iloc[:, 0].to_numpy(), **resumos})
+
+
+def monte_carlo_files(hi_path, fc_path, output_path, error_models=None, num_samples=AMOSTRAS_PADRAO,
+                      percentiles=PERCENTIS_PADRAO, seed=0, directory=caminho_matlab, compiled=False, workers=1,
+                      samples_per_batch=AMOSTRAS_POR_LOTE_PADRAO, chunk_size=LINHAS_POR_BLOCO_PADRAO, join='ordered',
+                      fc_stats=None, verbose=True):
+    """
+    Monte Carlo em fluxo sobre os arquivos de HI e FC, com a junção por `No.` de
+    `analise_risco.pontuacao`. O resultado é gravado bloco a bloco em `output_path`
+    (CSV ou Parquet). A memória depende de `chunk_size` e de `samples_per_batch`,
+    não do tamanho da frota. Retorna ativos processados, amostras, tempo e pico de memória.
+    """
+    from analise_risco.pontuacao import (NUM_ENTRADAS_FC, NUM_ENTRADAS_HI, ResultWriter, fc_column_stats,
+                                         iter_joined, peak_rss_mb)
+
+    error_models = ERROS_MEDICAO_PADRAO if error_models is None else error_models
+    erro = error_positions(error_models, table_columns(hi_path)[1:NUM_ENTRADAS_HI + 1],
+                           table_columns(fc_path)[1:NUM_ENTRADAS_FC + 1])
+    fc_stats = fc_column_stats(fc_path, chunk_size) if fc_stats is None else fc_stats
+    parametros = {
+        'num_samples': num_samples, 'erro': erro, 'fc_mins': np.asarray(fc_stats['mins'], dtype=float),
+        'fc_maxs': np.asarray(fc_stats['maxs'], dtype=float), 'percentiles': tuple(percentiles), 'seed': seed,
+        'chunk_size': TAMANHO_BLOCO_PADRAO,
+    }
+    por_bloco = assets_per_batch(num_samples, samples_per_batch)
+    inicio, ativos = time.perf_counter(), 0
+    executor = _Executor(directory, compiled, parametros, workers)
+    try:
+        with ResultWriter(output_path, result_columns(percentiles)) as escritor:
+            for juntos in iter_joined(hi_path, fc_path, chunk_size, join):
+                valores = juntos.iloc[:, 1:].to_numpy(dtype=float)
+                chaves = asset_keys(juntos['No.'].to_numpy())
+                blocos = []
+                for comeco in range(0, len(juntos), por_bloco):
+                    parte = valores[comeco:comeco + por_bloco]
+                    blocos.append((chaves[comeco:comeco + por_bloco], parte[:, :NUM_ENTRADAS_HI],
+                                   parte[:, NUM_ENTRADAS_HI:]))
+                resumos = list(executor.map(blocos))
+                escritor.write(pd.DataFrame({
+                    'No.': juntos['No.'].to_numpy(),
+                    **{chave: np.concatenate([r[chave] for r in resumos]) for chave in resumos[0]},
+                }))
+                ativos += len(juntos)
+                if verbose:
+                    decorrido = time.perf_counter() - inicio
+                    print(f" → {ativos:>12,} ativos | {ativos * num_samples / decorrido:>12,.0f} amostras/s "
+                          f"| pico de memória {peak_rss_mb():,.0f} MB")
+    finally:
+        executor.close()
+    decorrido = time.perf_counter() - inicio
+    return {
+        'ativos': ativos,
+        'amostras': ativos * num_samples,
+        'segundos': decorrido,
+        'amostras_por_segundo': ativos * num_samples / decorrido if decorrido > 0 else 0.0,
+        'pico_memoria_mb': peak_rss_mb(),
+    }
+
+
+def load_error_models(path):
+    """Lê um JSON `{coluna: {"tipo": ..., "valor": ...}}` com os modelos de erro."""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Propagação de incerteza de medição para o RI (Monte Carlo).')
+    parser.add_argument('hi', help="Arquivo de HI (CSV ou Parquet), no formato de 'Dados_HI_Sinteticos_Final.csv'")
+    parser.add_argument('fc', help="Arquivo de FC (CSV ou Parquet), no formato de 'Dados_FC_Sinteticos_Final.csv'")
+    parser.add_argument('saida', help='Arquivo de resultado (.csv ou .parquet)')
+    parser.add_argument('--amostras', type=int, default=AMOSTRAS_PADRAO, help='Amostras K por ativo')
+    parser.add_argument('--erros', help='JSON com os modelos de erro por coluna (padrão: ERROS_MEDICAO_PADRAO)')
+    parser.add_argument('--percentis', type=float, nargs='+', default=list(PERCENTIS_PADRAO))
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--processos', type=int, default=1)
+    parser.add_argument('--amostras-por-lote', type=int, default=AMOSTRAS_POR_LOTE_PADRAO,
+                        help='Limite de amostras avaliadas de uma vez (controla a memória)')
+    parser.add_argument('--linhas-por-bloco', type=int, default=LINHAS_POR_BLOCO_PADRAO)
+    parser.add_argument('--juncao', choices=['ordered', 'partitioned'], default='ordered')
+    parser.add_argument('--fis', default=caminho_matlab, help='Pasta com os arquivos .fis')
+    parser.add_argument('--compilado', action='store_true', help='Usa o sistema de risco compilado')
+    args = parser.parse_args(argv)
+
+    erros = load_error_models(args.erros) if args.erros else ERROS_MEDICAO_PADRAO
+    print(f"Monte Carlo com {args.amostras:,} amostras por ativo; erros em: {', '.join(erros)}")
+    resultado = monte_carlo_files(args.hi, args.fc, args.saida, erros, args.amostras, args.percentis, args.semente,
+                                  args.fis, args.compilado, args.processos, args.amostras_por_lote,
+                                  args.linhas_por_bloco, args.juncao)
+    print(f"\n✓ {resultado['ativos']:,} ativos ({resultado['amostras']:,} amostras) em {resultado['segundos']:.1f} s "
+          f"({resultado['amostras_por_segundo']:,.0f} amostras/s, pico de memória {resultado['pico_memoria_mb']:,.0f} MB)")
+    print(f"-> Resultado salvo em: '{os.path.abspath(args.saida)}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""
+Repontuação incremental: recalcula apenas os ativos cujas entradas mudaram.
+
+Mantém um banco SQLite persistente, uma linha por ativo (`No.`), com as 14
+entradas brutas (6 do HI e 8 do FC), a impressão digital (hash) dessas entradas
+e os resultados HI, Idade, FC e RI. A cada rodada:
+1. as linhas recebidas (frota completa ou só o delta do dia) são comparadas pela
+   impressão digital e apenas as novas ou alteradas são gravadas;
+2. se nenhum arquivo .fis mudou de hash e o mínimo/máximo das colunas do FC da
+   frota continua o mesmo, só essas linhas são reavaliadas;
+3. caso contrário a frota inteira é reavaliada a partir das entradas guardadas.
+
+O item 2 importa porque, como no MATLAB, o FC usa `rescale` com o mínimo e o
+máximo de cada coluna da frota: um novo extremo altera o FC de todos os ativos.
+Os mínimos e máximos vêm de índices do banco, sem varrer a tabela.
+
+Uso:
+    python -m analise_risco.incremental frota.sqlite "Dados_HI.csv" "Dados_FC.csv" --exportar resultados.csv
+"""
+import argparse
+import json
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from analise_risco.fis import TAMANHO_BLOCO_PADRAO, file_fingerprint
+from analise_risco.indices import COLUNAS_RESULTADO, caminho_matlab, fis_paths, load_systems, score_arrays
+from analise_risco.pontuacao import (LINHAS_POR_BLOCO_PADRAO, NUM_ENTRADAS_FC, NUM_ENTRADAS_HI, ResultWriter,
+                                     _juntar, iter_joined)
+
+COLUNAS_HI = [f'hi_{i}' for i in range(NUM_ENTRADAS_HI)]
+COLUNAS_FC = [f'fc_{i}' for i in range(NUM_ENTRADAS_FC)]
+COLUNAS_ENTRADA = COLUNAS_HI + COLUNAS_FC
+SAIDAS = ['HI', 'Idade', 'FC', 'RI']
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS ativos (
+    id_ativo INTEGER PRIMARY KEY,
+    {', '.join(f'{c} REAL' for c in COLUNAS_ENTRADA)},
+    impressao INTEGER NOT NULL,
+    {', '.join(f'"{c}" REAL' for c in SAIDAS)}
+);
+CREATE TABLE IF NOT EXISTS metadados (chave TEXT PRIMARY KEY, valor TEXT NOT NULL);
+{' '.join(f'CREATE INDEX IF NOT EXISTS idx_{c} ON ativos ({c});' for c in COLUNAS_FC)}
+"""
+
+
+def input_fingerprints(values):
+    """Hash de 64 bits de cada linha de entradas (N, 14), como inteiro com sinal do SQLite."""
+    quadro = pd.DataFrame(np.ascontiguousarray(values, dtype=float))
+    return pd.util.hash_pandas_object(quadro, index=False).to_numpy().view(np.int64)
+
+
+class ResultStore:
+    """Banco de resultados por ativo, com repontuação incremental."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conexao = sqlite3.connect(path)
+        self.conexao.executescript(_ESQUEMA)
+
+    def close(self):
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Metadados ---
+
+    def _meta(self, chave):
+        linha = self.conexao.execute('SELECT valor FROM metadados WHERE chave = ?', (chave,)).fetchone()
+        return None if linha is None else json.loads(linha[0])
+
+    def _definir_meta(self, chave, valor):
+        self.conexao.execute('INSERT OR REPLACE INTO metadados (chave, valor) VALUES (?, ?)',
+                             (chave, json.dumps(valor)))
+
+    def fc_stats(self):
+        """Mínimo e máximo atuais de cada coluna do FC na frota (consultas por índice)."""
+        mins, maxs = [], []
+        for c in COLUNAS_FC:
+            mins.append(self.conexao.execute(f'SELECT MIN({c}) FROM ativos').fetchone()[0])
+            maxs.append(self.conexao.execute(f'SELECT MAX({c}) FROM ativos').fetchone()[0])
+        return {'mins': mins, 'maxs': maxs}
+
+    def __len__(self):
+        return self.conexao.execute('SELECT COUNT(*) FROM ativos').fetchone()[0]
+
+    # --- Ingestão das entradas ---
+
+    def _ingerir(self, juntos):
+        """Grava as linhas novas ou alteradas e marca-as como pendentes. Retorna (novas, alteradas)."""
+        ids = juntos['No.'].to_numpy(dtype=np.int64)
+        entradas = juntos[COLUNAS_ENTRADA].to_numpy(dtype=float)
+        impressoes = input_fingerprints(entradas)
+        self.conexao.execute('DELETE FROM recebidos')
+        self.conexao.executemany('INSERT OR REPLACE INTO recebidos (id_ativo, impressao) VALUES (?, ?)',
+                                 zip(ids.tolist(), impressoes.tolist()))
+        anteriores = dict(self.conexao.execute(
+            'SELECT r.id_ativo, a.impressao FROM recebidos r JOIN ativos a ON a.id_ativo = r.id_ativo'
+        ).fetchall())
+        conhecida = np.array([i in anteriores for i in ids.tolist()], dtype=bool)
+        anterior = np.array([anteriores.get(i, 0) for i in ids.tolist()], dtype=np.int64)
+        mudou = ~conhecida | (anterior != impressoes)
+        if mudou.any():
+            linhas = [(int(i), *map(float, e), int(h)) for i, e, h in zip(ids[mudou], entradas[mudou], impressoes[mudou])]
+            colunas = ', '.join(['id_ativo', *COLUNAS_ENTRADA, 'impressao'])
+            marcadores = ', '.join('?' * (len(COLUNAS_ENTRADA) + 2))
+            atualizacao = ', '.join(f'{c} = excluded.{c}' for c in [*COLUNAS_ENTRADA, 'impressao'])
+            self.conexao.executemany(
+                f'INSERT INTO ativos ({colunas}) VALUES ({marcadores}) '
+                f'ON CONFLICT(id_ativo) DO UPDATE SET {atualizacao}', linhas)
+            self.conexao.executemany('INSERT OR IGNORE INTO pendentes (id_ativo) VALUES (?)',
+                                     ((int(i),) for i in ids[mudou]))
+        return int((~conhecida).sum()), int((conhecida & mudou).sum())
+
+    # --- Repontuação ---
+
+    def _pontuar_consulta(self, consulta, systems, fc_stats, chunk_size):
+        """Reavalia, em blocos, os ativos retornados por `consulta` e grava os resultados."""
+        total = 0
+        colunas = ', '.join(['a.id_ativo', *(f'a.{c}' for c in COLUNAS_ENTRADA)])
+        cursor = self.conexao.execute(consulta.format(colunas=colunas))
+        while True:
+            linhas = cursor.fetchmany(chunk_size)
+            if not linhas:
+                break
+            dados = np.array(linhas, dtype=float)
+            indices = score_arrays(dados[:, 1:1 + NUM_ENTRADAS_HI], dados[:, 1 + NUM_ENTRADAS_HI:], systems,
+                                   fc_stats['mins'], fc_stats['maxs'], min(chunk_size, TAMANHO_BLOCO_PADRAO))
+            saidas = np.column_stack([indices[c] for c in SAIDAS])
+            self.conexao.executemany(
+                f'UPDATE ativos SET {", ".join(f"{chr(34)}{c}{chr(34)} = ?" for c in SAIDAS)} WHERE id_ativo = ?',
+                [(*map(float, s), int(i)) for s, i in zip(saidas, dados[:, 0])])
+            total += len(linhas)
+        return total
+
+    def rescore(self, blocks, directory=caminho_matlab, systems=None, chunk_size=LINHAS_POR_BLOCO_PADRAO):
+        """
+        Ingere blocos já juntados (`No.`, hi_0..hi_5, fc_0..fc_7) e reavalia o necessário.
+
+        Retorna um dicionário com as contagens de ativos novos, alterados e
+        reavaliados, se a repontuação foi completa e por quê.
+        """
+        inicio = time.perf_counter()
+        systems = load_systems(directory) if systems is None else systems
+        with self.conexao:
+            self.conexao.execute('CREATE TEMP TABLE IF NOT EXISTS recebidos (id_ativo INTEGER PRIMARY KEY, impressao INTEGER)')
+            self.conexao.execute('CREATE TEMP TABLE IF NOT EXISTS pendentes (id_ativo INTEGER PRIMARY KEY)')
+            self.conexao.execute('DELETE FROM pendentes')
+            novas = alteradas = recebidas = 0
+            for juntos in blocks:
+                n, a = self._ingerir(juntos)
+                novas, alteradas, recebidas = novas + n, alteradas + a, recebidas + len(juntos)
+
+            hashes = {chave: file_fingerprint(caminho) for chave, caminho in fis_paths(directory).items()}
+            fc_stats = self.fc_stats()
+            motivos = []
+            if self._meta('fis') != hashes:
+                motivos.append('arquivos .fis alterados' if self._meta('fis') else 'primeira execução')
+            if self._meta('fc_stats') not in (None, fc_stats):
+                motivos.append('mínimo/máximo do FC da frota alterado')
+            if motivos:
+                reavaliados = self._pontuar_consulta('SELECT {colunas} FROM ativos a', systems, fc_stats, chunk_size)
+            else:
+                reavaliados = self._pontuar_consulta(
+                    'SELECT {colunas} FROM pendentes p JOIN ativos a ON a.id_ativo = p.id_ativo',
+                    systems, fc_stats, chunk_size)
+            self._definir_meta('fis', hashes)
+            self._definir_meta('fc_stats', fc_stats)
+        return {
+            'recebidos': recebidas,
+            'novos': novas,
+            'alterados': alteradas,
+            'inalterados': recebidas - novas - alteradas,
+            'reavaliados': reavaliados,
+            'completa': bool(motivos),
+            'motivo': '; '.join(motivos),
+            'segundos': time.perf_counter() - inicio,
+        }
+
+    def rescore_tables(self, hi_table, fc_table, **kwargs):
+        """Atalho de `rescore` para DataFrames de HI e FC já carregados (juntados por `No.`)."""
+        return self.rescore([_juntar(hi_table, fc_table)], **kwargs)
+
+    def rescore_files(self, hi_path, fc_path, chunk_size=LINHAS_POR_BLOCO_PADRAO, join='ordered', **kwargs):
+        """Atalho de `rescore` que lê os CSVs de HI e FC em fluxo."""
+        return self.rescore(iter_joined(hi_path, fc_path, chunk_size, join), chunk_size=chunk_size, **kwargs)
+
+    # --- Consulta dos resultados ---
+
+    def iter_results(self, chunk_size=LINHAS_POR_BLOCO_PADRAO):
+        """Itera sobre os resultados (`No.`, HI, Idade, FC, RI) em blocos."""
+        cursor = self.conexao.execute(
+            f'SELECT id_ativo, {", ".join(chr(34) + c + chr(34) for c in SAIDAS)} FROM ativos ORDER BY id_ativo')
+        while True:
+            linhas = cursor.fetchmany(chunk_size)
+            if not linhas:
+                break
+            yield pd.DataFrame(linhas, columns=COLUNAS_RESULTADO)
+
+    def results(self):
+        """Todos os resultados em um único DataFrame."""
+        blocos = list(self.iter_results())
+        return pd.concat(blocos, ignore_index=True) if blocos else pd.DataFrame(columns=COLUNAS_RESULTADO)
+
+    def export(self, path, chunk_size=LINHAS_POR_BLOCO_PADRAO):
+        """Grava os resultados em CSV ou Parquet, em blocos."""
+        with ResultWriter(path, COLUNAS_RESULTADO) as escritor:
+            for bloco in self.iter_results(chunk_size):
+                escritor.write(bloco)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Repontua apenas os ativos novos ou alterados.')
+    parser.add_argument('banco', help='Arquivo SQLite com os resultados por ativo (criado se não existir)')
+    parser.add_argument('hi', help="CSV no formato de 'Dados Fis HI.csv' (frota completa ou só o delta)")
+    parser.add_argument('fc', help="CSV no formato de 'Dados Fis FC.csv' (frota completa ou só o delta)")
+    parser.add_argument('--linhas-por-bloco', type=int, default=LINHAS_POR_BLOCO_PADRAO)
+    parser.add_argument('--juncao', choices=['ordered', 'partitioned'], default='ordered')
+    parser.add_argument('--fis', default=caminho_matlab, help='Pasta com os arquivos .fis')
+    parser.add_argument('--exportar', help='Grava os resultados da frota neste arquivo (.csv ou .parquet)')
+    args = parser.parse_args(argv)
+
+    with ResultStore(args.banco) as banco:
+        r = banco.rescore_files(args.hi, args.fc, args.linhas_por_bloco, args.juncao, directory=args.fis)
+        print(f"Recebidos: {r['recebidos']:,} | novos: {r['novos']:,} | alterados: {r['alterados']:,} "
+              f"| inalterados: {r['inalterados']:,}")
+        tipo = f"completa ({r['motivo']})" if r['completa'] else 'incremental'
+        print(f"✓ Repontuação {tipo}: {r['reavaliados']:,} ativos reavaliados em {r['segundos']:.2f} s")
+        if args.exportar:
+            banco.export(args.exportar)
+            print(f"-> Resultados exportados para: '{args.exportar}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Cálculo dos índices HI, Idade, FC e RI da frota em Python.
+
+Porta a função `calculate_indices` de `matlab/Cenario_BR.m`, usando o motor
+vetorizado de `analise_risco.fis` no lugar do `evalfis`. As colunas de entrada são
+mapeadas por posição, exatamente como no MATLAB (`hi_table(:, 2:7)` e
+`fc_table(:, 2:9)`), e as entradas do FC são reescaladas coluna a coluna
+(`rescale`) para a faixa de cada variável do sistema.
+
+Executado como script (`python -m analise_risco.indices`), pontua os CSVs
+sintéticos e compara o resultado com `matlab/Resultados_Analise_TCC.mat`.
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from analise_risco import perfil
+from analise_risco.fis import TAMANHO_BLOCO_PADRAO, load_fis
+
+# --- 1. CAMINHOS PADRÃO ---
+caminho_python = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+caminho_matlab = os.path.join(os.path.dirname(caminho_python), 'matlab')
+
+ARQUIVOS_FIS = {
+    'hi': 'Indice_Saude_BR.fis',
+    'fc': 'Fator_Consequencia_BR.fis',
+    'risk': 'Indice_Risco_BR.fis',
+}
+
+# Diferença absoluta máxima aceita em relação ao `evalfis` do MATLAB (HI, FC e RI
+# em [0, 1]; a Idade, em [0, 100], é comparada com a mesma tolerância relativa à faixa)
+TOLERANCIA_MATLAB = 1e-6
+
+COLUNAS_RESULTADO = ['No.', 'HI', 'Idade', 'FC', 'RI']
+
+
+def fis_paths(directory=caminho_matlab):
+    """Caminhos dos três arquivos .fis do projeto."""
+    return {chave: os.path.join(directory, nome) for chave, nome in ARQUIVOS_FIS.items()}
+
+
+def load_systems(directory=caminho_matlab, compiled=False, **compile_options):
+    """
+    Carrega os sistemas de HI, FC e risco em um dicionário (`hi`, `fc`, `risk`).
+
+    Com `compiled=True`, o sistema de risco (2 entradas) é trocado pela sua tabela
+    compilada em cache (`analise_risco.compilado.load_compiled`), que aceita as
+    mesmas opções em `compile_options`.
+    """
+    systems = {chave: load_fis(caminho) for chave, caminho in fis_paths(directory).items()}
+    if compiled:
+        from analise_risco.compilado import load_compiled
+
+        systems['risk'] = load_compiled(systems['risk'], **compile_options)
+    return systems
+
+
+# --- 2. PREPARAÇÃO DAS ENTRADAS ---
+
+def rescale_columns(values, ranges, mins=None, maxs=None):
+    """
+    Equivalente vetorizado do `rescale` do MATLAB aplicado coluna a coluna.
+
+    `mins`/`maxs` permitem usar estatísticas pré-calculadas (ex.: de toda a frota)
+    em vez das do próprio bloco. Colunas constantes vão para o limite inferior.
+    """
+    values = np.asarray(values, dtype=float)
+    mins = np.nanmin(values, axis=0) if mins is None else np.asarray(mins, dtype=float)
+    maxs = np.nanmax(values, axis=0) if maxs is None else np.asarray(maxs, dtype=float)
+    low = np.array([r[0] for r in ranges], dtype=float)
+    high = np.array([r[1] for r in ranges], dtype=float)
+    amplitude = maxs - mins
+    with np.errstate(invalid='ignore', divide='ignore'):
+        escala = np.where(amplitude > 0, (values - mins) / amplitude, 0.0)
+    return low + escala * (high - low)
+
+
+def input_arrays(hi_table, fc_table):
+    """Extrai as matrizes de entrada por posição, como `table2array` no MATLAB."""
+    hi_inputs = hi_table.iloc[:, 1:7].to_numpy(dtype=float)
+    fc_inputs = fc_table.iloc[:, 1:9].to_numpy(dtype=float)
+    return hi_inputs, fc_inputs
+
+
+# --- 3. CÁLCULO DOS ÍNDICES ---
+
+def score_arrays(hi_inputs, fc_inputs, systems, fc_mins=None, fc_maxs=None,
+                 chunk_size=TAMANHO_BLOCO_PADRAO):
+    """
+    Calcula HI, Idade, FC e RI a partir das matrizes brutas de entrada.
+
+    Retorna um dicionário de arrays 1-D com as chaves `HI`, `Idade`, `FC` e `RI`.
+    """
+    with perfil.stage('fuzzy.hi'):
+        saidas_hi = systems['hi'].evaluate(hi_inputs, chunk_size=chunk_size)
+    with perfil.stage('fuzzy.fc'):
+        faixas_fc = [v.range for v in systems['fc'].inputs]
+        entradas_fc = rescale_columns(fc_inputs, faixas_fc, fc_mins, fc_maxs)
+        fc = systems['fc'].evaluate(entradas_fc, chunk_size=chunk_size)[:, 0]
+    hi = saidas_hi[:, 0]
+    with perfil.stage('fuzzy.risco'):
+        ri = systems['risk'].evaluate(np.column_stack([hi, fc]), chunk_size=chunk_size)[:, 0]
+    return {'HI': hi, 'Idade': saidas_hi[:, 1], 'FC': fc, 'RI': ri}
+
+
+def calculate_indices(hi_table, fc_table, systems=None, chunk_size=TAMANHO_BLOCO_PADRAO):
+    """
+    Porta de `calculate_indices` (Cenario_BR.m) para DataFrames já carregados.
+
+    As tabelas são alinhadas por posição, com os IDs dos ativos vindos da primeira
+    coluna da tabela de HI. Retorna um DataFrame com `No.`, `HI`, `Idade`, `FC` e `RI`.
+    """
+    if len(hi_table) != len(fc_table):
+        raise ValueError(
+            f"As tabelas de HI ({len(hi_table)} linhas) e FC ({len(fc_table)} linhas) devem ter o mesmo tamanho."
+        )
+    systems = load_systems() if systems is None else systems
+    hi_inputs, fc_inputs = input_arrays(hi_table, fc_table)
+    indices = score_arrays(hi_inputs, fc_inputs, systems, chunk_size=chunk_size)
+    resultado = pd.DataFrame({'No.': hi_table.iloc[:, 0].to_numpy(), **indices})
+    return resultado[COLUNAS_RESULTADO]
+
+
+def read_table(caminho):
+    """Lê uma tabela de dados (CSV ou Parquet) sem colunas 'Unnamed' e sem o BOM do cabeçalho."""
+    from analise_risco.dados import load_table
+
+    return load_table(caminho)
+
+
+# --- 4. VERIFICAÇÃO CONTRA O MATLAB ---
+
+def compare_with_matlab(mat_path=None, directory=caminho_matlab):
+    """
+    Recalcula os índices dos CSVs sintéticos e compara com o `.mat` salvo pelo MATLAB.
+
+    Retorna um dicionário com a maior diferença absoluta de cada índice.
+    """
+    from scipy.io import loadmat
+
+    mat_path = mat_path or os.path.join(directory, 'Resultados_Analise_TCC.mat')
+    referencia = loadmat(mat_path)['analysis_data'][0, 0]
+    hi_table = read_table(os.path.join(directory, 'Dados_HI_Sinteticos_Final.csv'))
+    fc_table = read_table(os.path.join(directory, 'Dados_FC_Sinteticos_Final.csv'))
+    resultado = calculate_indices(hi_table, fc_table, load_systems(directory))
+    diferencas = {}
+    for coluna, chave, escala in [('HI', 'hi', 1.0), ('Idade', 'age', 100.0), ('FC', 'fc', 1.0), ('RI', 'ri', 1.0)]:
+        esperado = np.asarray(referencia[chave], dtype=float).ravel()
+        diferencas[coluna] = float(np.max(np.abs(resultado[coluna].to_numpy() - esperado)) / escala)
+    return diferencas
+
+
+if __name__ == '__main__':
+    inicio = time.perf_counter()
+    diferencas = compare_with_matlab()
+    print(f"Comparação com o MATLAB concluída em {time.perf_counter() - inicio:.2f} s "
+          f"(tolerância {TOLERANCIA_MATLAB:g}):")
+    for coluna, diferenca in diferencas.items():
+        status = '✓' if diferenca <= TOLERANCIA_MATLAB else '✗'
+        print(f" {status} {coluna:<6} diferença máxima = {diferenca:.3e}")
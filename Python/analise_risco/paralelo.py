@@ -0,0 +1,208 @@
+"""
+Pontuação paralela da frota com um pool de processos.
+
+As matrizes de entrada não são serializadas para os processos: ficam em memória
+compartilhada (`multiprocessing.shared_memory`) ou, se já forem `np.memmap`, no
+próprio arquivo mapeado, e cada processo anexa a mesma região. Os resultados são
+escritos diretamente em uma matriz de saída também compartilhada.
+
+Os lotes têm tamanho fixo e independem do número de processos, então cada ativo
+é sempre avaliado no mesmo bloco: o resultado é idêntico, bit a bit, com 1 ou N
+processos.
+
+Executado como script, roda um benchmark de escalabilidade de 1 a N núcleos sobre
+frotas sintéticas montadas a partir do esquema de `Dados_*_Sinteticos_Final.csv`:
+    python -m analise_risco.paralelo --linhas 2000000 --max-processos 8
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from analise_risco.fis import TAMANHO_BLOCO_PADRAO
+from analise_risco.indices import caminho_matlab, caminho_python, input_arrays, load_systems, read_table, score_arrays
+
+# Linhas por tarefa enviada ao pool (fixo para garantir determinismo)
+LINHAS_POR_LOTE_PADRAO = 65536
+
+SAIDAS = ['HI', 'Idade', 'FC', 'RI']
+
+# Estado de cada processo do pool, preenchido por `_iniciar_processo`
+_estado = {}
+
+
+# --- 1. MATRIZES COMPARTILHADAS ---
+
+def _deslocamento_memmap(array):
+    """
+    Posição em bytes de `array` no arquivo, ou None se não for uma região contígua dele.
+
+    O NumPy não atualiza `.offset` ao fatiar um memmap (`mm[1000:2000]` mantém o do
+    original), então a posição é calculada a partir do memmap que abriu o arquivo.
+    """
+    if not isinstance(array, np.memmap) or array.filename is None or not array.flags.c_contiguous:
+        return None
+    raiz = array
+    while isinstance(raiz.base, np.ndarray):
+        raiz = raiz.base
+    if not isinstance(raiz, np.memmap):
+        return None
+    return raiz.offset + (array.ctypes.data - raiz.ctypes.data)
+
+
+def _descrever(array):
+    """Descreve como um processo do pool pode anexar `array` sem copiá-lo."""
+    deslocamento = _deslocamento_memmap(array)
+    if deslocamento is not None:
+        return {'tipo': 'memmap', 'arquivo': array.filename, 'deslocamento': deslocamento,
+                'shape': array.shape, 'dtype': array.dtype.str}, None
+    array = np.ascontiguousarray(array, dtype=float)
+    memoria = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=memoria.buf)[...] = array
+    return {'tipo': 'shm', 'nome': memoria.name, 'shape': array.shape, 'dtype': array.dtype.str}, memoria
+
+
+def _anexar(descricao):
+    if descricao['tipo'] == 'memmap':
+        array = np.memmap(descricao['arquivo'], dtype=descricao['dtype'], mode='r',
+                          offset=descricao['deslocamento'], shape=tuple(descricao['shape']))
+        return array, None
+    memoria = shared_memory.SharedMemory(name=descricao['nome'])
+    return np.ndarray(descricao['shape'], dtype=descricao['dtype'], buffer=memoria.buf), memoria
+
+
+# --- 2. PROCESSOS DO POOL ---
+
+def _iniciar_processo(directory, compiled, descricoes, fc_mins, fc_maxs, chunk_size):
+    _estado['systems'] = load_systems(directory, compiled=compiled)
+    # As referências às regiões anexadas ficam no estado para não serem liberadas
+    _estado['anexos'] = {chave: _anexar(d) for chave, d in descricoes.items()}
+    _estado['fc_mins'], _estado['fc_maxs'] = fc_mins, fc_maxs
+    _estado['chunk_size'] = chunk_size
+
+
+def _processar_lote(inicio, fim):
+    hi = _estado['anexos']['hi'][0]
+    fc = _estado['anexos']['fc'][0]
+    saida = _estado['anexos']['saida'][0]
+    indices = score_arrays(hi[inicio:fim], fc[inicio:fim], _estado['systems'],
+                           _estado['fc_mins'], _estado['fc_maxs'], _estado['chunk_size'])
+    saida[inicio:fim] = np.column_stack([indices[c] for c in SAIDAS])
+    return fim - inicio
+
+
+def score_arrays_parallel(hi_inputs, fc_inputs, workers=None, batch_size=LINHAS_POR_LOTE_PADRAO,
+                          directory=caminho_matlab, compiled=False, fc_mins=None, fc_maxs=None,
+                          chunk_size=TAMANHO_BLOCO_PADRAO):
+    """
+    Versão paralela de `score_arrays`: divide os ativos em lotes entre `workers` processos.
+
+    `hi_inputs`/`fc_inputs` podem ser arrays comuns (copiados uma vez para memória
+    compartilhada) ou `np.memmap` (anexados diretamente do arquivo). Como no MATLAB,
+    sem `fc_mins`/`fc_maxs` o `rescale` do FC usa o mínimo e o máximo da frota inteira.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    n = len(hi_inputs)
+    if len(fc_inputs) != n:
+        raise ValueError(f"As entradas de HI ({n} linhas) e FC ({len(fc_inputs)} linhas) devem ter o mesmo tamanho.")
+    if fc_mins is None or fc_maxs is None:
+        fc_mins, fc_maxs = np.nanmin(fc_inputs, axis=0), np.nanmax(fc_inputs, axis=0)
+    lotes = [(inicio, min(inicio + batch_size, n)) for inicio in range(0, n, batch_size)]
+
+    memorias = []
+    try:
+        descricoes = {}
+        for chave, array in [('hi', hi_inputs), ('fc', fc_inputs), ('saida', np.zeros((n, len(SAIDAS))))]:
+            descricoes[chave], memoria = _descrever(array)
+            if memoria is not None:
+                memorias.append(memoria)
+        argumentos = (directory, compiled, descricoes, fc_mins, fc_maxs, chunk_size)
+        if workers <= 1:
+            try:
+                _iniciar_processo(*argumentos)
+                for inicio, fim in lotes:
+                    _processar_lote(inicio, fim)
+            finally:
+                _estado.clear()
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_processo, initargs=argumentos) as pool:
+                for _ in pool.map(_processar_lote, [i for i, _ in lotes], [f for _, f in lotes]):
+                    pass
+        saida, anexo = _anexar(descricoes['saida'])
+        resultado = {c: saida[:, j].copy() for j, c in enumerate(SAIDAS)}
+        del saida
+        if anexo is not None:
+            anexo.close()
+        return resultado
+    finally:
+        for memoria in memorias:
+            memoria.close()
+            memoria.unlink()
+
+
+# --- 3. BENCHMARK DE ESCALABILIDADE ---
+
+def synthetic_fleet(num_rows, seed=0, directory=caminho_python):
+    """
+    Frota sintética com `num_rows` ativos no esquema de `Dados_*_Sinteticos_Final.csv`.
+
+    Reamostra as linhas dos CSVs sintéticos (mantendo HI e FC do mesmo ativo juntos)
+    e aplica um ruído de 5% do desvio padrão de cada coluna.
+    """
+    rng = np.random.default_rng(seed)
+    hi_table = read_table(os.path.join(directory, 'Dados_HI_Sinteticos_Final.csv'))
+    fc_table = read_table(os.path.join(directory, 'Dados_FC_Sinteticos_Final.csv'))
+    hi_base, fc_base = input_arrays(hi_table, fc_table)
+    linhas = rng.integers(0, len(hi_base), num_rows)
+    hi = hi_base[linhas] + rng.normal(0.0, 0.05, (num_rows, hi_base.shape[1])) * hi_base.std(axis=0)
+    fc = fc_base[linhas] + rng.normal(0.0, 0.05, (num_rows, fc_base.shape[1])) * fc_base.std(axis=0)
+    return np.clip(hi, 0.0, None), np.clip(fc, 0.0, None)
+
+
+def scaling_benchmark(num_rows, max_workers, batch_size=LINHAS_POR_LOTE_PADRAO, seed=0, compiled=False):
+    """Mede tempo e vazão de 1 a `max_workers` processos e confere o determinismo."""
+    hi, fc = synthetic_fleet(num_rows, seed)
+    referencia = None
+    linhas = []
+    for workers in range(1, max_workers + 1):
+        inicio = time.perf_counter()
+        resultado = score_arrays_parallel(hi, fc, workers, batch_size, compiled=compiled)
+        segundos = time.perf_counter() - inicio
+        if referencia is None:
+            referencia = resultado
+        identico = all(np.array_equal(resultado[c], referencia[c]) for c in SAIDAS)
+        linhas.append({
+            'processos': workers,
+            'segundos': segundos,
+            'linhas_por_segundo': num_rows / segundos,
+            'aceleracao': linhas[0]['segundos'] / segundos if linhas else 1.0,
+            'identico_a_1_processo': identico,
+        })
+        print(f" {workers:>3} processo(s): {segundos:7.2f} s | {num_rows / segundos:>12,.0f} linhas/s "
+              f"| aceleração {linhas[-1]['aceleracao']:5.2f}x | {'✓' if identico else '✗'} determinístico")
+    return linhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark de escalabilidade da pontuação paralela.')
+    parser.add_argument('--linhas', type=int, default=1_000_000, help='Tamanho da frota sintética')
+    parser.add_argument('--max-processos', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--linhas-por-lote', type=int, default=LINHAS_POR_LOTE_PADRAO)
+    parser.add_argument('--compilado', action='store_true', help='Usa o sistema de risco compilado (tabela)')
+    parser.add_argument('--saida-json', help='Grava os resultados do benchmark neste arquivo')
+    args = parser.parse_args(argv)
+
+    print(f"Benchmark: {args.linhas:,} ativos, 1 a {args.max_processos} processo(s)")
+    linhas = scaling_benchmark(args.linhas, args.max_processos, args.linhas_por_lote, compiled=args.compilado)
+    if args.saida_json:
+        with open(args.saida_json, 'w', encoding='utf-8') as f:
+            json.dump({'linhas': args.linhas, 'resultados': linhas}, f, indent=2)
+        print(f"-> Resultados salvos em: '{args.saida_json}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+Medição de tempo por etapa, para ligar em execuções reais e ver onde o tempo vai.
+
+As etapas do pipeline (leitura, avaliação fuzzy, gravação, gráficos, classificação,
+treino do CTGAN...) são marcadas com `stage`:
+
+    from analise_risco import perfil
+
+    with perfil.stage('fuzzy.hi'):
+        ...
+
+Desligado (o padrão), `stage` devolve um contexto vazio e o custo é desprezível.
+Ligado, cada etapa acumula chamadas, tempo de relógio, tempo de CPU e o pico de
+memória do processo (NaN no Windows, onde não há o módulo `resource`). Etapas
+aninhadas aparecem com o caminho completo (`pontuacao.calculo/fuzzy.hi`). Etapas que rodam em processos de um pool são
+contadas só dentro da etapa que as disparou.
+
+Para ligar sem mudar o código, use a variável de ambiente `ANALISE_RISCO_PERFIL`:
+- `1`: imprime o resumo ao final da execução;
+- um caminho `.json`: imprime e também grava o resumo nesse arquivo.
+Com `ANALISE_RISCO_PERFIL_CPROFILE=<pasta>`, as etapas de primeiro nível também
+são perfiladas com o cProfile (um `.prof` por etapa, para o `snakeviz` ou o `pstats`).
+
+    ANALISE_RISCO_PERFIL=perfil.json python -m analise_risco.pontuacao hi.csv fc.csv saida.parquet
+"""
+import atexit
+import contextlib
+import cProfile
+import functools
+import json
+import multiprocessing
+import math
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+VARIAVEL_AMBIENTE = 'ANALISE_RISCO_PERFIL'
+VARIAVEL_CPROFILE = 'ANALISE_RISCO_PERFIL_CPROFILE'
+
+_ativo = False
+_trava = threading.Lock()
+_etapas = {}
+_pilhas = threading.local()
+_perfis = {}
+_config = {'saida': None, 'pasta_cprofile': None}
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo, em MB (NaN onde não há o módulo `resource`)."""
+    if resource is None:
+        return math.nan
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS em bytes
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+def enabled():
+    return _ativo
+
+
+def enable(output=None, cprofile_dir=None):
+    """Liga a medição. `output`: JSON gravado ao final; `cprofile_dir`: pasta dos `.prof` por etapa."""
+    global _ativo
+    _config.update(saida=output, pasta_cprofile=cprofile_dir)
+    _ativo = True
+
+
+def disable():
+    global _ativo
+    _ativo = False
+
+
+def reset():
+    """Descarta as medições acumuladas."""
+    with _trava:
+        _etapas.clear()
+        _perfis.clear()
+
+
+class _Etapa:
+    __slots__ = ('nome', 'inicio', 'inicio_cpu', 'perfil')
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __enter__(self):
+        pilha = getattr(_pilhas, 'pilha', None)
+        if pilha is None:
+            pilha = _pilhas.pilha = []
+        pilha.append(self.nome)
+        self.perfil = None
+        if _config['pasta_cprofile'] and len(pilha) == 1 and threading.current_thread() is threading.main_thread():
+            with _trava:
+                self.perfil = _perfis.setdefault(self.nome, cProfile.Profile())
+            self.perfil.enable()
+        self.inicio_cpu = time.process_time()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        segundos = time.perf_counter() - self.inicio
+        cpu = time.process_time() - self.inicio_cpu
+        if self.perfil is not None:
+            self.perfil.disable()
+        pilha = _pilhas.pilha
+        caminho = '/'.join(pilha)
+        pilha.pop()
+        pico = peak_rss_mb()
+        with _trava:
+            item = _etapas.get(caminho)
+            if item is None:
+                item = _etapas[caminho] = {'chamadas': 0, 'segundos': 0.0, 'segundos_max': 0.0, 'cpu_s': 0.0,
+                                           'pico_memoria_mb': 0.0}
+            item['chamadas'] += 1
+            item['segundos'] += segundos
+            item['segundos_max'] = max(item['segundos_max'], segundos)
+            item['cpu_s'] += cpu
+            item['pico_memoria_mb'] = pico if math.isnan(pico) else max(item['pico_memoria_mb'], pico)
+        return False
+
+
+_NULO = contextlib.nullcontext()
+
+
+def stage(nome):
+    """Contexto que mede a etapa `nome` (vazio se a medição estiver desligada)."""
+    return _Etapa(nome) if _ativo else _NULO
+
+
+def profiled(nome):
+    """Decorador: mede cada chamada da função como a etapa `nome`."""
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def medida(*args, **kwargs):
+            if not _ativo:
+                return funcao(*args, **kwargs)
+            with _Etapa(nome):
+                return funcao(*args, **kwargs)
+        return medida
+    return decorador
+
+
+def iterate(nome, iteravel):
+    """Itera sobre `iteravel` medindo cada `next` como a etapa `nome` (leituras em blocos, por exemplo)."""
+    iterador = iter(iteravel)
+    while True:
+        with stage(nome):
+            try:
+                item = next(iterador)
+            except StopIteration:
+                return
+        yield item
+
+
+def summary():
+    """Medições acumuladas, da etapa mais demorada para a mais rápida."""
+    with _trava:
+        itens = [{'etapa': caminho, **item} for caminho, item in _etapas.items()]
+    for item in itens:
+        item['segundos_medio'] = item['segundos'] / item['chamadas']
+    return sorted(itens, key=lambda item: -item['segundos'])
+
+
+def print_summary(file=None):
+    itens = summary()
+    file = sys.stderr if file is None else file
+    if not itens:
+        return
+    largura = max(len(item['etapa']) for item in itens)
+    print("\n--- Perfil por etapa ---", file=file)
+    print(f"{'Etapa':<{largura}}  {'Chamadas':>9}  {'Total (s)':>10}  {'Máx. (s)':>9}  {'CPU (s)':>9}  "
+          f"{'Pico (MB)':>10}", file=file)
+    for item in itens:
+        print(f"{item['etapa']:<{largura}}  {item['chamadas']:>9,}  {item['segundos']:>10.3f}  "
+              f"{item['segundos_max']:>9.3f}  {item['cpu_s']:>9.3f}  {item['pico_memoria_mb']:>10,.0f}", file=file)
+
+
+def save(path):
+    """Grava o resumo em JSON (e os `.prof` do cProfile, se ligado)."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'processo': os.getpid(), 'etapas': summary()}, f, indent=2, ensure_ascii=False)
+    save_cprofile()
+
+
+def save_cprofile():
+    pasta = _config['pasta_cprofile']
+    if not pasta:
+        return
+    os.makedirs(pasta, exist_ok=True)
+    with _trava:
+        perfis = dict(_perfis)
+    for nome, perfil in perfis.items():
+        perfil.dump_stats(os.path.join(pasta, f"{nome.replace('/', '_')}.prof"))
+
+
+def _ao_sair():
+    if not _ativo:
+        return
+    print_summary()
+    if _config['saida']:
+        save(_config['saida'])
+    else:
+        save_cprofile()
+
+
+def _configurar_pelo_ambiente():
+    valor = os.environ.get(VARIAVEL_AMBIENTE, '').strip()
+    # Processos de pools herdam a variável, mas só o processo principal mede e grava
+    if not valor or valor == '0' or multiprocessing.parent_process() is not None:
+        return
+    enable(valor if valor.lower().endswith('.json') else None, os.environ.get(VARIAVEL_CPROFILE) or None)
+    atexit.register(_ao_sair)
+
+
+_configurar_pelo_ambiente()
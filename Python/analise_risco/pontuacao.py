@@ -0,0 +1,330 @@
+"""
+Pontuação da frota em fluxo contínuo (streaming), para CSVs maiores que a memória.
+
+Lê arquivos no formato de `Dados Fis HI.csv` e `Dados Fis FC.csv` em blocos de
+tamanho fixo, junta as linhas de HI e FC pelo identificador `No.`, calcula HI,
+Idade, FC e RI de cada bloco e grava o resultado incrementalmente em CSV ou
+Parquet. O pico de memória depende do tamanho do bloco, não do arquivo.
+
+Duas estratégias de junção:
+- `ordered` (padrão): junção em fluxo que guarda apenas as linhas ainda sem par.
+  Ideal para exportações em que os dois arquivos seguem a mesma ordem de ativos;
+  a memória cresce só com o desalinhamento entre eles.
+- `partitioned`: particiona os dois arquivos por hash de `No.` em arquivos
+  temporários e junta partição a partição. Funciona para qualquer ordem, mas
+  cada partição é carregada inteira: a memória cresce com o tamanho dos arquivos
+  dividido por `num_partitions` (aumente `--particoes` para arquivos maiores).
+
+Como no MATLAB, as entradas do FC são reescaladas com o mínimo e o máximo de
+cada coluna do arquivo inteiro; esses valores são calculados em uma primeira
+passada (ou lidos de um JSON com `--estatisticas-fc`).
+
+Exportações reais do FC, só com as 6 colunas originais, são aceitas com
+`--aumentar-fc`: cada bloco recebe `Condicao_Corta_Chama` e
+`Nivel_Reservatorio_Oleo` (`analise_risco.aumento`) antes de ser pontuado.
+
+Uso:
+    python -m analise_risco.pontuacao "Dados Fis HI.csv" "Dados Fis FC.csv" resultado.parquet
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from analise_risco import perfil
+from analise_risco.perfil import peak_rss_mb
+from analise_risco.aumento import augmentation_stats, iter_augmented
+from analise_risco.dados import LINHAS_POR_BLOCO_PADRAO, iter_table
+from analise_risco.fis import TAMANHO_BLOCO_PADRAO
+from analise_risco.indices import COLUNAS_RESULTADO, caminho_matlab, load_systems, score_arrays
+
+# Número de colunas de entrada (após `No.`) de cada sistema
+NUM_ENTRADAS_HI = 6
+NUM_ENTRADAS_FC = 8
+
+
+# --- 1. LEITURA EM BLOCOS ---
+# Os arquivos de entrada são lidos por `analise_risco.dados.iter_table`: CSV (diretamente, ou
+# pela cópia em Parquet de `cache_dados/` se ele já foi convertido) ou Parquet.
+
+def _validar_colunas(bloco, num_entradas, nome):
+    if bloco.shape[1] < num_entradas + 1:
+        raise ValueError(
+            f"O arquivo de {nome} deve ter a coluna 'No.' seguida de {num_entradas} colunas de entrada; "
+            f"foram encontradas {bloco.shape[1] - 1}."
+        )
+
+
+def fc_augmentation(fc_path, chunk_size=LINHAS_POR_BLOCO_PADRAO, seed=0):
+    """Parâmetros do aumento do FC (estatísticas das 6 colunas originais e semente) para `augmentation`."""
+    return {'stats': augmentation_stats(fc_path, chunk_size), 'seed': seed}
+
+
+def _iter_fc(fc_path, chunk_size, augmentation):
+    """Blocos do FC; com `augmentation`, já com as duas colunas aumentadas."""
+    if augmentation is None:
+        return iter_table(fc_path, chunk_size)
+    return iter_augmented(fc_path, chunk_size, augmentation['stats'], augmentation['seed'])
+
+
+def fc_column_stats(fc_path, chunk_size=LINHAS_POR_BLOCO_PADRAO, augmentation=None):
+    """Mínimo e máximo de cada coluna de entrada do FC, calculados em uma passada em fluxo."""
+    mins = maxs = None
+    for bloco in _iter_fc(fc_path, chunk_size, augmentation):
+        _validar_colunas(bloco, NUM_ENTRADAS_FC, 'FC')
+        valores = bloco.iloc[:, 1:NUM_ENTRADAS_FC + 1].to_numpy(dtype=float)
+        if len(valores) == 0:
+            continue
+        bloco_min, bloco_max = np.nanmin(valores, axis=0), np.nanmax(valores, axis=0)
+        mins = bloco_min if mins is None else np.fmin(mins, bloco_min)
+        maxs = bloco_max if maxs is None else np.fmax(maxs, bloco_max)
+    if mins is None:
+        raise ValueError(f"O arquivo de FC '{fc_path}' não contém linhas.")
+    return {'mins': mins.tolist(), 'maxs': maxs.tolist()}
+
+
+# --- 2. GRAVAÇÃO INCREMENTAL ---
+
+class ResultWriter:
+    """
+    Grava blocos de resultado em CSV ou Parquet (escolhido pela extensão do arquivo).
+
+    `columns` são as colunas do cabeçalho de um CSV sem nenhum bloco gravado; sem
+    elas, o esquema é desconhecido e nada é gravado.
+    """
+
+    def __init__(self, path, columns=None):
+        self.path = path
+        self.columns = columns
+        self.formato = 'parquet' if path.lower().endswith(('.parquet', '.pq')) else 'csv'
+        self._parquet = None
+        self._primeiro = True
+
+    def write(self, df):
+        if self.formato == 'csv':
+            df.to_csv(self.path, mode='w' if self._primeiro else 'a', header=self._primeiro,
+                      index=False, encoding='utf-8-sig' if self._primeiro else 'utf-8')
+        else:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise ImportError("A saída em Parquet requer a biblioteca 'pyarrow' (pip install pyarrow).") from e
+            tabela = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, tabela.schema)
+            self._parquet.write_table(tabela)
+        self._primeiro = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        elif self._primeiro and self.formato == 'csv' and self.columns is not None:
+            # Nenhum bloco gravado: ainda assim deixa um CSV só com o cabeçalho
+            pd.DataFrame(columns=self.columns).to_csv(self.path, index=False, encoding='utf-8-sig')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- 3. JUNÇÃO E CÁLCULO ---
+
+def _pontuar(juntos, systems, fc_stats, chunk_size):
+    """Calcula os índices de um bloco já juntado (colunas de HI seguidas das de FC)."""
+    hi_inputs = juntos.iloc[:, 1:NUM_ENTRADAS_HI + 1].to_numpy(dtype=float)
+    fc_inputs = juntos.iloc[:, NUM_ENTRADAS_HI + 1:NUM_ENTRADAS_HI + NUM_ENTRADAS_FC + 1].to_numpy(dtype=float)
+    indices = score_arrays(hi_inputs, fc_inputs, systems, fc_stats['mins'], fc_stats['maxs'], chunk_size)
+    return pd.DataFrame({'No.': juntos['No.'].to_numpy(), **indices})[COLUNAS_RESULTADO]
+
+
+def _juntar(hi, fc):
+    """Junção interna por `No.`, mantendo as entradas de HI antes das de FC."""
+    hi = hi.iloc[:, :NUM_ENTRADAS_HI + 1].set_axis(['No.'] + [f'hi_{i}' for i in range(NUM_ENTRADAS_HI)], axis=1)
+    fc = fc.iloc[:, :NUM_ENTRADAS_FC + 1].set_axis(['No.'] + [f'fc_{i}' for i in range(NUM_ENTRADAS_FC)], axis=1)
+    return hi.merge(fc, on='No.', how='inner', sort=False)
+
+
+def _blocos_ordenados(hi_path, fc_path, chunk_size, estatisticas, augmentation):
+    """Junção em fluxo: lê os dois arquivos em paralelo e guarda só as linhas ainda sem par."""
+    pendentes_hi = pendentes_fc = None
+    blocos_hi, blocos_fc = iter_table(hi_path, chunk_size), _iter_fc(fc_path, chunk_size, augmentation)
+    while True:
+        bloco_hi, bloco_fc = next(blocos_hi, None), next(blocos_fc, None)
+        if bloco_hi is None and bloco_fc is None:
+            break
+        if bloco_hi is not None:
+            _validar_colunas(bloco_hi, NUM_ENTRADAS_HI, 'HI')
+            pendentes_hi = bloco_hi if pendentes_hi is None else pd.concat([pendentes_hi, bloco_hi], ignore_index=True)
+        if bloco_fc is not None:
+            _validar_colunas(bloco_fc, NUM_ENTRADAS_FC, 'FC')
+            pendentes_fc = bloco_fc if pendentes_fc is None else pd.concat([pendentes_fc, bloco_fc], ignore_index=True)
+        if pendentes_hi is None or pendentes_fc is None:
+            continue
+        juntos = _juntar(pendentes_hi, pendentes_fc)
+        pendentes_hi = pendentes_hi[~pendentes_hi['No.'].isin(juntos['No.'])]
+        pendentes_fc = pendentes_fc[~pendentes_fc['No.'].isin(juntos['No.'])]
+        estatisticas['pendentes_max'] = max(estatisticas['pendentes_max'], len(pendentes_hi) + len(pendentes_fc))
+        if len(juntos):
+            yield juntos
+    estatisticas['sem_par_hi'] = 0 if pendentes_hi is None else len(pendentes_hi)
+    estatisticas['sem_par_fc'] = 0 if pendentes_fc is None else len(pendentes_fc)
+
+
+def _particao(ids, num_partitions):
+    return pd.util.hash_pandas_object(ids, index=False).to_numpy() % num_partitions
+
+
+def _blocos_particionados(hi_path, fc_path, chunk_size, estatisticas, num_partitions, augmentation):
+    """
+    Junção por partições de hash gravadas em disco, para qualquer ordem.
+
+    Cada partição é lida inteira, então a memória cresce com o tamanho dos arquivos
+    dividido por `num_partitions`. O `No.` é relido com o tipo do arquivo de origem,
+    para que identificadores como '000000018' saiam iguais aos da junção `ordered`.
+    """
+    temporario = tempfile.mkdtemp(prefix='pontuacao_')
+    tipos = {}
+    try:
+        leitores = [('hi', iter_table(hi_path, chunk_size), NUM_ENTRADAS_HI),
+                    ('fc', _iter_fc(fc_path, chunk_size, augmentation), NUM_ENTRADAS_FC)]
+        for nome, blocos, num_entradas in leitores:
+            for bloco in blocos:
+                _validar_colunas(bloco, num_entradas, nome.upper())
+                tipos.setdefault(nome, bloco['No.'].dtype)
+                particoes = _particao(bloco['No.'], num_partitions)
+                for p, parte in bloco.groupby(particoes, sort=False):
+                    destino = os.path.join(temporario, f'{nome}_{p}.csv')
+                    parte.to_csv(destino, mode='a', header=not os.path.exists(destino), index=False)
+        for p in range(num_partitions):
+            caminho_hi = os.path.join(temporario, f'hi_{p}.csv')
+            caminho_fc = os.path.join(temporario, f'fc_{p}.csv')
+            hi = pd.read_csv(caminho_hi, dtype={'No.': tipos['hi']}) if os.path.exists(caminho_hi) else None
+            fc = pd.read_csv(caminho_fc, dtype={'No.': tipos['fc']}) if os.path.exists(caminho_fc) else None
+            if hi is None or fc is None:
+                estatisticas['sem_par_hi'] += 0 if hi is None else len(hi)
+                estatisticas['sem_par_fc'] += 0 if fc is None else len(fc)
+                continue
+            juntos = _juntar(hi, fc)
+            estatisticas['sem_par_hi'] += int((~hi['No.'].isin(juntos['No.'])).sum())
+            estatisticas['sem_par_fc'] += int((~fc['No.'].isin(juntos['No.'])).sum())
+            for inicio in range(0, len(juntos), chunk_size):
+                yield juntos.iloc[inicio:inicio + chunk_size]
+    finally:
+        shutil.rmtree(temporario, ignore_errors=True)
+
+
+def iter_joined(hi_path, fc_path, chunk_size=LINHAS_POR_BLOCO_PADRAO, join='ordered', num_partitions=64,
+                estatisticas=None, augmentation=None):
+    """
+    Itera sobre blocos já juntados por `No.`: coluna `No.`, 6 entradas de HI e 8 de FC.
+
+    `estatisticas`, se informado, recebe a contagem de linhas sem par em cada arquivo.
+    `augmentation` (ver `fc_augmentation`) completa um FC de 6 colunas com as duas
+    colunas aumentadas.
+    """
+    if join not in ('ordered', 'partitioned'):
+        raise ValueError(f"Estratégia de junção inválida: '{join}'. Use 'ordered' ou 'partitioned'.")
+    estatisticas = {'pendentes_max': 0, 'sem_par_hi': 0, 'sem_par_fc': 0} if estatisticas is None else estatisticas
+    if join == 'ordered':
+        return _blocos_ordenados(hi_path, fc_path, chunk_size, estatisticas, augmentation)
+    return _blocos_particionados(hi_path, fc_path, chunk_size, estatisticas, num_partitions, augmentation)
+
+
+def score_files(hi_path, fc_path, output_path, chunk_size=LINHAS_POR_BLOCO_PADRAO, join='ordered',
+                num_partitions=64, fc_stats=None, systems=None, verbose=True, augmentation=None):
+    """
+    Pontua os arquivos de HI e FC em fluxo e grava o resultado em `output_path`.
+
+    `fc_stats` precisa ter sido calculado com o mesmo `augmentation` (e o mesmo
+    `chunk_size`, que define o ruído de cada bloco aumentado).
+
+    Retorna um dicionário com linhas processadas, tempo, linhas/s, pico de memória
+    e a quantidade de linhas sem par em cada arquivo.
+    """
+    systems = load_systems() if systems is None else systems
+    inicio = time.perf_counter()
+    estatisticas = {'linhas': 0, 'pendentes_max': 0, 'sem_par_hi': 0, 'sem_par_fc': 0}
+    blocos = perfil.iterate('pontuacao.leitura', iter_joined(hi_path, fc_path, chunk_size, join, num_partitions,
+                                                            estatisticas, augmentation))
+    fc_stats = fc_column_stats(fc_path, chunk_size, augmentation) if fc_stats is None else fc_stats
+    bloco_fis = min(chunk_size, TAMANHO_BLOCO_PADRAO)
+    with ResultWriter(output_path, COLUNAS_RESULTADO) as escritor:
+        for juntos in blocos:
+            with perfil.stage('pontuacao.calculo'):
+                resultado = _pontuar(juntos, systems, fc_stats, bloco_fis)
+            with perfil.stage('pontuacao.gravacao'):
+                escritor.write(resultado)
+            estatisticas['linhas'] += len(juntos)
+            if verbose:
+                decorrido = time.perf_counter() - inicio
+                print(f" → {estatisticas['linhas']:>12,} linhas | {estatisticas['linhas'] / decorrido:>10,.0f} linhas/s "
+                      f"| pico de memória {peak_rss_mb():,.0f} MB")
+    decorrido = time.perf_counter() - inicio
+    estatisticas.update({
+        'segundos': decorrido,
+        'linhas_por_segundo': estatisticas['linhas'] / decorrido if decorrido > 0 else 0.0,
+        'pico_memoria_mb': peak_rss_mb(),
+    })
+    return estatisticas
+
+
+# --- 4. LINHA DE COMANDO ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Pontua a frota (HI, Idade, FC, RI) em fluxo, bloco a bloco.')
+    parser.add_argument('hi', help="CSV no formato de 'Dados Fis HI.csv'")
+    parser.add_argument('fc', help="CSV no formato de 'Dados Fis FC.csv' (8 colunas de entrada, ou 6 com --aumentar-fc)")
+    parser.add_argument('saida', help='Arquivo de resultado (.csv ou .parquet)')
+    parser.add_argument('--linhas-por-bloco', type=int, default=LINHAS_POR_BLOCO_PADRAO)
+    parser.add_argument('--juncao', choices=['ordered', 'partitioned'], default='ordered',
+                        help="'ordered' para arquivos na mesma ordem de ativos; 'partitioned' para qualquer ordem")
+    parser.add_argument('--particoes', type=int, default=64, help='Número de partições no modo partitioned')
+    parser.add_argument('--estatisticas-fc', help='JSON com mins/maxs das colunas do FC; criado se não existir')
+    parser.add_argument('--fis', default=caminho_matlab, help='Pasta com os arquivos .fis')
+    parser.add_argument('--compilado', action='store_true', help='Usa o sistema de risco compilado (tabela)')
+    parser.add_argument('--aumentar-fc', action='store_true',
+                        help='Completa um FC de 6 colunas com Condicao_Corta_Chama e Nivel_Reservatorio_Oleo')
+    parser.add_argument('--semente-aumento', type=int, default=0, help='Semente do ruído do aumento do FC')
+    args = parser.parse_args(argv)
+
+    # O ruído do aumento depende da semente e do tamanho do bloco: estatísticas gravadas com outros
+    # parâmetros (ou sem aumento) não valem para esta execução e são recalculadas
+    parametros_aumento = ({'semente': args.semente_aumento, 'linhas_por_bloco': args.linhas_por_bloco}
+                          if args.aumentar_fc else None)
+    fc_stats = augmentation = None
+    if args.estatisticas_fc and os.path.exists(args.estatisticas_fc):
+        with open(args.estatisticas_fc, encoding='utf-8') as f:
+            fc_stats = json.load(f)
+        if fc_stats.get('parametros_aumento') != parametros_aumento:
+            print(f"Atenção: '{args.estatisticas_fc}' foi calculado com outros parâmetros de aumento; recalculando.")
+            fc_stats = None
+    if args.aumentar_fc:
+        augmentation = ({'stats': fc_stats['aumento'], 'seed': args.semente_aumento} if fc_stats is not None
+                        else fc_augmentation(args.fc, args.linhas_por_bloco, args.semente_aumento))
+    if args.estatisticas_fc and fc_stats is None:
+        fc_stats = fc_column_stats(args.fc, args.linhas_por_bloco, augmentation)
+        fc_stats['parametros_aumento'] = parametros_aumento
+        if augmentation is not None:
+            fc_stats['aumento'] = augmentation['stats']
+        with open(args.estatisticas_fc, 'w', encoding='utf-8') as f:
+            json.dump(fc_stats, f, indent=2)
+
+    print(f"Pontuando '{args.hi}' + '{args.fc}' → '{args.saida}'")
+    resultado = score_files(args.hi, args.fc, args.saida, args.linhas_por_bloco, args.juncao, args.particoes,
+                            fc_stats, load_systems(args.fis, compiled=args.compilado), augmentation=augmentation)
+    print(f"\n✓ {resultado['linhas']:,} ativos pontuados em {resultado['segundos']:.1f} s "
+          f"({resultado['linhas_por_segundo']:,.0f} linhas/s, pico de memória {resultado['pico_memoria_mb']:,.0f} MB)")
+    if resultado['sem_par_hi'] or resultado['sem_par_fc']:
+        print(f"Atenção: {resultado['sem_par_hi']} linhas de HI e {resultado['sem_par_fc']} de FC ficaram sem par em 'No.'.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""
+Relatório de risco da frota: a análise de `Cenario_BR.m` como funções importáveis.
+
+- `score_fleet`: HI, Idade, FC, RI e categoria de risco de cada ativo
+  (`calculate_indices` do MATLAB);
+- `categorize`: categorias Baixo/Moderado/Alto/Crítico do RI, com as mesmas faixas
+  e regras de borda do `discretize` do MATLAB;
+- `pareto`: análise de Pareto da contribuição de cada ativo (RI^3) para o risco da
+  frota e a fração de ativos que concentra 80% dele (figura 9);
+- `decision_quadrants`: quadrantes de decisão HI x FC, separados pelas médias (figura 14).
+
+O módulo só depende de NumPy, pandas e do motor fuzzy. Importá-lo não carrega
+torch, sdv, scikit-learn, SciPy nem bibliotecas de gráficos.
+
+Uso:
+    python -m analise_risco.relatorio Dados_HI_Sinteticos_Final.csv Dados_FC_Sinteticos_Final.csv \\
+        --saida relatorio_risco.csv
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from analise_risco.fis import TAMANHO_BLOCO_PADRAO
+from analise_risco.indices import caminho_matlab, calculate_indices, load_systems
+
+# Faixas do RI e nomes das categorias (`discretize` em Cenario_BR.m)
+LIMITES_RISCO = (0.0, 0.25, 0.5, 0.75, 1.0)
+CATEGORIAS_RISCO = ('Baixo', 'Moderado', 'Alto', 'Crítico')
+
+# Quadrantes da figura 14 e a ação recomendada em cada um
+QUADRANTES = {
+    'Risco Crítico': 'Ação Imediata',                # HI e FC acima das médias
+    'Risco de Consequência': 'Manutenção Preditiva',  # só o FC acima da média
+    'Risco de Condição': 'Planejar Reforma',          # só o HI acima da média
+    'Baixa Prioridade': 'Monitoramento Padrão',       # HI e FC abaixo das médias
+}
+
+# Expoente da contribuição individual e fração do risco acumulado destacada no Pareto
+EXPOENTE_PARETO = 3
+LIMIAR_PARETO = 80.0
+
+
+def _tabela(dados):
+    if isinstance(dados, pd.DataFrame):
+        return dados
+    from analise_risco.dados import load_table
+
+    return load_table(dados)
+
+
+def categorize(ri, bins=LIMITES_RISCO, labels=CATEGORIAS_RISCO, drop_unused=True):
+    """
+    Categoria de risco de cada valor de `ri`, como `discretize(ri, bins, 'categorical', labels)`.
+
+    As faixas são fechadas à esquerda, e a última também à direita. Valores fora de
+    [bins[0], bins[-1]] ou NaN ficam sem categoria. Com `drop_unused` (padrão), as
+    categorias que não aparecem são removidas, como o `removecats` do MATLAB.
+    Retorna um `pd.Categorical` ordenado, ou uma Series com o mesmo índice de `ri`.
+    """
+    bins = np.asarray(bins, dtype=float)
+    if len(labels) != len(bins) - 1:
+        raise ValueError(f"São necessários {len(bins) - 1} rótulos para {len(bins)} limites; recebidos {len(labels)}.")
+    valores = np.asarray(ri, dtype=float)
+    codigos = np.searchsorted(bins, valores, side='right') - 1
+    codigos[valores == bins[-1]] = len(labels) - 1
+    codigos[~((valores >= bins[0]) & (valores <= bins[-1]))] = -1
+    categorias = pd.Categorical.from_codes(codigos, categories=list(labels), ordered=True)
+    if drop_unused:
+        categorias = categorias.remove_unused_categories()
+    if isinstance(ri, pd.Series):
+        return pd.Series(categorias, index=ri.index, name='Categoria')
+    return categorias
+
+
+def score_fleet(hi, fc, directory=caminho_matlab, systems=None, compiled=False, chunk_size=TAMANHO_BLOCO_PADRAO):
+    """
+    Pontua a frota: HI, Idade, FC, RI e categoria de risco de cada ativo.
+
+    `hi` e `fc` são DataFrames ou caminhos de CSV/Parquet no formato dos arquivos
+    sintéticos, alinhados por posição como no MATLAB. `systems` evita recarregar os
+    .fis de `directory`; `compiled=True` usa o sistema de risco compilado. Retorna um
+    DataFrame com `No.`, `HI`, `Idade`, `FC`, `RI` e `Categoria`. Para frotas maiores
+    que a memória, veja `analise_risco.pontuacao`.
+    """
+    systems = systems or load_systems(directory, compiled=compiled)
+    resultado = calculate_indices(_tabela(hi), _tabela(fc), systems, chunk_size)
+    resultado['Categoria'] = categorize(resultado['RI'])
+    return resultado
+
+
+def pareto(ri, ids=None, exponent=EXPOENTE_PARETO, threshold=LIMIAR_PARETO):
+    """
+    Análise de Pareto do risco da frota (figura 9 de Cenario_BR.m).
+
+    Os ativos são ordenados pela contribuição individual `ri ** exponent` (do maior
+    para o menor, com empates na ordem original). Retorna um dicionário com:
+    - `tabela`: DataFrame com `No.`, `Contribuicao`, `Risco_Acumulado_Pct` e `Ativos_Pct`;
+    - `percentual_ativos`: menor percentual de ativos que acumula `threshold`% do risco
+      (None se a frota não tiver risco);
+    - `num_ativos`: quantos ativos são esse percentual.
+    """
+    valores = np.asarray(ri, dtype=float)
+    ids = np.arange(1, len(valores) + 1) if ids is None else np.asarray(ids)
+    contribuicao = valores ** exponent
+    ordem = np.argsort(-contribuicao, kind='stable')
+    contribuicao = contribuicao[ordem]
+    total = contribuicao.sum()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        acumulado = np.cumsum(contribuicao) / total * 100
+    ativos_pct = np.arange(1, len(valores) + 1) / max(len(valores), 1) * 100
+    tabela = pd.DataFrame({
+        'No.': ids[ordem],
+        'Contribuicao': contribuicao,
+        'Risco_Acumulado_Pct': acumulado,
+        'Ativos_Pct': ativos_pct,
+    })
+
+    atingiu = np.flatnonzero(acumulado >= threshold)
+    return {
+        'tabela': tabela,
+        'percentual_ativos': float(ativos_pct[atingiu[0]]) if len(atingiu) else None,
+        'num_ativos': int(atingiu[0] + 1) if len(atingiu) else None,
+    }
+
+
+def decision_quadrants(hi, fc, hi_threshold=None, fc_threshold=None):
+    """
+    Quadrante de decisão de cada ativo no plano HI x FC (figura 14 de Cenario_BR.m).
+
+    Os limiares são, por padrão, as médias de HI e de FC da própria frota, como no
+    MATLAB. Um valor igual ao limiar conta como acima dele. Retorna um dicionário com:
+    - `quadrantes`: DataFrame com `Quadrante` e `Acao` (índice de `hi`, se for Series);
+    - `limiar_hi` e `limiar_fc`;
+    - `contagem`: ativos em cada quadrante.
+    """
+    hi_valores, fc_valores = np.asarray(hi, dtype=float), np.asarray(fc, dtype=float)
+    hi_threshold = float(np.nanmean(hi_valores)) if hi_threshold is None else float(hi_threshold)
+    fc_threshold = float(np.nanmean(fc_valores)) if fc_threshold is None else float(fc_threshold)
+
+    hi_alto, fc_alto = hi_valores >= hi_threshold, fc_valores >= fc_threshold
+    nomes = list(QUADRANTES)
+    # Índices em QUADRANTES: crítico, consequência, condição, baixa prioridade
+    codigos = np.select([hi_alto & fc_alto, fc_alto, hi_alto], [0, 1, 2], default=3)
+    codigos[np.isnan(hi_valores) | np.isnan(fc_valores)] = -1
+    quadrante = pd.Categorical.from_codes(codigos, categories=nomes)
+    indice = hi.index if isinstance(hi, pd.Series) else None
+    quadrantes = pd.DataFrame({'Quadrante': quadrante, 'Acao': quadrante.rename_categories(QUADRANTES)},
+                              index=indice)
+    return {
+        'quadrantes': quadrantes,
+        'limiar_hi': hi_threshold,
+        'limiar_fc': fc_threshold,
+        'contagem': {nome: int((codigos == k).sum()) for k, nome in enumerate(nomes)},
+    }
+
+
+def fleet_report(hi, fc, directory=caminho_matlab, systems=None, compiled=False):
+    """
+    Relatório completo: a tabela de `score_fleet` com o quadrante e a ação de cada ativo,
+    e um resumo (ativos por categoria, Pareto e quadrantes) pronto para JSON.
+    """
+    tabela = score_fleet(hi, fc, directory, systems, compiled)
+    analise_pareto = pareto(tabela['RI'], tabela['No.'])
+    analise_quadrantes = decision_quadrants(tabela['HI'], tabela['FC'])
+    tabela = tabela.join(analise_quadrantes['quadrantes'])
+    resumo = {
+        'num_ativos': int(len(tabela)),
+        'categorias': {str(k): int(v) for k, v in tabela['Categoria'].value_counts(sort=False).items()},
+        'pareto': {
+            'limiar_pct': LIMIAR_PARETO,
+            'percentual_ativos': analise_pareto['percentual_ativos'],
+            'num_ativos': analise_pareto['num_ativos'],
+        },
+        'quadrantes': {
+            'limiar_hi': analise_quadrantes['limiar_hi'],
+            'limiar_fc': analise_quadrantes['limiar_fc'],
+            'contagem': analise_quadrantes['contagem'],
+        },
+    }
+    return tabela, resumo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Relatório de risco da frota (categorias, Pareto e quadrantes).')
+    parser.add_argument('hi', help="Arquivo de HI (CSV ou Parquet), no formato de 'Dados_HI_Sinteticos_Final.csv'")
+    parser.add_argument('fc', help="Arquivo de FC (CSV ou Parquet), no formato de 'Dados_FC_Sinteticos_Final.csv'")
+    parser.add_argument('--fis', default=caminho_matlab, help='Pasta com os arquivos .fis')
+    parser.add_argument('--compilado', action='store_true', help='Usa o sistema de risco compilado')
+    parser.add_argument('--saida', help='Tabela por ativo (.csv ou .parquet)')
+    parser.add_argument('--saida-json', help='Resumo em JSON')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    tabela, resumo = fleet_report(args.hi, args.fc, args.fis, compiled=args.compilado)
+    print(f"✓ {resumo['num_ativos']:,} ativos analisados em {time.perf_counter() - inicio:.2f} s")
+
+    print("\n--- Categorias de risco ---")
+    for categoria, n in resumo['categorias'].items():
+        print(f"{categoria:<12}{n:>10,}")
+    p = resumo['pareto']
+    if p['percentual_ativos'] is not None:
+        print(f"\n--> Pareto: {p['percentual_ativos']:.1f}% dos ativos ({p['num_ativos']:,}) = "
+              f"{p['limiar_pct']:.0f}% do risco")
+    q = resumo['quadrantes']
+    print(f"\n--- Quadrantes (média HI = {q['limiar_hi']:.3f}, média FC = {q['limiar_fc']:.3f}) ---")
+    for nome, n in q['contagem'].items():
+        print(f"{nome:<24}{QUADRANTES[nome]:<24}{n:>10,}")
+
+    if args.saida:
+        from analise_risco.pontuacao import ResultWriter
+
+        with ResultWriter(args.saida) as escritor:
+            escritor.write(tabela.astype({'Categoria': str, 'Quadrante': str, 'Acao': str}))
+        print(f"\n-> Tabela salva em: '{args.saida}'")
+    if args.saida_json:
+        with open(args.saida_json, 'w', encoding='utf-8') as f:
+            json.dump(resumo, f, indent=2, ensure_ascii=False)
+        print(f"-> Resumo salvo em: '{args.saida_json}'")
+
+
+if __name__ == '__main__':
+    main()
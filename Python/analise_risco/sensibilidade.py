@@ -0,0 +1,316 @@
+"""
+Análise de sensibilidade dos sistemas fuzzy em lote.
+
+Substitui os laços de `generate_figure_12_sensitivity_hi` e
+`generate_figure_13_sensitivity_fc` (Cenario_BR.m), que chamam o `evalfis` uma vez
+por entrada perturbada. Aqui todas as perturbações de um método são montadas em uma
+única matriz e avaliadas de uma vez pelo motor vetorizado:
+- `one_at_a_time`: varredura de cada entrada pela sua faixa com as demais na linha
+  de base; a influência é a amplitude da saída, como nas figuras 12 e 13;
+- `morris`: triagem por efeitos elementares (trajetórias de Morris), com mu* e sigma;
+- `sobol`: índices de Sobol de 1ª ordem e totais, com amostragem de Saltelli
+  (sequência de Sobol embaralhada) e intervalos de confiança por bootstrap.
+
+Os índices são calculados para todas as saídas do sistema na mesma passada. Os
+resultados ficam em cache em `cache_fuzzy/sensibilidade/`, identificados pelo hash
+do .fis, pelo método, pelos parâmetros e pela linha de base.
+
+Uso:
+    python -m analise_risco.sensibilidade fc --metodo sobol --amostras 131072
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from analise_risco.compilado import caminho_cache_padrao
+from analise_risco.indices import caminho_matlab, input_arrays, load_systems, read_table, rescale_columns
+
+caminho_cache_sensibilidade = os.path.join(caminho_cache_padrao, 'sensibilidade')
+
+METODOS = ['oat', 'morris', 'sobol']
+
+
+def _faixas(fis):
+    low = np.array([v.range[0] for v in fis.inputs], dtype=float)
+    high = np.array([v.range[1] for v in fis.inputs], dtype=float)
+    return low, high
+
+
+# --- 1. VARREDURA UM FATOR POR VEZ (FIGURAS 12 E 13) ---
+
+def one_at_a_time(fis, baseline=None, num_points=50):
+    """
+    Varre cada entrada por toda a sua faixa, com as demais fixas na linha de base.
+
+    `baseline` é o ponto de referência (o MATLAB usa a média das entradas da frota);
+    por padrão, o centro da faixa de cada entrada. Retorna `grade` (d, num_points),
+    `curvas` (P, d, num_points) e `influencia` (P, d) = amplitude de cada curva.
+    """
+    low, high = _faixas(fis)
+    d = len(low)
+    baseline = (low + high) / 2 if baseline is None else np.asarray(baseline, dtype=float)
+    grade = np.linspace(low, high, num_points).T
+    lote = np.broadcast_to(baseline, (d, num_points, d)).copy()
+    lote[np.arange(d), :, np.arange(d)] = grade
+    saidas = fis.evaluate(lote.reshape(-1, d))
+    curvas = saidas.T.reshape(-1, d, num_points)
+    return {'grade': grade, 'curvas': curvas, 'influencia': np.ptp(curvas, axis=2)}
+
+
+# --- 2. TRIAGEM DE MORRIS ---
+
+def morris_trajectories(num_inputs, num_trajectories, levels=4, seed=0):
+    """
+    Trajetórias de Morris no cubo unitário, com formato (r, d + 1, d).
+
+    Cada trajetória parte de um ponto da grade de `levels` níveis e muda uma entrada
+    por vez (em ordem aleatória) de +-delta, com delta = levels / (2 (levels - 1)).
+    Retorna também a ordem das entradas e o passo com sinal de cada uma.
+    """
+    if levels < 2 or levels % 2:
+        raise ValueError(f"O número de níveis de Morris deve ser par e >= 2 (recebido: {levels}).")
+    rng = np.random.default_rng(seed)
+    r, d = num_trajectories, num_inputs
+    delta = levels / (2 * (levels - 1))
+    sinais = rng.choice([-1.0, 1.0], size=(r, d))
+    # Passo +delta parte dos níveis baixos; passo -delta, dos altos
+    nivel = rng.integers(0, levels // 2, size=(r, d)) + np.where(sinais < 0, levels // 2, 0)
+    inicio = nivel / (levels - 1)
+    ordem = np.argsort(rng.random((r, d)), axis=1)
+    posicao = np.argsort(ordem, axis=1)
+    # A entrada j já foi alterada no ponto k se a sua posição na ordem é menor que k
+    alterada = posicao[:, None, :] < np.arange(d + 1)[None, :, None]
+    pontos = inicio[:, None, :] + alterada * (sinais * delta)[:, None, :]
+    return pontos, ordem, sinais * delta
+
+
+def morris(fis, num_trajectories=100, levels=4, seed=0):
+    """
+    Efeitos elementares de Morris para todas as saídas, em uma única avaliação.
+
+    Os efeitos são medidos em fração da faixa de cada entrada. Retorna `mu`,
+    `mu_star` (média dos módulos, usada para ordenar as entradas) e `sigma`, cada
+    um com formato (P, d).
+    """
+    low, high = _faixas(fis)
+    d = len(low)
+    pontos, ordem, passos = morris_trajectories(d, num_trajectories, levels, seed)
+    saidas = fis.evaluate((low + pontos * (high - low)).reshape(-1, d))
+    saidas = saidas.reshape(num_trajectories, d + 1, -1)
+    efeitos_por_passo = np.diff(saidas, axis=1) / np.take_along_axis(passos, ordem, axis=1)[:, :, None]
+    # Reordena os efeitos de cada trajetória da ordem dos passos para a ordem das entradas
+    efeitos = np.empty_like(efeitos_por_passo)
+    np.put_along_axis(efeitos, ordem[:, :, None], efeitos_por_passo, axis=1)
+    efeitos = efeitos.transpose(2, 1, 0)
+    return {
+        'mu': efeitos.mean(axis=2),
+        'mu_star': np.abs(efeitos).mean(axis=2),
+        'sigma': efeitos.std(axis=2, ddof=1) if num_trajectories > 1 else np.zeros(efeitos.shape[:2]),
+    }
+
+
+# --- 3. ÍNDICES DE SOBOL (AMOSTRAGEM DE SALTELLI) ---
+
+def saltelli_sample(num_inputs, num_samples, seed=0):
+    """
+    Matrizes A e B (num_samples, d) no cubo unitário a partir de uma sequência de Sobol
+    de dimensão 2d embaralhada. `num_samples` é arredondado para a potência de 2 seguinte,
+    que mantém o balanceamento da sequência.
+    """
+    from scipy.stats import qmc
+
+    m = max(int(np.ceil(np.log2(num_samples))), 1)
+    amostra = qmc.Sobol(2 * num_inputs, scramble=True, seed=seed).random_base2(m)
+    return amostra[:, :num_inputs], amostra[:, num_inputs:]
+
+
+def _indices_sobol(f_a, f_b, f_ab):
+    """S1 (Saltelli 2010) e ST (Jansen) para f_a, f_b (N, P) e f_ab (d, N, P)."""
+    variancia = np.var(np.concatenate([f_a, f_b]), axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        s1 = np.mean(f_b * (f_ab - f_a), axis=1) / variancia
+        st = 0.5 * np.mean((f_a - f_ab) ** 2, axis=1) / variancia
+    # Saída constante (variância nula) não depende de nenhuma entrada
+    return np.nan_to_num(s1).T, np.nan_to_num(st).T
+
+
+def sobol(fis, num_samples=2 ** 14, seed=0, num_resamples=100, confidence=0.95):
+    """
+    Índices de Sobol de 1ª ordem (`S1`) e totais (`ST`) para todas as saídas.
+
+    As N (d + 2) avaliações (A, B e as d matrizes A com a coluna i de B) formam um
+    único lote, avaliado em blocos pelo motor. Os intervalos de confiança (`S1_ic`,
+    `ST_ic`, meia largura) vêm de `num_resamples` reamostragens bootstrap.
+    """
+    low, high = _faixas(fis)
+    d = len(low)
+    a, b = saltelli_sample(d, num_samples, seed)
+    n = len(a)
+    ab = np.broadcast_to(a, (d, n, d)).copy()
+    ab[np.arange(d), :, np.arange(d)] = b.T
+    lote = np.concatenate([a, b, ab.reshape(-1, d)])
+    saidas = fis.evaluate(low + lote * (high - low))
+    f_a, f_b, f_ab = saidas[:n], saidas[n:2 * n], saidas[2 * n:].reshape(d, n, -1)
+    s1, st = _indices_sobol(f_a, f_b, f_ab)
+
+    rng = np.random.default_rng(seed)
+    amostras_s1, amostras_st = [], []
+    for _ in range(num_resamples):
+        idx = rng.integers(0, n, n)
+        r1, rt = _indices_sobol(f_a[idx], f_b[idx], f_ab[:, idx])
+        amostras_s1.append(r1)
+        amostras_st.append(rt)
+    if num_resamples > 1:
+        from scipy.stats import norm
+
+        z = norm.ppf(0.5 + confidence / 2)
+        s1_ic, st_ic = z * np.std(amostras_s1, axis=0, ddof=1), z * np.std(amostras_st, axis=0, ddof=1)
+    else:
+        s1_ic, st_ic = np.full_like(s1, np.nan), np.full_like(st, np.nan)
+    return {'S1': s1, 'ST': st, 'S1_ic': s1_ic, 'ST_ic': st_ic, 'num_avaliacoes': np.array(len(lote))}
+
+
+# --- 4. CACHE DOS RESULTADOS ---
+
+def _chave_cache(fis, metodo, parametros):
+    texto = json.dumps({'fingerprint': fis.fingerprint, 'metodo': metodo, **parametros}, sort_keys=True)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:16]
+
+
+def analyze(fis, method, cache_dir=caminho_cache_sensibilidade, **params):
+    """
+    Executa `method` ('oat', 'morris' ou 'sobol') sobre `fis`, lendo do cache quando possível.
+
+    `params` são repassados à função do método; como fazem parte da chave do cache,
+    a linha de base da varredura OAT também identifica o resultado.
+    """
+    funcoes = {'oat': one_at_a_time, 'morris': morris, 'sobol': sobol}
+    if method not in funcoes:
+        raise ValueError(f"Método de sensibilidade inválido: '{method}'. Use um de {METODOS}.")
+    chave = {k: np.asarray(v).tolist() for k, v in params.items()}
+    caminho = cache_dir and os.path.join(cache_dir, f'{fis.name}_{method}_{_chave_cache(fis, method, chave)}.npz')
+    if caminho and os.path.exists(caminho):
+        with np.load(caminho) as dados:
+            return {k: dados[k] for k in dados.files}
+    resultado = funcoes[method](fis, **params)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f'{caminho}.{os.getpid()}.tmp.npz'
+        np.savez(tmp, **resultado)
+        os.replace(tmp, caminho)
+    return resultado
+
+
+def data_baseline(system, directory=caminho_matlab):
+    """
+    Linha de base das figuras 12 e 13: média das entradas da frota sintética.
+
+    Para o FC usa as entradas já reescaladas, como `data.fc_inputs` no MATLAB.
+    """
+    systems = load_systems(directory)
+    hi_table = read_table(os.path.join(directory, 'Dados_HI_Sinteticos_Final.csv'))
+    fc_table = read_table(os.path.join(directory, 'Dados_FC_Sinteticos_Final.csv'))
+    hi_inputs, fc_inputs = input_arrays(hi_table, fc_table)
+    if system == 'hi':
+        return hi_inputs.mean(axis=0)
+    if system == 'fc':
+        return rescale_columns(fc_inputs, [v.range for v in systems['fc'].inputs]).mean(axis=0)
+    return None
+
+
+# --- 5. RELATÓRIO E FIGURA ---
+
+def plot_sensitivity(fis, resultados, caminho, output=0):
+    """Gráfico de barras por entrada com as medidas de cada método (figuras 12 e 13)."""
+    import matplotlib.pyplot as plt
+
+    medidas = []
+    if 'oat' in resultados:
+        medidas.append(('Amplitude OAT', resultados['oat']['influencia'][output]))
+    if 'morris' in resultados:
+        medidas.append(('Morris mu*', resultados['morris']['mu_star'][output]))
+    if 'sobol' in resultados:
+        medidas.append(('Sobol total (ST)', resultados['sobol']['ST'][output]))
+    nomes = fis.input_names
+    largura = 0.8 / max(len(medidas), 1)
+    fig, ax = plt.subplots(figsize=(10, 5))
+    for k, (rotulo, valores) in enumerate(medidas):
+        ax.bar(np.arange(len(nomes)) + (k - (len(medidas) - 1) / 2) * largura, valores, largura, label=rotulo)
+    ax.set_xticks(np.arange(len(nomes)))
+    ax.set_xticklabels(nomes, rotation=45, ha='right')
+    ax.set_title(f'Sensibilidade: Influência de Cada Variável em {fis.output_names[output]}')
+    ax.legend()
+    ax.grid(True, axis='y', alpha=0.5)
+    fig.tight_layout()
+    fig.savefig(caminho, dpi=150)
+    plt.close(fig)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Análise de sensibilidade em lote dos sistemas fuzzy.')
+    parser.add_argument('sistema', choices=['hi', 'fc', 'risk'])
+    parser.add_argument('--metodo', choices=METODOS + ['todos'], default='todos')
+    parser.add_argument('--pontos', type=int, default=50, help='Pontos por entrada na varredura OAT')
+    parser.add_argument('--trajetorias', type=int, default=200, help='Trajetórias de Morris')
+    parser.add_argument('--niveis', type=int, default=4, help='Níveis da grade de Morris')
+    parser.add_argument('--amostras', type=int, default=2 ** 14, help='Amostras base de Sobol (potência de 2)')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--fis', default=caminho_matlab, help='Pasta com os arquivos .fis e os CSVs sintéticos')
+    parser.add_argument('--sem-cache', action='store_true')
+    parser.add_argument('--saida-json', help='Grava os índices neste arquivo')
+    parser.add_argument('--figura', help='Grava o gráfico de barras (1ª saída) neste arquivo')
+    args = parser.parse_args(argv)
+    if args.figura:
+        # A linha de comando só grava a figura em arquivo; a escolha do backend fica aqui,
+        # e não nas funções de desenho, para não mudar o backend de quem as importa
+        import matplotlib
+        matplotlib.use('Agg')
+
+    fis = load_systems(args.fis)[args.sistema]
+    cache_dir = None if args.sem_cache else caminho_cache_sensibilidade
+    parametros = {
+        'oat': {'baseline': data_baseline(args.sistema, args.fis), 'num_points': args.pontos},
+        'morris': {'num_trajectories': args.trajetorias, 'levels': args.niveis, 'seed': args.semente},
+        'sobol': {'num_samples': args.amostras, 'seed': args.semente},
+    }
+    if parametros['oat']['baseline'] is None:
+        del parametros['oat']['baseline']
+    metodos = METODOS if args.metodo == 'todos' else [args.metodo]
+
+    resultados = {}
+    for metodo in metodos:
+        inicio = time.perf_counter()
+        resultados[metodo] = analyze(fis, metodo, cache_dir, **parametros[metodo])
+        print(f"✓ {metodo.upper():<6} concluído em {time.perf_counter() - inicio:.2f} s")
+
+    for p, saida in enumerate(fis.output_names):
+        print(f"\n--- {saida} ---")
+        print(f"{'Entrada':<28}" + ''.join(f'{c:>12}' for c in ['OAT', 'Morris mu*', 'Sobol S1', 'Sobol ST']))
+        for i, nome in enumerate(fis.input_names):
+            valores = [
+                resultados['oat']['influencia'][p, i] if 'oat' in resultados else np.nan,
+                resultados['morris']['mu_star'][p, i] if 'morris' in resultados else np.nan,
+                resultados['sobol']['S1'][p, i] if 'sobol' in resultados else np.nan,
+                resultados['sobol']['ST'][p, i] if 'sobol' in resultados else np.nan,
+            ]
+            print(f"{nome:<28}" + ''.join(f'{v:>12.4f}' for v in valores))
+
+    if args.saida_json:
+        relatorio = {
+            'sistema': fis.name, 'entradas': fis.input_names, 'saidas': fis.output_names,
+            'resultados': {m: {k: np.asarray(v).tolist() for k, v in r.items()} for m, r in resultados.items()},
+        }
+        with open(args.saida_json, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+        print(f"-> Índices salvos em: '{args.saida_json}'")
+    if args.figura:
+        plot_sensitivity(fis, resultados, args.figura)
+        print(f"-> Figura salva em: '{args.figura}'")
+
+
+if __name__ == '__main__':
+    main()
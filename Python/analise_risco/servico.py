@@ -0,0 +1,585 @@
+"""
+Serviço local de consulta de risco por ativo (HTTP em TCP ou em socket Unix).
+
+Porta a `query_asset_status` de `Analise_especifica.m`, que recalcula a frota inteira
+para responder sobre um único ativo, para um processo de longa duração:
+- os sistemas fuzzy (o de risco compilado) e as entradas da frota ficam em memória,
+  com um índice `No.` -> linha;
+- as estatísticas de referência da frota (mínimos e máximos do `rescale`, médias
+  que separam os quadrantes, distribuições para os rankings) são calculadas uma vez,
+  na partida;
+- as consultas simultâneas são agrupadas em micro-lotes (`MicroBatcher`) e avaliadas
+  de uma vez pelo motor vetorizado, que tem um custo fixo por chamada.
+
+Cada resposta traz HI, Idade, FC, RI, categoria, quadrante, rankings e os fatores
+que mais pesam no RI do ativo: para cada entrada, quanto o RI mudaria se ela
+voltasse à média da frota, com as demais mantidas.
+
+Rotas:
+    GET  /ativo/<No.>[?top=3]        um ativo
+    POST /consulta                   {"ids": [...], "top": 3, "alteracoes": {"DP": 300}}
+    GET  /metricas                   latência p50/p99 e tamanho dos lotes
+    GET  /saude                      estado do serviço
+
+Uso:
+    python -m analise_risco.servico --porta 8765
+    python -m analise_risco.servico --socket /tmp/risco.sock
+    python -m analise_risco.servico --carga 5000 --clientes 16   # teste de carga em localhost
+"""
+import argparse
+import http.client
+import json
+import math
+import numbers
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from analise_risco.dados import MAPA_TRADUCAO, load_table
+from analise_risco.indices import caminho_matlab, caminho_python, input_arrays, load_systems, rescale_columns
+from analise_risco.relatorio import QUADRANTES, categorize
+
+PORTA_PADRAO = 8765
+
+# Limites de um micro-lote: ativos por avaliação e espera extra pelo lote encher. Sem
+# espera, o lote é o que se acumulou na fila durante a avaliação anterior
+ATIVOS_POR_LOTE_PADRAO = 512
+ESPERA_LOTE_PADRAO = 0.0
+
+# Fatores retornados por ativo e latências guardadas para as métricas
+FATORES_PADRAO = 3
+JANELA_METRICAS = 10_000
+
+ARQUIVO_HI_PADRAO = os.path.join(caminho_python, 'Dados_HI_Sinteticos_Final.csv')
+ARQUIVO_FC_PADRAO = os.path.join(caminho_python, 'Dados_FC_Sinteticos_Final.csv')
+
+
+def _chave(asset_id):
+    """Chave do índice: IDs numéricos inteiros viram '123' (vindos de float, int ou texto)."""
+    try:
+        valor = float(asset_id)
+    except (TypeError, ValueError):
+        return str(asset_id).strip()
+    return str(int(valor)) if valor.is_integer() else str(valor)
+
+
+def _nativo(valor):
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+
+def _validar_top(top):
+    if isinstance(top, bool) or not isinstance(top, numbers.Integral) or top < 0:
+        raise ValueError(f"'top' deve ser um inteiro maior ou igual a zero; recebido {top!r}.")
+
+
+def _sem_nan(conteudo):
+    """Troca NaN e infinitos por None (JSON não os aceita)."""
+    if isinstance(conteudo, float):
+        return conteudo if math.isfinite(conteudo) else None
+    if isinstance(conteudo, dict):
+        return {k: _sem_nan(v) for k, v in conteudo.items()}
+    if isinstance(conteudo, (list, tuple)):
+        return [_sem_nan(v) for v in conteudo]
+    return conteudo
+
+
+# --- 1. MODELO RESIDENTE ---
+
+class RiskModel:
+    """
+    Entradas da frota, sistemas fuzzy e estatísticas de referência em memória.
+
+    `query(ids, top, changes)` avalia só os ativos pedidos. `changes` ({coluna: valor},
+    nomes originais ou traduzidos) sobrepõe entradas de todos esses ativos, para
+    simulações; as referências (rescale, médias e rankings) continuam as da frota.
+    """
+
+    def __init__(self, hi_table, fc_table, systems):
+        if len(hi_table) != len(fc_table):
+            raise ValueError(
+                f"As tabelas de HI ({len(hi_table)} linhas) e FC ({len(fc_table)} linhas) devem ter o mesmo tamanho."
+            )
+        self.systems = systems
+        self.ids = hi_table.iloc[:, 0].to_numpy()
+        self.hi_inputs, self.fc_inputs = input_arrays(hi_table, fc_table)
+        self.colunas = [*hi_table.columns[1:7], *fc_table.columns[1:9]]
+        self.num_hi = self.hi_inputs.shape[1]
+        self.indice = {}
+        for linha, asset_id in enumerate(self.ids):
+            self.indice.setdefault(_chave(asset_id), linha)  # Como o MATLAB, vale a primeira ocorrência
+
+        self.faixas_fc = [v.range for v in systems['fc'].inputs]
+        self.fc_mins = np.nanmin(self.fc_inputs, axis=0)
+        self.fc_maxs = np.nanmax(self.fc_inputs, axis=0)
+        self.referencia = np.concatenate([self.hi_inputs.mean(axis=0), self.fc_inputs.mean(axis=0)])
+
+        frota = self._avaliar(self.hi_inputs, self.fc_inputs)
+        self.limiar_hi, self.limiar_fc = float(frota['HI'].mean()), float(frota['FC'].mean())
+        self._ordenados = {nome: np.sort(frota[nome]) for nome in ('HI', 'FC', 'RI')}
+
+    @classmethod
+    def from_files(cls, hi_path=ARQUIVO_HI_PADRAO, fc_path=ARQUIVO_FC_PADRAO, directory=caminho_matlab, compiled=True):
+        return cls(load_table(hi_path), load_table(fc_path), load_systems(directory, compiled=compiled))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _avaliar(self, hi_inputs, fc_inputs):
+        saidas_hi = self.systems['hi'].evaluate(hi_inputs)
+        entradas_fc = rescale_columns(fc_inputs, self.faixas_fc, self.fc_mins, self.fc_maxs)
+        fc = self.systems['fc'].evaluate(entradas_fc)[:, 0]
+        hi = saidas_hi[:, 0]
+        ri = self.systems['risk'].evaluate(np.column_stack([hi, fc]))[:, 0]
+        return {'HI': hi, 'Idade': saidas_hi[:, 1], 'FC': fc, 'RI': ri}
+
+    def _posicao_coluna(self, nome):
+        traducao = {v: k for k, v in MAPA_TRADUCAO.items()}
+        nome = traducao.get(nome, nome)
+        limpos = [str(c).strip() for c in self.colunas]
+        if nome.strip() not in limpos:
+            raise KeyError(f"Coluna desconhecida: '{nome}'")
+        return limpos.index(nome.strip())
+
+    def ranking(self, nome, valores):
+        """Posição de cada valor na frota (1 = pior, isto é, o maior)."""
+        ordenados = self._ordenados[nome]
+        return len(ordenados) - np.searchsorted(ordenados, valores, side='right') + 1
+
+    def validate_changes(self, changes):
+        """
+        Confere `changes` ({coluna: valor}) e retorna uma cópia com os valores em float.
+
+        Levanta `ValueError` se não for um dicionário ou se algum valor não for um
+        número finito, e `KeyError` para colunas desconhecidas.
+        """
+        if changes is None:
+            return {}
+        if not isinstance(changes, dict):
+            raise ValueError("'alteracoes' deve ser um objeto {coluna: valor}.")
+        validas = {}
+        for coluna, valor in changes.items():
+            if isinstance(valor, bool) or not isinstance(valor, numbers.Real) or not math.isfinite(valor):
+                raise ValueError(f"Valor inválido para '{coluna}': {valor!r} (use um número finito).")
+            self._posicao_coluna(str(coluna))
+            validas[str(coluna)] = float(valor)
+        return validas
+
+    def query(self, ids, top=FATORES_PADRAO, changes=None):
+        """
+        Consulta uma lista de ativos e retorna `(resultados, nao_encontrados)`.
+
+        Os ativos e as suas variantes (cada entrada trocada pela média da frota) são
+        avaliados em uma única chamada de cada sistema fuzzy.
+        """
+        _validar_top(top)
+        alteracoes = {self._posicao_coluna(coluna): valor for coluna, valor in self.validate_changes(changes).items()}
+        linhas, nao_encontrados = [], []
+        for asset_id in ids:
+            linha = self.indice.get(_chave(asset_id))
+            if linha is None:
+                nao_encontrados.append(asset_id)
+            else:
+                linhas.append(linha)
+        if not linhas:
+            return [], nao_encontrados
+
+        entradas = np.hstack([self.hi_inputs[linhas], self.fc_inputs[linhas]])
+        for posicao, valor in alteracoes.items():
+            entradas[:, posicao] = valor
+
+        # Variantes: linha 0 é o ativo; linha 1 + j tem a entrada j na média da frota
+        n, d = entradas.shape
+        variantes = np.repeat(entradas[:, None, :], d + 1, axis=1)
+        variantes[:, np.arange(1, d + 1), np.arange(d)] = self.referencia
+        variantes = variantes.reshape(-1, d)
+        saidas = {k: v.reshape(n, d + 1) for k, v in
+                  self._avaliar(variantes[:, :self.num_hi], variantes[:, self.num_hi:]).items()}
+
+        hi, fc, ri = saidas['HI'][:, 0], saidas['FC'][:, 0], saidas['RI'][:, 0]
+        efeitos = ri[:, None] - saidas['RI'][:, 1:]
+        categorias = categorize(ri, drop_unused=False)
+        rankings = {nome: self.ranking(nome, valores) for nome, valores in (('HI', hi), ('FC', fc), ('RI', ri))}
+        nomes_quadrantes = list(QUADRANTES)
+
+        resultados = []
+        for i in range(len(linhas)):
+            hi_alto, fc_alto = hi[i] >= self.limiar_hi, fc[i] >= self.limiar_fc
+            quadrante = nomes_quadrantes[0 if hi_alto and fc_alto else 1 if fc_alto else 2 if hi_alto else 3]
+            ordem = np.argsort(-np.abs(efeitos[i]), kind='stable')[:top]
+            resultados.append({
+                'No.': _nativo(self.ids[linhas[i]]),
+                'HI': float(hi[i]),
+                'Idade': float(saidas['Idade'][i, 0]),
+                'FC': float(fc[i]),
+                'RI': float(ri[i]),
+                'Categoria': None if categorias.isna()[i] else str(categorias[i]),
+                'Quadrante': quadrante,
+                'Acao': QUADRANTES[quadrante],
+                'ranking': {**{nome: int(r[i]) for nome, r in rankings.items()}, 'total': len(self)},
+                'fatores': [{
+                    'sistema': 'HI' if j < self.num_hi else 'FC',
+                    'variavel': MAPA_TRADUCAO.get(str(self.colunas[j]).strip(), str(self.colunas[j]).strip()),
+                    'valor': float(entradas[i, j]),
+                    'media_frota': float(self.referencia[j]),
+                    'efeito_ri': float(efeitos[i, j]),
+                } for j in ordem],
+            })
+        return resultados, nao_encontrados
+
+
+# --- 2. MICRO-LOTES ---
+
+class MicroBatcher:
+    """
+    Agrupa consultas simultâneas em lotes para o `RiskModel`.
+
+    Um único trabalhador espera a primeira consulta, junta as que já estão na fila e
+    as que chegarem em até `max_wait` segundos (até `max_assets` ativos) e avalia tudo
+    de uma vez.
+    Consultas com `alteracoes` próprias formam lotes separados.
+    """
+
+    def __init__(self, model, max_assets=ATIVOS_POR_LOTE_PADRAO, max_wait=ESPERA_LOTE_PADRAO):
+        self.model = model
+        self.max_assets = max_assets
+        self.max_wait = max_wait
+        self.tamanhos_lotes = deque(maxlen=JANELA_METRICAS)
+        self._fila = queue.Queue()
+        self._trabalhador = threading.Thread(target=self._executar, name='micro-lotes', daemon=True)
+        self._trabalhador.start()
+
+    def submit(self, ids, top=FATORES_PADRAO, changes=None):
+        """Enfileira uma consulta e retorna um `Future` com `(resultados, nao_encontrados)`."""
+        futuro = Future()
+        self._fila.put((list(ids), top, changes or {}, futuro))
+        return futuro
+
+    def close(self):
+        self._fila.put(None)
+        self._trabalhador.join()
+
+    def _coletar(self, primeiro):
+        lote, ativos = [primeiro], len(primeiro[0])
+        prazo = time.perf_counter() + self.max_wait
+        while ativos < self.max_assets:
+            # O que já está na fila entra sempre; depois, espera até o prazo
+            restante = prazo - time.perf_counter()
+            try:
+                item = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._fila.put(None)
+                break
+            lote.append(item)
+            ativos += len(item[0])
+        return lote
+
+    def _executar(self):
+        while True:
+            primeiro = self._fila.get()
+            if primeiro is None:
+                return
+            lote = self._coletar(primeiro)
+            grupos = {}
+            for item in lote:
+                grupos.setdefault(json.dumps(item[2], sort_keys=True), []).append(item)
+            for grupo in grupos.values():
+                self._avaliar(grupo)
+
+    def _avaliar(self, grupo):
+        ids = [asset_id for item in grupo for asset_id in item[0]]
+        top = max(item[1] for item in grupo)
+        try:
+            resultados, _ = self.model.query(ids, top, grupo[0][2])
+        except Exception as erro:
+            for item in grupo:
+                item[3].set_exception(erro)
+            return
+        self.tamanhos_lotes.append(len(ids))
+        encontrados = iter(resultados)
+        for pedidos, top_item, _, futuro in grupo:
+            proprios, ausentes = [], []
+            for asset_id in pedidos:
+                if _chave(asset_id) in self.model.indice:
+                    resultado = next(encontrados)
+                    proprios.append({**resultado, 'fatores': resultado['fatores'][:top_item]})
+                else:
+                    ausentes.append(asset_id)
+            futuro.set_result((proprios, ausentes))
+
+
+# --- 3. SERVIDOR HTTP ---
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class RiskRequestHandler(BaseHTTPRequestHandler):
+    """Rotas do serviço; `self.server.servico` é o `RiskService` em execução."""
+
+    protocol_version = 'HTTP/1.1'
+    # Cabeçalhos e corpo saem em escritas separadas: sem isso, Nagle + ACK atrasado somam ~40 ms
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _responder(self, status, conteudo, inicio):
+        try:
+            corpo = json.dumps(conteudo, ensure_ascii=False, allow_nan=False)
+        except ValueError:
+            corpo = json.dumps(_sem_nan(conteudo), ensure_ascii=False, allow_nan=False)
+        corpo = corpo.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+        self.server.servico.register_latency(time.perf_counter() - inicio)
+
+    def _consultar(self, ids, top, alteracoes, inicio):
+        # O pedido é validado antes de entrar na fila, para não derrubar o lote dos outros clientes
+        servico = self.server.servico
+        try:
+            _validar_top(top)
+            alteracoes = servico.model.validate_changes(alteracoes)
+            resultados, ausentes = servico.batcher.submit(ids, top, alteracoes).result()
+        except Exception as erro:
+            self._responder(400, {'erro': str(erro.args[0]) if erro.args else str(erro)}, inicio)
+            return None
+        return resultados, ausentes
+
+    def do_GET(self):
+        inicio = time.perf_counter()
+        url = urlparse(self.path)
+        partes = [p for p in url.path.split('/') if p]
+        if partes == ['saude']:
+            self._responder(200, {'status': 'ok', 'ativos': len(self.server.servico.model)}, inicio)
+        elif partes == ['metricas']:
+            self._responder(200, self.server.servico.metrics(), inicio)
+        elif len(partes) == 2 and partes[0] == 'ativo':
+            try:
+                top = int(parse_qs(url.query).get('top', [FATORES_PADRAO])[0])
+            except ValueError:
+                self._responder(400, {'erro': "'top' deve ser um número inteiro"}, inicio)
+                return
+            resposta = self._consultar([partes[1]], top, None, inicio)
+            if resposta is None:
+                return
+            resultados, _ = resposta
+            if resultados:
+                self._responder(200, resultados[0], inicio)
+            else:
+                self._responder(404, {'erro': f"ID '{partes[1]}' não encontrado."}, inicio)
+        else:
+            self._responder(404, {'erro': f"Rota desconhecida: '{url.path}'"}, inicio)
+
+    def do_POST(self):
+        inicio = time.perf_counter()
+        if urlparse(self.path).path.rstrip('/') != '/consulta':
+            self._responder(404, {'erro': f"Rota desconhecida: '{self.path}'"}, inicio)
+            return
+        try:
+            pedido = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            ids, top, alteracoes = pedido['ids'], pedido.get('top', FATORES_PADRAO), pedido.get('alteracoes')
+            if not isinstance(ids, list):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            self._responder(400, {'erro': 'Corpo esperado: {"ids": [...], "top": 3, "alteracoes": {...}}'}, inicio)
+            return
+        resposta = self._consultar(ids, top, alteracoes, inicio)
+        if resposta is not None:
+            resultados, ausentes = resposta
+            self._responder(200, {'resultados': resultados, 'nao_encontrados': ausentes}, inicio)
+
+
+class UnixRiskRequestHandler(RiskRequestHandler):
+    disable_nagle_algorithm = False  # TCP_NODELAY não existe em sockets Unix
+
+
+class RiskService:
+    """
+    Modelo residente, micro-lotes e servidor HTTP, em TCP (`port`) ou em socket Unix (`socket_path`).
+
+    `start()` atende em uma thread e retorna; `serve_forever()` bloqueia. Com
+    `port=0` o sistema escolhe uma porta livre (veja `address`).
+    """
+
+    def __init__(self, model, host='127.0.0.1', port=PORTA_PADRAO, socket_path=None,
+                 max_assets=ATIVOS_POR_LOTE_PADRAO, max_wait=ESPERA_LOTE_PADRAO):
+        self.model = model
+        self.batcher = MicroBatcher(model, max_assets, max_wait)
+        self.latencias = deque(maxlen=JANELA_METRICAS)
+        self.requisicoes = 0
+        self._trava = threading.Lock()
+        self.socket_path = socket_path
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            self.server = ThreadingUnixHTTPServer(socket_path, UnixRiskRequestHandler)
+        else:
+            self.server = ThreadingHTTPServer((host, port), RiskRequestHandler)
+        self.server.servico = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self.socket_path or 'http://{}:{}'.format(*self.server.server_address[:2])
+
+    def register_latency(self, segundos):
+        with self._trava:
+            self.latencias.append(segundos)
+            self.requisicoes += 1
+
+    def metrics(self):
+        """Latência das últimas requisições (ms) e tamanho dos micro-lotes."""
+        with self._trava:
+            latencias = np.array(self.latencias) * 1e3
+            requisicoes = self.requisicoes
+        lotes = np.array(self.batcher.tamanhos_lotes)
+        metricas = {'requisicoes': requisicoes, 'janela': int(len(latencias)), 'lotes': int(len(lotes))}
+        if len(latencias):
+            metricas.update({
+                'latencia_p50_ms': float(np.percentile(latencias, 50)),
+                'latencia_p99_ms': float(np.percentile(latencias, 99)),
+                'latencia_max_ms': float(latencias.max()),
+            })
+        if len(lotes):
+            metricas['ativos_por_lote_medio'] = float(lotes.mean())
+        return metricas
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='servico-risco', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def close(self):
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+        self.server.server_close()
+        self.batcher.close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- 4. CLIENTE ---
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """`HTTPConnection` sobre um socket Unix."""
+
+    def __init__(self, socket_path, timeout=10):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def connect(address, timeout=10):
+    """Conexão com o serviço: `address` é 'http://host:porta' ou o caminho do socket Unix."""
+    if address.startswith('http://'):
+        url = urlparse(address)
+        return http.client.HTTPConnection(url.hostname, url.port, timeout=timeout)
+    return UnixHTTPConnection(address, timeout)
+
+
+def request(conexao, method, path, body=None):
+    """Faz uma requisição em uma conexão aberta e retorna `(status, json)`."""
+    corpo = None if body is None else json.dumps(body).encode('utf-8')
+    cabecalhos = {} if corpo is None else {'Content-Type': 'application/json'}
+    conexao.request(method, path, body=corpo, headers=cabecalhos)
+    resposta = conexao.getresponse()
+    return resposta.status, json.loads(resposta.read())
+
+
+def load_test(address, ids, num_requests, clients):
+    """
+    Dispara `num_requests` consultas `GET /ativo/<id>` de `clients` threads, cada uma
+    com a sua conexão. Retorna as latências medidas pelo cliente, em ms.
+    """
+    por_cliente = [num_requests // clients + (i < num_requests % clients) for i in range(clients)]
+
+    def cliente(semente, quantidade):
+        gerador = np.random.default_rng(semente)
+        conexao, latencias = connect(address), []
+        try:
+            for asset_id in gerador.choice(ids, quantidade):
+                inicio = time.perf_counter()
+                status, _ = request(conexao, 'GET', f'/ativo/{asset_id}')
+                latencias.append((time.perf_counter() - inicio) * 1e3)
+                if status != 200:
+                    raise RuntimeError(f"Consulta do ativo {asset_id} falhou com status {status}.")
+        finally:
+            conexao.close()
+        return latencias
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        partes = executor.map(cliente, range(clients), por_cliente)
+        return np.concatenate([np.asarray(p) for p in partes])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serviço local de consulta de risco por ativo.')
+    parser.add_argument('hi', nargs='?', default=ARQUIVO_HI_PADRAO, help='Arquivo de HI da frota (CSV ou Parquet)')
+    parser.add_argument('fc', nargs='?', default=ARQUIVO_FC_PADRAO, help='Arquivo de FC da frota (CSV ou Parquet)')
+    parser.add_argument('--fis', default=caminho_matlab, help='Pasta com os arquivos .fis')
+    parser.add_argument('--exato', action='store_true', help='Usa o sistema de risco exato em vez do compilado')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO)
+    parser.add_argument('--socket', help='Atende em um socket Unix neste caminho em vez de TCP')
+    parser.add_argument('--ativos-por-lote', type=int, default=ATIVOS_POR_LOTE_PADRAO)
+    parser.add_argument('--espera-lote-ms', type=float, default=ESPERA_LOTE_PADRAO * 1e3)
+    parser.add_argument('--carga', type=int, metavar='N',
+                        help='Sobe o serviço, dispara N consultas em localhost, mostra as métricas e encerra')
+    parser.add_argument('--clientes', type=int, default=8, help='Clientes simultâneos do teste de carga')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    modelo = RiskModel.from_files(args.hi, args.fc, args.fis, compiled=not args.exato)
+    print(f"✓ {len(modelo):,} ativos carregados em {time.perf_counter() - inicio:.2f} s")
+    servico = RiskService(modelo, args.host, 0 if args.carga else args.porta, args.socket,
+                          args.ativos_por_lote, args.espera_lote_ms / 1e3)
+
+    if args.carga:
+        with servico:
+            latencias = load_test(servico.address, modelo.ids, args.carga, args.clientes)
+            metricas = servico.metrics()
+        print(f"--> {args.carga:,} consultas, {args.clientes} clientes ({servico.address})")
+        print(f"    Cliente:  p50 = {np.percentile(latencias, 50):.2f} ms | p99 = {np.percentile(latencias, 99):.2f} ms")
+        print(f"    Servidor: p50 = {metricas['latencia_p50_ms']:.2f} ms | p99 = {metricas['latencia_p99_ms']:.2f} ms "
+              f"| {metricas['ativos_por_lote_medio']:.1f} ativos por lote")
+        return
+
+    print(f"--> Atendendo em {servico.address} (Ctrl+C para encerrar)")
+    try:
+        servico.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servico.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+"""
+Superfícies de controle dos sistemas fuzzy em lote (o `gensurf` do MATLAB).
+
+Substitui `generate_figure_06/07/08` (Cenario_BR.m), em que cada figura chama o
+`gensurf` sobre uma grade própria:
+- `surface`: superfície de qualquer par de entradas, com as demais fixas;
+- `surfaces`: várias fatias (pares ou valores fixos diferentes) empilhadas em uma
+  única matriz e avaliadas de uma vez pelo motor vetorizado;
+- `atlas`: todos os pares de entradas de um sistema (28 no FC, que tem 8 entradas),
+  divididos entre os processos de um pool.
+
+Como no `gensurf`, as entradas fora do par ficam no centro da faixa, salvo quando
+outro valor é informado em `fixed`. As superfícies ficam em cache em
+`cache_fuzzy/superficies/`, uma por arquivo. A chave é formada pelo hash do .fis,
+pelo par, pelos valores fixos e pela resolução.
+
+Uso:
+    python -m analise_risco.superficie fc --par 1 7 --figura figura_06.png
+    python -m analise_risco.superficie risk --figura figura_08.png
+    python -m analise_risco.superficie fc --atlas --resolucao 200 --figura atlas_fc.png
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analise_risco.compilado import caminho_cache_padrao
+from analise_risco.indices import caminho_matlab, load_systems
+
+caminho_cache_superficies = os.path.join(caminho_cache_padrao, 'superficies')
+
+# Pontos por eixo: o padrão do `gensurf` e o do atlas
+RESOLUCAO_PADRAO = 15
+RESOLUCAO_ATLAS = 200
+
+# Sistema do pool de processos do atlas, preenchido por `_iniciar_processo`
+_estado = {}
+
+
+# --- 1. FATIAS 2-D ---
+
+def _indice_entrada(fis, entrada):
+    """Índice (0-based) de uma entrada dada pelo índice ou pelo nome."""
+    if isinstance(entrada, str):
+        if entrada not in fis.input_names:
+            raise ValueError(f"Entrada desconhecida no sistema '{fis.name}': '{entrada}'.")
+        return fis.input_names.index(entrada)
+    indice = int(entrada)
+    if not 0 <= indice < len(fis.inputs):
+        raise ValueError(f"O sistema '{fis.name}' tem {len(fis.inputs)} entradas; índice inválido: {entrada}.")
+    return indice
+
+
+def _par(fis, pair):
+    i, j = (_indice_entrada(fis, entrada) for entrada in pair)
+    if i == j:
+        raise ValueError(f"O par precisa de duas entradas diferentes; recebido ({pair[0]}, {pair[1]}).")
+    return i, j
+
+
+def reference_point(fis, fixed=None):
+    """
+    Valores das entradas fora do par: o centro de cada faixa, como no `gensurf`.
+
+    `fixed` é um vetor com um valor por entrada ou um dicionário {entrada: valor}
+    (por índice ou nome) que sobrepõe só as entradas informadas.
+    """
+    referencia = np.array([(v.range[0] + v.range[1]) / 2 for v in fis.inputs], dtype=float)
+    if fixed is None:
+        return referencia
+    if isinstance(fixed, dict):
+        for entrada, valor in fixed.items():
+            referencia[_indice_entrada(fis, entrada)] = float(valor)
+        return referencia
+    fixed = np.asarray(fixed, dtype=float)
+    if fixed.shape != referencia.shape:
+        raise ValueError(f"O sistema '{fis.name}' espera {len(referencia)} valores fixos, recebeu {fixed.size}.")
+    return fixed.copy()
+
+
+def _grade(fis, par, referencia, resolucao):
+    """Eixos da fatia e a matriz (resolucao^2, num_inputs) de entradas, na ordem do `meshgrid`."""
+    i, j = par
+    x = np.linspace(*fis.inputs[i].range, resolucao)
+    y = np.linspace(*fis.inputs[j].range, resolucao)
+    X = np.broadcast_to(referencia, (resolucao * resolucao, len(referencia))).copy()
+    xx, yy = np.meshgrid(x, y)
+    X[:, i] = xx.ravel()
+    X[:, j] = yy.ravel()
+    return x, y, X
+
+
+def _avaliar_fatias(fis, fatias, resolucao):
+    """Avalia as fatias `(par, referencia)` em uma única chamada a `fis.evaluate`."""
+    grades = [_grade(fis, par, referencia, resolucao) for par, referencia in fatias]
+    if not grades:
+        return []
+    saidas = fis.evaluate(np.concatenate([X for _, _, X in grades]))
+    pontos = resolucao * resolucao
+    resultados = []
+    for k, ((par, referencia), (x, y, _)) in enumerate(zip(fatias, grades)):
+        z = saidas[k * pontos:(k + 1) * pontos].T.reshape(-1, resolucao, resolucao)
+        resultados.append({'par': np.array(par), 'x': x, 'y': y, 'z': z, 'referencia': referencia})
+    return resultados
+
+
+# --- 2. CACHE ---
+
+def _chave_cache(fis, par, referencia, resolucao):
+    # Os valores das entradas do próprio par não afetam a superfície
+    fixos = [None if k in par else float(v) for k, v in enumerate(referencia)]
+    texto = json.dumps({'fingerprint': fis.fingerprint, 'par': list(par), 'fixos': fixos, 'resolucao': resolucao},
+                       sort_keys=True)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:16]
+
+
+def _caminho_cache(cache_dir, fis, par, referencia, resolucao):
+    nome = f'{fis.name}_{par[0] + 1}_{par[1] + 1}_{resolucao}_{_chave_cache(fis, par, referencia, resolucao)}.npz'
+    return os.path.join(cache_dir, nome)
+
+
+def _ler_cache(caminho):
+    with np.load(caminho) as dados:
+        return {k: dados[k] for k in dados.files}
+
+
+def _gravar_cache(caminho, resultado):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    tmp = f'{caminho}.{os.getpid()}.tmp.npz'
+    np.savez(tmp, **resultado)
+    os.replace(tmp, caminho)
+
+
+def surfaces(fis, slices, resolution=RESOLUCAO_PADRAO, cache_dir=caminho_cache_superficies):
+    """
+    Superfícies de várias fatias 2-D, avaliadas em um único lote.
+
+    `slices` é uma lista de `(pair, fixed)`: `pair` são duas entradas (índices
+    0-based ou nomes) e `fixed`, os valores das demais (veja `reference_point`).
+    As fatias já em cache são lidas; as outras são avaliadas juntas e gravadas.
+    Cada resultado tem `par`, `x` e `y` (eixos), `z` (num_outputs, len(y), len(x))
+    e `referencia`, na mesma ordem de `slices`.
+    """
+    fatias = [(_par(fis, pair), reference_point(fis, fixed)) for pair, fixed in slices]
+    resultados = [None] * len(fatias)
+    faltantes = []
+    for k, (par, referencia) in enumerate(fatias):
+        caminho = cache_dir and _caminho_cache(cache_dir, fis, par, referencia, resolution)
+        if caminho and os.path.exists(caminho):
+            resultados[k] = _ler_cache(caminho)
+        else:
+            faltantes.append(k)
+    for k, resultado in zip(faltantes, _avaliar_fatias(fis, [fatias[k] for k in faltantes], resolution)):
+        resultados[k] = resultado
+        if cache_dir:
+            _gravar_cache(_caminho_cache(cache_dir, fis, *fatias[k], resolution), resultado)
+    return resultados
+
+
+def surface(fis, pair=(0, 1), fixed=None, resolution=RESOLUCAO_PADRAO, cache_dir=caminho_cache_superficies):
+    """Superfície de um par de entradas, como `gensurf(fis, pair + 1)` (veja `surfaces`)."""
+    return surfaces(fis, [(pair, fixed)], resolution, cache_dir)[0]
+
+
+# --- 3. ATLAS DE TODOS OS PARES ---
+
+def _iniciar_processo(fis):
+    _estado['fis'] = fis
+
+
+def _avaliar_grupo(fatias, resolucao):
+    return _avaliar_fatias(_estado['fis'], fatias, resolucao)
+
+
+def atlas(fis, fixed=None, resolution=RESOLUCAO_ATLAS, workers=None, cache_dir=caminho_cache_superficies):
+    """
+    Superfícies de todos os pares de entradas (i < j) com as demais em `fixed`.
+
+    Os pares fora do cache são divididos em `workers` grupos (padrão: um por núcleo),
+    e cada processo avalia o seu grupo em um único lote. Retorna um dicionário
+    {(i, j): resultado}, com índices 0-based e resultados como em `surfaces`.
+    """
+    referencia = reference_point(fis, fixed)
+    pares = list(itertools.combinations(range(len(fis.inputs)), 2))
+    resultados, faltantes = {}, []
+    for par in pares:
+        caminho = cache_dir and _caminho_cache(cache_dir, fis, par, referencia, resolution)
+        if caminho and os.path.exists(caminho):
+            resultados[par] = _ler_cache(caminho)
+        else:
+            faltantes.append(par)
+
+    workers = min(workers or os.cpu_count() or 1, len(faltantes))
+    if workers > 1:
+        limites = np.linspace(0, len(faltantes), workers + 1).astype(int)
+        grupos = [[(par, referencia) for par in faltantes[a:b]] for a, b in zip(limites[:-1], limites[1:])]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_processo, initargs=(fis,)) as pool:
+            calculados = [r for lote in pool.map(_avaliar_grupo, grupos, [resolution] * workers) for r in lote]
+    else:
+        calculados = _avaliar_fatias(fis, [(par, referencia) for par in faltantes], resolution)
+
+    for par, resultado in zip(faltantes, calculados):
+        resultados[par] = resultado
+        if cache_dir:
+            _gravar_cache(_caminho_cache(cache_dir, fis, par, referencia, resolution), resultado)
+    return {par: resultados[par] for par in pares}
+
+
+def interaction_ranking(superficies, output=0):
+    """Pares ordenados pela amplitude da saída na fatia (máx. - mín.), da maior para a menor."""
+    amplitudes = {par: float(np.ptp(r['z'][output])) for par, r in superficies.items()}
+    return sorted(amplitudes.items(), key=lambda item: -item[1])
+
+
+# --- 4. FIGURAS ---
+
+def plot_surface(fis, resultado, caminho, output=0, titulo=None):
+    """Superfície 3-D com o mapa de cores `jet`, como as figuras 6, 7 e 8."""
+    import matplotlib.pyplot as plt
+
+    i, j = (int(k) for k in resultado['par'])
+    xx, yy = np.meshgrid(resultado['x'], resultado['y'])
+    fig = plt.figure(figsize=(8.5, 7))
+    ax = fig.add_subplot(projection='3d')
+    ax.plot_surface(xx, yy, resultado['z'][output], cmap='jet', edgecolor='k', linewidth=0.2)
+    ax.set_xlabel(fis.input_names[i])
+    ax.set_ylabel(fis.input_names[j])
+    ax.set_zlabel(fis.output_names[output])
+    ax.set_title(titulo or f'{fis.output_names[output]}: {fis.input_names[i]} vs. {fis.input_names[j]}')
+    fig.savefig(caminho, dpi=150)
+    plt.close(fig)
+
+
+def plot_atlas(fis, superficies, caminho, output=0):
+    """Matriz de mapas de calor de todos os pares (triângulo inferior), na mesma escala de cores."""
+    import matplotlib.pyplot as plt
+
+    d = len(fis.inputs)
+    nomes = fis.input_names
+    vmin, vmax = fis.outputs[output].range
+    fig, eixos = plt.subplots(d - 1, d - 1, figsize=(2.2 * (d - 1), 2.2 * (d - 1)), squeeze=False)
+    imagem = None
+    for linha in range(d - 1):
+        for coluna in range(d - 1):
+            ax = eixos[linha, coluna]
+            par = (coluna, linha + 1)
+            if par not in superficies:
+                ax.axis('off')
+                continue
+            r = superficies[par]
+            imagem = ax.imshow(r['z'][output], origin='lower', cmap='jet', vmin=vmin, vmax=vmax, aspect='auto',
+                               extent=(r['x'][0], r['x'][-1], r['y'][0], r['y'][-1]))
+            ax.tick_params(labelsize=6)
+            if linha == d - 2:
+                ax.set_xlabel(nomes[coluna], fontsize=8)
+            if coluna == 0:
+                ax.set_ylabel(nomes[linha + 1], fontsize=8)
+    if imagem is not None:
+        fig.colorbar(imagem, ax=eixos, shrink=0.6, label=fis.output_names[output])
+    fig.suptitle(f'Atlas de Superfícies: {fis.output_names[output]}')
+    fig.savefig(caminho, dpi=150)
+    plt.close(fig)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Superfícies de controle dos sistemas fuzzy (gensurf em lote).')
+    parser.add_argument('sistema', choices=['hi', 'fc', 'risk'])
+    parser.add_argument('--par', nargs=2, default=['1', '2'],
+                        help='Par de entradas: índices 1-based, como no gensurf, ou nomes (padrão: 1 2)')
+    parser.add_argument('--atlas', action='store_true', help='Calcula todos os pares de entradas')
+    parser.add_argument('--resolucao', type=int, help=f'Pontos por eixo (padrão: {RESOLUCAO_PADRAO}; '
+                                                      f'no atlas, {RESOLUCAO_ATLAS})')
+    parser.add_argument('--fixo', nargs='+', default=[], metavar='ENTRADA=VALOR',
+                        help='Valores das entradas fora do par (padrão: centro da faixa)')
+    parser.add_argument('--processos', type=int, help='Processos do atlas (padrão: um por núcleo)')
+    parser.add_argument('--saida', type=int, default=1, help='Saída do sistema (1-based)')
+    parser.add_argument('--fis', default=caminho_matlab, help='Pasta com os arquivos .fis')
+    parser.add_argument('--sem-cache', action='store_true')
+    parser.add_argument('--figura', help='Grava a superfície (ou a matriz do atlas) neste arquivo')
+    args = parser.parse_args(argv)
+    if args.figura:
+        # A linha de comando só grava a figura em arquivo; a escolha do backend fica aqui,
+        # e não nas funções de desenho, para não mudar o backend de quem as importa
+        import matplotlib
+        matplotlib.use('Agg')
+
+    fis = load_systems(args.fis)[args.sistema]
+    cache_dir = None if args.sem_cache else caminho_cache_superficies
+    fixos = {}
+    for item in args.fixo:
+        entrada, _, valor = item.partition('=')
+        fixos[int(entrada) - 1 if entrada.isdigit() else entrada] = float(valor)
+    saida = args.saida - 1
+
+    inicio = time.perf_counter()
+    if args.atlas:
+        resolucao = args.resolucao or RESOLUCAO_ATLAS
+        superficies = atlas(fis, fixos, resolucao, args.processos, cache_dir)
+        print(f"✓ Atlas de {len(superficies)} pares ({resolucao}x{resolucao}) em {time.perf_counter() - inicio:.2f} s")
+        print(f"\n--- Amplitude de {fis.output_names[saida]} por par ---")
+        for (i, j), amplitude in interaction_ranking(superficies, saida):
+            print(f"{fis.input_names[i]:<30}{fis.input_names[j]:<30}{amplitude:>10.4f}")
+        if args.figura:
+            plot_atlas(fis, superficies, args.figura, saida)
+            print(f"-> Figura salva em: '{args.figura}'")
+        return
+
+    par = [int(e) - 1 if e.isdigit() else e for e in args.par]
+    resultado = surface(fis, par, fixos, args.resolucao or RESOLUCAO_PADRAO, cache_dir)
+    z = resultado['z'][saida]
+    print(f"✓ Superfície {fis.input_names[resultado['par'][0]]} x {fis.input_names[resultado['par'][1]]} "
+          f"({len(resultado['x'])}x{len(resultado['y'])}) em {time.perf_counter() - inicio:.2f} s: "
+          f"{fis.output_names[saida]} entre {z.min():.4f} e {z.max():.4f}")
+    if args.figura:
+        plot_surface(fis, resultado, args.figura, saida)
+        print(f"-> Figura salva em: '{args.figura}'")
+
+
+if __name__ == '__main__':
+    main()